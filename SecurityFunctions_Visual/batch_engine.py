@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量蒙特卡洛模拟引擎
+
+以NumPy数组一次性模拟大量攻击场景（攻击类型 × 攻击流量 × 防御方案 × 重复次数），
+不经过线程池和sleep，数秒内即可得到两种防御方案各项性能指标的分布。
+各时间步的取值分布与simulator.py中的实时模拟共用同一组常量和攻击阶段定义，
+指标口径与实时模拟采集的性能统计一致（检测率/阻断率取两个子系统的平均值）。
+
+注意：当前模拟模型中攻击类型和攻击流量不影响指标分布，结果仍按场景分别给出，
+便于与界面上的攻击设置对照。
+
+用法：
+    python batch_engine.py --replicas 10000 --seed 42 --output batch_results.csv
+"""
+
+import argparse
+import csv
+import os
+import time
+
+import numpy as np
+
+from perf_stats import METRIC_KEYS, SCHEMES
+from simulator import (
+    FLEXIBLE_DEFENSE_FW_RATE,
+    FLEXIBLE_DEFENSE_IDS_RATE,
+    FLEXIBLE_DEFENSE_MTTR,
+    FLEXIBLE_DEFENSE_QPS,
+    FLEXIBLE_MTTR_DRIFT,
+    FLEXIBLE_TRIGGER_FW_RATE,
+    FLEXIBLE_TRIGGER_IDS_RATE,
+    FLEXIBLE_TRIGGER_MTTR,
+    FLEXIBLE_TRIGGER_QPS,
+    TRADITIONAL_ATTACK_MTTR,
+    TRADITIONAL_ATTACK_QPS,
+    TRADITIONAL_ATTACK_RATES,
+    TRADITIONAL_MTTR_DRIFT,
+    flexible_phase_profile,
+    generate_flexible_attack_phases,
+    generate_traditional_attack_phases,
+)
+
+
+# 攻击类型：1 攻击AGV控制系统，2 攻击调度系统，3 同时攻击
+ATTACK_TYPES = (1, 2, 3)
+
+# 默认攻击流量档位（界面默认AGV为2000、调度系统为1500）
+DEFAULT_TRAFFIC_LEVELS = (500, 1000, 1500, 2000, 4000)
+
+# 攻击阶段结束后继续采样的tick数（AI方案对应约30秒的警戒期）
+DEFAULT_STEADY_TICKS = 10
+
+# 结果中输出的分位数
+PERCENTILES = (5, 50, 95)
+
+
+def _uniform(rng, bounds, shape):
+    """[low, high)均匀分布"""
+    return rng.uniform(bounds[0], bounds[1], shape)
+
+
+def _randint(rng, bounds, shape):
+    """[low, high]整数均匀分布，与random.randint一致"""
+    return rng.integers(bounds[0], bounds[1] + 1, shape).astype(np.float64)
+
+
+def _record(samples, ids_rate_1, ids_rate_2, fw_rate_1, fw_rate_2, qps, mttr):
+    """记录一个时间步的性能指标样本"""
+    samples["ids_detection_rates"].append((ids_rate_1 + ids_rate_2) / 2)
+    samples["fw_block_rates"].append((fw_rate_1 + fw_rate_2) / 2)
+    samples["qps_values"].append(qps)
+    samples["mttr_values"].append(mttr)
+
+
+def simulate_traditional(rng, shape, steady_ticks=DEFAULT_STEADY_TICKS):
+    """模拟传统方案的攻击过程，返回各指标的样本数组，形状为shape + (时间步数,)"""
+    samples = {key: [] for key in METRIC_KEYS}
+    n_phases = len(generate_traditional_attack_phases())
+
+    def attack_rates(progress_factor=None):
+        rates = {key: _uniform(rng, bounds, shape) * 100 for key, bounds in TRADITIONAL_ATTACK_RATES.items()}
+        if progress_factor is not None:
+            # 随着攻击进行，检测率和阻断率逐渐降低，但不低于5%
+            rates = {key: np.maximum(5, value * progress_factor) for key, value in rates.items()}
+        return rates
+
+    def drift(mttr):
+        step = _uniform(rng, (-TRADITIONAL_MTTR_DRIFT, TRADITIONAL_MTTR_DRIFT), shape)
+        return np.clip(mttr + step, *TRADITIONAL_ATTACK_MTTR)
+
+    # 触发攻击
+    mttr = _uniform(rng, TRADITIONAL_ATTACK_MTTR, shape)
+    qps = _randint(rng, TRADITIONAL_ATTACK_QPS, shape)
+    _record(samples, **attack_rates(), qps=qps, mttr=mttr)
+
+    # 攻击阶段
+    for i in range(n_phases):
+        mttr = drift(mttr)
+        qps = _randint(rng, TRADITIONAL_ATTACK_QPS, shape)
+        _record(samples, **attack_rates(1.0 - i / n_phases), qps=qps, mttr=mttr)
+
+    # 攻击阶段结束后的最终状态和持续攻击状态
+    for _ in range(1 + steady_ticks):
+        mttr = drift(mttr)
+        qps = _randint(rng, TRADITIONAL_ATTACK_QPS, shape)
+        _record(samples, **attack_rates(), qps=qps, mttr=mttr)
+
+    return {key: np.stack(values, axis=-1) for key, values in samples.items()}
+
+
+def simulate_flexible(rng, shape, steady_ticks=DEFAULT_STEADY_TICKS):
+    """模拟AI柔性重组方案的攻击过程，返回各指标的样本数组，形状为shape + (时间步数,)"""
+    samples = {key: [] for key in METRIC_KEYS}
+    n_phases = len(generate_flexible_attack_phases())
+
+    def rates(ids_bounds, fw_bounds):
+        return {
+            "ids_rate_1": _uniform(rng, ids_bounds, shape) * 100,
+            "ids_rate_2": _uniform(rng, ids_bounds, shape) * 100,
+            "fw_rate_1": _uniform(rng, fw_bounds, shape) * 100,
+            "fw_rate_2": _uniform(rng, fw_bounds, shape) * 100,
+        }
+
+    # 触发攻击
+    mttr = _uniform(rng, FLEXIBLE_TRIGGER_MTTR, shape)
+    qps = _randint(rng, FLEXIBLE_TRIGGER_QPS, shape)
+    _record(samples, **rates(FLEXIBLE_TRIGGER_IDS_RATE, FLEXIBLE_TRIGGER_FW_RATE), qps=qps, mttr=mttr)
+
+    # 攻击阶段：随阶段推进逐步改善
+    for i in range(n_phases):
+        ids_bounds, fw_bounds, mttr_bounds, qps_bounds = flexible_phase_profile(i)
+        mttr = _uniform(rng, mttr_bounds, shape)
+        qps = _randint(rng, qps_bounds, shape)
+        _record(samples, **rates(ids_bounds, fw_bounds), qps=qps, mttr=mttr)
+
+    # 重组完成，进入持续防御状态（警戒期内MTTR保持不变）
+    step = _uniform(rng, (-FLEXIBLE_MTTR_DRIFT, FLEXIBLE_MTTR_DRIFT), shape)
+    mttr = np.clip(mttr + step, *FLEXIBLE_DEFENSE_MTTR)
+    for _ in range(1 + steady_ticks):
+        qps = _randint(rng, FLEXIBLE_DEFENSE_QPS, shape)
+        _record(samples, **rates(FLEXIBLE_DEFENSE_IDS_RATE, FLEXIBLE_DEFENSE_FW_RATE), qps=qps, mttr=mttr)
+
+    return {key: np.stack(values, axis=-1) for key, values in samples.items()}
+
+
+SCHEME_SIMULATORS = {
+    "traditional": simulate_traditional,
+    "flexible": simulate_flexible,
+}
+
+
+class BatchResult:
+    """批量模拟结果：samples[方案][指标]的形状为(攻击类型, 攻击流量, 重复次数, 时间步数)"""
+
+    def __init__(self, attack_types, traffic_levels, replicas, samples, elapsed):
+        self.attack_types = attack_types
+        self.traffic_levels = traffic_levels
+        self.replicas = replicas
+        self.samples = samples
+        self.elapsed = elapsed
+
+    @property
+    def scenario_count(self):
+        """模拟的场景总数（含重复次数）"""
+        return len(self.attack_types) * len(self.traffic_levels) * len(self.samples) * self.replicas
+
+    def summary(self):
+        """按场景和指标汇总：每次重复取攻击过程中的平均值，再统计其均值、标准差和分位数"""
+        rows = []
+        for scheme, metrics in self.samples.items():
+            for key, values in metrics.items():
+                per_replica = values.mean(axis=-1)
+                mean = per_replica.mean(axis=-1)
+                std = per_replica.std(axis=-1, ddof=1) if self.replicas > 1 else np.zeros_like(mean)
+                percentiles = np.percentile(per_replica, PERCENTILES, axis=-1)
+                for a, attack_type in enumerate(self.attack_types):
+                    for t, traffic in enumerate(self.traffic_levels):
+                        row = {
+                            "attack_type": attack_type,
+                            "traffic": traffic,
+                            "scheme": scheme,
+                            "metric": METRIC_KEYS[key],
+                            "replicas": self.replicas,
+                            "mean": float(mean[a, t]),
+                            "std": float(std[a, t]),
+                        }
+                        for p, value in zip(PERCENTILES, percentiles[:, a, t]):
+                            row[f"p{p}"] = float(value)
+                        rows.append(row)
+        return rows
+
+    def scheme_means(self):
+        """各方案各指标在全部场景上的平均值，格式与/api/performance-stats一致"""
+        return {
+            scheme: {METRIC_KEYS[key]: float(values.mean()) for key, values in metrics.items()}
+            for scheme, metrics in self.samples.items()
+        }
+
+
+def run_batch(attack_types=ATTACK_TYPES, traffic_levels=DEFAULT_TRAFFIC_LEVELS, schemes=SCHEMES,
+              replicas=1000, steady_ticks=DEFAULT_STEADY_TICKS, seed=None):
+    """批量模拟全部场景组合，返回BatchResult"""
+    rng = np.random.default_rng(seed)
+    shape = (len(attack_types), len(traffic_levels), replicas)
+
+    start = time.perf_counter()
+    samples = {scheme: SCHEME_SIMULATORS[scheme](rng, shape, steady_ticks) for scheme in schemes}
+    elapsed = time.perf_counter() - start
+
+    return BatchResult(tuple(attack_types), tuple(traffic_levels), replicas, samples, elapsed)
+
+
+def save_summary_to_csv(rows, filepath):
+    """将汇总结果写入CSV文件"""
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(filepath, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"结果已保存到: {filepath}")
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='批量蒙特卡洛模拟：对比传统方案与AI柔性重组方案')
+    parser.add_argument('--replicas', type=int, default=1000, help='每个场景的重复次数')
+    parser.add_argument('--traffic', type=int, nargs='+', default=list(DEFAULT_TRAFFIC_LEVELS), help='攻击流量档位')
+    parser.add_argument('--attack-types', type=int, nargs='+', default=list(ATTACK_TYPES), choices=ATTACK_TYPES, help='攻击类型')
+    parser.add_argument('--steady-ticks', type=int, default=DEFAULT_STEADY_TICKS, help='攻击阶段结束后继续采样的tick数')
+    parser.add_argument('--seed', type=int, help='随机种子')
+    parser.add_argument('--output', type=str, help='汇总结果CSV文件路径')
+    args = parser.parse_args()
+
+    result = run_batch(args.attack_types, args.traffic, replicas=args.replicas,
+                       steady_ticks=args.steady_ticks, seed=args.seed)
+    print(f"已模拟 {result.scenario_count} 个攻击场景，耗时 {result.elapsed:.2f} 秒")
+
+    for scheme, metrics in result.scheme_means().items():
+        print(f"{scheme}: " + ", ".join(f"{name}={value:.2f}" for name, value in metrics.items()))
+
+    if args.output:
+        save_summary_to_csv(result.summary(), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Flask API热点路径基准测试
+
+分别通过Flask测试客户端（进程内，不经过网络）和真实的本地HTTP服务器，
+在不同并发数下压测 /api/status、/api/performance-stats、/api/set-attack、
+/api/set-defense-scheme、/api/trigger-attack，统计延迟分位数、吞吐量和每个请求的内存分配，
+结果保存为JSON，可与之前版本的结果对比（--compare）发现性能退化。
+
+每个请求的内存分配用tracemalloc在单线程的测试客户端中单独测量（追踪会拖慢请求，不与计时混在一起）：
+alloc_peak_kb 为处理一个请求时的峰值临时分配，alloc_retained_bytes 为每个请求平均残留的内存。
+
+用法：
+    python benchmark_api.py --requests 2000 --concurrency 1 4 16 --output benchmark_results.json
+    python benchmark_api.py --compare benchmark_old.json benchmark_results.json
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import subprocess
+import threading
+import time
+import tracemalloc
+
+# 基准测试不记录指标历史、事件日志和场景缓存，不在工作目录下写文件
+os.environ.setdefault("SIM_METRICS_DIR", "")
+os.environ.setdefault("SIM_EVENT_LOG_DIR", "")
+os.environ.setdefault("SIM_SCENARIO_CACHE_DIR", "")
+
+import numpy as np
+
+
+# 基准测试使用独立的会话，不影响默认会话
+BENCHMARK_SESSION = "benchmark"
+
+# 压测的接口：名称 -> (方法, 路径, JSON请求体)
+ENDPOINTS = {
+    "status": ("GET", "/api/status", None),
+    "performance-stats": ("GET", "/api/performance-stats", None),
+    "set-attack": ("POST", "/api/set-attack", {"attack_id": 3, "agv_traffic": 2000, "scheduler_traffic": 1500}),
+    "set-defense-scheme": ("POST", "/api/set-defense-scheme", {"scheme": "flexible"}),
+    # 每次调用在开始攻击和停止攻击之间切换
+    "trigger-attack": ("POST", "/api/trigger-attack", None),
+}
+
+# 输出的延迟分位数
+PERCENTILES = (50, 90, 99)
+
+
+class TestClientTarget:
+    """通过Flask测试客户端发送请求（每个线程一个客户端）"""
+
+    name = "test_client"
+
+    def __init__(self, flask_app):
+        self.app = flask_app
+        self._local = threading.local()
+
+    def request(self, method, path, body):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body, headers={"X-Session-Id": BENCHMARK_SESSION})
+        response.get_data()
+        return response.status_code
+
+    def close(self):
+        pass
+
+
+class ServerTarget:
+    """在后台线程中启动真实的本地HTTP服务器（多线程），通过http.client发送请求"""
+
+    name = "server"
+
+    def __init__(self, flask_app):
+        from werkzeug.serving import make_server
+
+        # 不输出每个请求的访问日志
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        self.server = make_server("127.0.0.1", 0, flask_app, threaded=True)
+        self.port = self.server.server_port
+        self.thread = threading.Thread(target=self.server.serve_forever, name="benchmark-server", daemon=True)
+        self.thread.start()
+
+    def request(self, method, path, body):
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+        try:
+            headers = {"X-Session-Id": BENCHMARK_SESSION}
+            payload = None
+            if body is not None:
+                payload = json.dumps(body)
+                headers["Content-Type"] = "application/json"
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        finally:
+            connection.close()
+
+    def close(self):
+        self.server.shutdown()
+        self.thread.join()
+
+
+def run_load(target, endpoint, requests, concurrency):
+    """以concurrency个线程共发送requests个请求，返回延迟（秒）数组、总耗时和出错数"""
+    method, path, body = ENDPOINTS[endpoint]
+    per_thread = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    barrier = threading.Barrier(concurrency + 1)
+
+    def worker(index):
+        samples = latencies[index]
+        barrier.wait()
+        for _ in range(per_thread[index]):
+            start = time.perf_counter()
+            try:
+                status = target.request(method, path, body)
+                if status >= 400:
+                    errors[index] += 1
+            except Exception:
+                errors[index] += 1
+            samples.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return np.concatenate([np.asarray(samples) for samples in latencies]), elapsed, sum(errors)
+
+
+def measure_allocations(flask_app, endpoint, requests):
+    """用tracemalloc测量单线程测试客户端中每个请求的峰值临时分配和平均残留内存"""
+    method, path, body = ENDPOINTS[endpoint]
+    target = TestClientTarget(flask_app)
+    # 预热，排除首次请求的一次性分配
+    for _ in range(10):
+        target.request(method, path, body)
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        for _ in range(requests):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            target.request(method, path, body)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_peak_kb": float(np.mean(peaks)) / 1024,
+        "alloc_retained_bytes": retained / requests,
+    }
+
+
+def summarize(mode, endpoint, concurrency, latencies, elapsed, errors):
+    """汇总一组压测结果"""
+    latencies_ms = latencies * 1000
+    result = {
+        "mode": mode,
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": int(len(latencies)),
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": {"mean": float(latencies_ms.mean()), "max": float(latencies_ms.max())},
+    }
+    for p, value in zip(PERCENTILES, np.percentile(latencies_ms, PERCENTILES)):
+        result["latency_ms"][f"p{p}"] = float(value)
+    return result
+
+
+def git_revision():
+    """当前代码的git提交（不在git仓库中时为None）"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(modes, endpoints, concurrency_levels, requests, alloc_requests):
+    """运行全部基准测试，返回可保存为JSON的结果"""
+    import app
+
+    results = []
+    try:
+        for mode in modes:
+            target = TestClientTarget(app.app) if mode == "test_client" else ServerTarget(app.app)
+            try:
+                for endpoint in endpoints:
+                    method, path, body = ENDPOINTS[endpoint]
+                    # 预热（创建会话、填充编码缓存等）
+                    for _ in range(20):
+                        target.request(method, path, body)
+                    # 内存分配与并发数无关，每个接口只测量一次
+                    allocations = {}
+                    if mode == "test_client" and alloc_requests:
+                        allocations = measure_allocations(app.app, endpoint, alloc_requests)
+                    for concurrency in concurrency_levels:
+                        latencies, elapsed, errors = run_load(target, endpoint, requests, concurrency)
+                        result = summarize(mode, endpoint, concurrency, latencies, elapsed, errors)
+                        result.update(allocations)
+                        results.append(result)
+                        print(format_result(result))
+            finally:
+                target.close()
+    finally:
+        app.run_manager.shutdown(wait=False)
+        app.chart_cache.shutdown()
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "requests": requests,
+        },
+        "results": results,
+    }
+
+
+def format_result(result):
+    """单行输出一组结果"""
+    latency = result["latency_ms"]
+    line = (f"{result['mode']:<11} {result['endpoint']:<19} c={result['concurrency']:<3} "
+            f"{result['throughput_rps']:>8.0f} req/s  p50={latency['p50']:.2f}ms p90={latency['p90']:.2f}ms "
+            f"p99={latency['p99']:.2f}ms")
+    if "alloc_peak_kb" in result:
+        line += f"  alloc={result['alloc_peak_kb']:.1f}KB retained={result['alloc_retained_bytes']:.0f}B"
+    if result["errors"]:
+        line += f"  errors={result['errors']}"
+    return line
+
+
+def compare(old_path, new_path):
+    """对比两次基准测试结果的吞吐量和p50/p99延迟"""
+    with open(old_path, encoding="utf-8") as f:
+        old = {(r["mode"], r["endpoint"], r["concurrency"]): r for r in json.load(f)["results"]}
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)["results"]
+
+    def change(before, after):
+        return f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+
+    for result in new:
+        key = (result["mode"], result["endpoint"], result["concurrency"])
+        if key not in old:
+            continue
+        before = old[key]
+        print(f"{key[0]:<11} {key[1]:<19} c={key[2]:<3} "
+              f"throughput {change(before['throughput_rps'], result['throughput_rps']):>8}  "
+              f"p50 {change(before['latency_ms']['p50'], result['latency_ms']['p50']):>8}  "
+              f"p99 {change(before['latency_ms']['p99'], result['latency_ms']['p99']):>8}")
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='Flask API热点路径基准测试')
+    parser.add_argument('--requests', type=int, default=1000, help='每个接口每个并发数下的请求数')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16], help='并发线程数')
+    parser.add_argument('--endpoints', nargs='+', default=list(ENDPOINTS), choices=list(ENDPOINTS), help='压测的接口')
+    parser.add_argument('--modes', nargs='+', default=["test_client", "server"], choices=["test_client", "server"],
+                        help='test_client为进程内测试客户端，server为真实的本地HTTP服务器')
+    parser.add_argument('--alloc-requests', type=int, default=200, help='测量内存分配的请求数（0为不测量）')
+    parser.add_argument('--output', type=str, help='结果JSON文件路径')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='对比两次结果，不运行基准测试')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run_benchmarks(args.modes, args.endpoints, args.concurrency, args.requests, args.alloc_requests)
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"结果已保存到: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
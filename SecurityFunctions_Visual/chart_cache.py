@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图表渲染缓存
+
+渲染结果按键（会话、数据版本、图表类型、格式）保存在LRU缓存中；
+渲染在固定大小的进程池中进行，同一个键的并发请求只触发一次渲染（single-flight），
+其余请求等待同一个结果。数据版本变化后旧的结果不再被访问，随LRU淘汰。
+"""
+
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+def render_chart(kind, data, fmt, dpi):
+    """在渲染进程中绘制图表，返回编码后的图片（按需导入matplotlib等绘图依赖）"""
+    from performance_analyzer import render_chart_bytes
+    return render_chart_bytes(kind, data, fmt, dpi)
+
+
+class ChartCache:
+    """图表渲染结果的LRU缓存，渲染在进程池中进行，同一键只渲染一次"""
+
+    def __init__(self, render, max_entries=64, max_workers=2, timeout=60.0):
+        self.render = render
+        self.max_entries = max_entries
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.renders = 0   # 实际渲染次数
+        self.hits = 0      # 缓存命中次数
+
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.RLock()  # 渲染已完成时回调会在持锁线程中立即执行
+        self._executor = None
+
+    def _get_executor(self):
+        """首次渲染时创建进程池（spawn方式，不复制Web进程中的线程和锁）"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def get(self, key, *args):
+        """获取key对应的渲染结果，未缓存时以args调用render渲染（并发请求共享同一次渲染）"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._get_executor().submit(self.render, *args)
+                self._inflight[key] = future
+                self.renders += 1
+                future.add_done_callback(lambda done: self._finish(key, done))
+        return future.result(self.timeout)
+
+    def _finish(self, key, future):
+        """渲染完成：成功时写入缓存并淘汰最久未用的结果，失败时只移除进行中的记录"""
+        with self._lock:
+            self._inflight.pop(key, None)
+            if future.cancelled():
+                return
+            if isinstance(future.exception(), BrokenProcessPool):
+                # 渲染进程异常退出后进程池不可再用，下次渲染时重新创建
+                self._executor = None
+            if future.exception() is not None:
+                return
+            self._entries[key] = future.result()
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def shutdown(self):
+        """关闭渲染进程池"""
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能数据持续采集
+
+按固定频率（可达10–50Hz）采集 /api/performance-stats 和 /api/status：
+    - 采样时刻按 起点 + n × 周期 计算，不会随请求耗时累积漂移；来不及的采样直接跳过而不是补发
+    - 所有请求复用同一个保持连接的HTTP会话，每个请求都有超时，出错后指数退避
+    - /api/status 使用ETag条件请求，状态未变化时服务端只返回304
+    - 样本先写入内存缓冲区，由后台线程按间隔批量追加到CSV文件
+
+同时提供多实例采集：用asyncio并发请求大量实例（每条产线一个app.py）的性能统计，
+限制并发数，每个实例单独超时，结果合并为按实例标记的一份数据，
+一轮采集的耗时约为一次往返时间，而不是N次顺序请求之和。
+"""
+
+import asyncio
+import csv
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+# 每个样本记录的性能指标
+PERFORMANCE_METRICS = ("ids_detection_rate", "fw_block_rate", "qps", "mttr")
+# 每个样本记录的状态字段
+STATUS_FIELDS = ("version", "defense_scheme", "is_attacking", "risk_level", "ids_rate_1_value", "ids_rate_2_value",
+                 "fw_rate_1_value", "fw_rate_2_value", "mttr", "container_qps", "ids_security", "fw_security")
+
+# 退避时间指数的上限，长时间连续失败时退避时间停在max_backoff，不会溢出
+MAX_BACKOFF_EXPONENT = 16
+
+SAMPLE_FIELDS = (
+    ("timestamp", "scheduled", "latency_ms")
+    + tuple(f"{scheme}_{metric}" for scheme in ("traditional", "flexible") for metric in PERFORMANCE_METRICS)
+    + STATUS_FIELDS
+)
+
+
+def sample_row(performance, status):
+    """把一次采集的性能统计和系统状态展开为一行（缺失的值为空）"""
+    row = {}
+    for scheme in ("traditional", "flexible"):
+        values = performance.get(scheme, {})
+        for metric in PERFORMANCE_METRICS:
+            row[f"{scheme}_{metric}"] = values.get(metric)
+    for field in STATUS_FIELDS:
+        row[field] = status.get(field)
+    return row
+
+
+class BatchCSVWriter:
+    """CSV批量写入器：append只写内存缓冲区，后台线程按间隔把缓冲的行追加到文件"""
+
+    def __init__(self, filepath, fields, flush_interval=5.0):
+        self.filepath = filepath
+        self.fields = tuple(fields)
+        self.flush_interval = flush_interval
+        self.rows_written = 0
+
+        self._rows = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """启动后台写入线程"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="collector-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台线程并写出剩余数据"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def append(self, row):
+        """缓冲一行"""
+        with self._lock:
+            self._rows.append(row)
+
+    def flush(self):
+        """把缓冲的行追加到文件，返回写入的行数"""
+        with self._lock:
+            rows = self._rows
+            self._rows = []
+        if not rows:
+            return 0
+        directory = os.path.dirname(self.filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        write_header = not os.path.exists(self.filepath)
+        with open(self.filepath, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=self.fields, extrasaction="ignore")
+            if write_header:
+                writer.writeheader()
+            writer.writerows(rows)
+        self.rows_written += len(rows)
+        return len(rows)
+
+    def _run(self):
+        """后台线程：每隔flush_interval秒批量写入"""
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"写入采集数据出错: {e}")
+
+
+class PerformanceCollector:
+    """按固定频率采集性能统计和系统状态的常驻采集器"""
+
+    def __init__(self, base_url, filepath, rate=10.0, timeout=1.0, flush_interval=5.0, max_backoff=10.0):
+        self.base_url = base_url.rstrip("/")
+        self.period = 1.0 / rate
+        # 连接超时和读取超时
+        self.timeout = (timeout, timeout)
+        self.max_backoff = max_backoff
+        self.writer = BatchCSVWriter(filepath, SAMPLE_FIELDS, flush_interval)
+
+        # 运行统计
+        self.samples = 0
+        self.errors = 0
+        self.skipped = 0        # 因请求耗时过长或退避而跳过的采样时刻
+        self.max_lateness = 0.0  # 实际采样时刻相对计划时刻的最大延迟（秒）
+
+        self._stop = threading.Event()
+        self._session = None
+        self._status = {}
+        self._status_etag = None
+
+    def _open_session(self):
+        """创建保持连接的HTTP会话（只需一个连接池，每个端点一个连接）"""
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        return session
+
+    def stop(self):
+        """请求停止采集（可在信号处理函数或其他线程中调用）"""
+        self._stop.set()
+
+    def backoff_delay(self, failures):
+        """第failures次连续失败后的退避时间：period × 2^failures（不超过max_backoff），乘以随机抖动"""
+        exponent = min(failures, MAX_BACKOFF_EXPONENT)
+        return min(self.max_backoff, self.period * 2 ** exponent) * random.uniform(0.5, 1.0)
+
+    def sample(self):
+        """采集一次，返回一行数据；请求失败时抛出异常"""
+        start = time.perf_counter()
+        response = self._session.get(f"{self.base_url}/api/performance-stats", timeout=self.timeout)
+        response.raise_for_status()
+        performance = response.json()
+
+        headers = {"If-None-Match": self._status_etag} if self._status_etag else {}
+        response = self._session.get(f"{self.base_url}/api/status", headers=headers, timeout=self.timeout)
+        if response.status_code != 304:
+            response.raise_for_status()
+            self._status = response.json()
+            self._status_etag = response.headers.get("ETag")
+
+        row = sample_row(performance, self._status)
+        row["latency_ms"] = (time.perf_counter() - start) * 1000
+        return row
+
+    def run(self, duration=None):
+        """按固定频率采集，直到调用stop()或达到duration秒"""
+        self._session = self._open_session()
+        self.writer.start()
+        failures = 0
+        start = time.monotonic()
+        deadline = None if duration is None else start + duration
+        # 采样时刻为 anchor + tick × period，只在退避后重新对齐
+        anchor, tick = start, 0
+        try:
+            while not self._stop.is_set():
+                scheduled = anchor + tick * self.period
+                now = time.monotonic()
+                if deadline is not None and scheduled >= deadline:
+                    break
+                if scheduled > now:
+                    if self._stop.wait(scheduled - now):
+                        break
+                    now = time.monotonic()
+                self.max_lateness = max(self.max_lateness, now - scheduled)
+
+                try:
+                    row = self.sample()
+                except Exception as e:
+                    self.errors += 1
+                    failures += 1
+                    backoff = self.backoff_delay(failures)
+                    print(f"采集失败（第{failures}次连续失败），{backoff:.2f}秒后重试: {e}")
+                    if self._stop.wait(backoff):
+                        break
+                    # 退避结束后从当前时刻重新开始计时
+                    anchor, tick = time.monotonic(), 0
+                    continue
+
+                failures = 0
+                row["timestamp"] = time.time()
+                row["scheduled"] = time.time() - (time.monotonic() - scheduled)
+                self.writer.append(row)
+                self.samples += 1
+
+                # 跳过已经错过的采样时刻，不补发
+                tick += 1
+                missed = int((time.monotonic() - (anchor + tick * self.period)) // self.period)
+                if missed > 0:
+                    tick += missed
+                    self.skipped += missed
+        finally:
+            self._session.close()
+            self._session = None
+            self.writer.stop()
+        return self.summary()
+
+    def summary(self):
+        """运行统计"""
+        return {
+            "samples": self.samples,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "rows_written": self.writer.rows_written,
+            "max_lateness_ms": self.max_lateness * 1000,
+        }
+
+
+def load_instances(filepath):
+    """读取实例列表文件：每行为"URL"或"名称 URL"，空行和#开头的行忽略，返回[(名称, URL)]"""
+    instances = []
+    with open(filepath, encoding="utf-8") as f:
+        for line in f:
+            parts = line.split("#", 1)[0].split()
+            if not parts:
+                continue
+            name, url = (parts[0], parts[1]) if len(parts) > 1 else (parts[0], parts[0])
+            instances.append((name, url.rstrip("/")))
+    return instances
+
+
+async def _read_chunked(reader):
+    """读取分块传输编码的响应体"""
+    body = bytearray()
+    while True:
+        size = int((await reader.readline()).split(b";", 1)[0], 16)
+        if size == 0:
+            await reader.readline()
+            return bytes(body)
+        body += await reader.readexactly(size)
+        await reader.readline()
+
+
+async def fetch_json(url, timeout):
+    """用asyncio流发送一个HTTP/1.1 GET请求并解析JSON响应，整个请求（连接+读取）限时timeout秒"""
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+
+    async def request():
+        reader, writer = await asyncio.open_connection(parts.hostname, port, ssl=parts.scheme == "https" or None)
+        try:
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nAccept: application/json\r\n"
+                         f"Connection: close\r\n\r\n".encode("latin-1"))
+            await writer.drain()
+
+            status = int((await reader.readline()).split(b" ", 2)[1])
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            if headers.get("transfer-encoding", "").lower() == "chunked":
+                body = await _read_chunked(reader)
+            elif "content-length" in headers:
+                body = await reader.readexactly(int(headers["content-length"]))
+            else:
+                body = await reader.read()
+            if status != 200:
+                raise RuntimeError(f"HTTP {status}")
+            return json.loads(body)
+        finally:
+            writer.close()
+
+    return await asyncio.wait_for(request(), timeout)
+
+
+async def _collect_instance(name, url, semaphore, timeout):
+    """采集一个实例的性能统计，失败时在结果中记录错误而不抛出"""
+    async with semaphore:
+        start = time.perf_counter()
+        row = {"instance": name, "url": url, "timestamp": time.time()}
+        try:
+            performance = await fetch_json(f"{url}/api/performance-stats", timeout)
+            row.update(sample_row(performance, {}))
+            row["ok"] = True
+            row["error"] = ""
+        except Exception as e:
+            row["ok"] = False
+            row["error"] = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+        row["latency_ms"] = (time.perf_counter() - start) * 1000
+        return row
+
+
+async def collect_instances_async(instances, concurrency=100, timeout=2.0):
+    """并发采集全部实例（最多concurrency个同时进行），返回按实例顺序排列的结果行"""
+    semaphore = asyncio.Semaphore(concurrency)
+    return await asyncio.gather(*(_collect_instance(name, url, semaphore, timeout) for name, url in instances))
+
+
+def collect_instances(instances, concurrency=100, timeout=2.0):
+    """collect_instances_async的同步入口"""
+    return asyncio.run(collect_instances_async(instances, concurrency, timeout))
+
+
+INSTANCE_FIELDS = (
+    ("instance", "url", "timestamp", "ok", "error", "latency_ms")
+    + tuple(f"{scheme}_{metric}" for scheme in ("traditional", "flexible") for metric in PERFORMANCE_METRICS)
+)
+
+
+def average_instances(rows):
+    """成功采集的实例的平均性能统计，格式与/api/performance-stats一致；没有成功的实例时返回None"""
+    rows = [row for row in rows if row["ok"]]
+    if not rows:
+        return None
+    data = {}
+    for scheme in ("traditional", "flexible"):
+        data[scheme] = {}
+        for metric in PERFORMANCE_METRICS:
+            values = [row[f"{scheme}_{metric}"] for row in rows if row[f"{scheme}_{metric}"] is not None]
+            data[scheme][metric] = sum(values) / len(values) if values else 0.0
+    return data
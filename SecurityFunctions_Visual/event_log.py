@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+事件日志
+
+每个会话的日志事件带有单调递增的序号。最近的若干条保存在内存中的定长队列里，供实时视图使用；
+全部事件同时追加写入分段的磁盘日志，按序号分页和按类型、时间过滤查询：
+    <根目录>/<会话ID>/<首条序号>.jsonl   事件内容，一行一个JSON，每段最多segment_size条
+    <根目录>/<会话ID>/<首条序号>.idx     定长索引，每条事件一条记录（序号、时间、类型码、内容偏移、长度）
+
+段内序号连续，按序号定位只需计算下标；类型和时间过滤在内存映射的索引列上向量化完成，
+只有命中的事件才会读取内容，查询耗时与事件总数无关。
+写入先进入内存缓冲区，由后台线程批量落盘；尚未落盘的事件同样可以被查询到。
+"""
+
+import bisect
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+# 日志类型及其编码
+LOG_TYPES = ("info", "warning", "error", "success")
+TYPE_CODES = {name: code for code, name in enumerate(LOG_TYPES)}
+
+# 索引记录格式
+INDEX_DTYPE = np.dtype([
+    ("seq", "<u8"),
+    ("time", "<f8"),       # 模拟时间（Unix时间戳）
+    ("type", "u1"),        # 日志类型，见TYPE_CODES
+    ("offset", "<u8"),     # 事件在.jsonl文件中的字节偏移
+    ("length", "<u4"),     # 事件的字节长度（含换行符）
+])
+
+
+def matches(event, types=None, start=None, end=None):
+    """事件是否满足类型和时间范围[start, end)过滤条件"""
+    return ((types is None or event["type"] in types)
+            and (start is None or event["time"] >= start)
+            and (end is None or event["time"] < end))
+
+
+class EventJournal:
+    """分段的事件日志：append只写内存缓冲区，后台线程按间隔批量追加到各会话的当前段"""
+
+    def __init__(self, root, segment_size=65536, flush_interval=1.0, max_buffer_events=10000):
+        self.root = root
+        self.segment_size = segment_size
+        self.flush_interval = flush_interval
+        self.max_buffer_events = max_buffer_events
+        self.events_written = 0
+
+        self._pending = {}        # 会话ID -> 尚未落盘的事件（按序号递增）
+        self._flushed = {}        # 会话ID -> 已落盘的最大序号
+        self._segments = {}       # 会话ID -> 各段首条序号（升序）
+        self._time_ranges = {}    # (会话ID, 首条序号) -> 已写满的段的(最早时间, 最晚时间)
+        self._checked_segments = set()  # 本进程已检查过完整性的(会话ID, 首条序号)
+        self._buffered = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        """启动后台写入线程（重复调用无副作用）"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="event-journal", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        """停止后台线程并写出剩余事件"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            self._stopping = True
+        if thread is not None:
+            self._wakeup.set()
+            thread.join(timeout)
+        self.flush()
+
+    def _series_dir(self, series):
+        return os.path.join(self.root, series)
+
+    def _load_segments(self, series):
+        """读取会话已有的段（调用方持有_lock）"""
+        segments = self._segments.get(series)
+        if segments is None:
+            try:
+                names = os.listdir(self._series_dir(series))
+            except OSError:
+                names = []
+            segments = self._segments[series] = sorted(int(name[:-4]) for name in names
+                                                       if name.endswith(".idx") and name[:-4].isdigit())
+        return segments
+
+    def _index(self, series, first):
+        """段的索引（只读内存映射），只包含已完整写入的记录"""
+        path = os.path.join(self._series_dir(series), f"{first:020d}.idx")
+        rows = os.path.getsize(path) // INDEX_DTYPE.itemsize
+        if rows == 0:
+            return np.empty(0, dtype=INDEX_DTYPE)
+        return np.memmap(path, dtype=INDEX_DTYPE, mode="r", shape=(rows,))
+
+    def last_seq(self, series):
+        """会话已记录的最大序号（没有事件时为0），用于重启后继续编号"""
+        with self._lock:
+            pending = self._pending.get(series)
+            if pending:
+                return pending[-1]["seq"]
+            flushed = self._flushed.get(series)
+            if flushed is not None:
+                return flushed
+            segments = self._load_segments(series)
+        last = 0
+        for first in reversed(segments):
+            index = self._index(series, first)
+            if len(index):
+                last = int(index["seq"][-1])
+                break
+        with self._lock:
+            self._flushed.setdefault(series, last)
+        return last
+
+    def append(self, series, event):
+        """追加一个事件（series为会话ID，event须包含seq、time、type），只写内存缓冲区"""
+        with self._lock:
+            self._pending.setdefault(series, []).append(event)
+            self._buffered += 1
+            full = self._buffered >= self.max_buffer_events
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """把缓冲的事件追加写入磁盘，返回写入的事件数
+
+        写入期间事件仍留在缓冲区中（查询可见），写完后才移出。
+        """
+        written = 0
+        with self._flush_lock:
+            with self._lock:
+                batches = {series: list(events) for series, events in self._pending.items() if events}
+            for series, events in batches.items():
+                try:
+                    self._write_series(series, events)
+                except OSError as e:
+                    print(f"写入事件日志出错 ({series}): {e}")
+                    continue
+                with self._lock:
+                    del self._pending[series][:len(events)]
+                    self._buffered -= len(events)
+                    self._flushed[series] = events[-1]["seq"]
+                written += len(events)
+            self.events_written += written
+        return written
+
+    def _write_series(self, series, events):
+        """把一个会话的事件追加到当前段，写满时开始新的段"""
+        series_dir = self._series_dir(series)
+        os.makedirs(series_dir, exist_ok=True)
+        with self._lock:
+            segments = self._load_segments(series)
+            first = segments[-1] if segments else None
+        count = 0
+        if first is not None:
+            if (series, first) not in self._checked_segments:
+                self._repair_segment(series_dir, first)
+                self._checked_segments.add((series, first))
+            count = os.path.getsize(os.path.join(series_dir, f"{first:020d}.idx")) // INDEX_DTYPE.itemsize
+
+        position = 0
+        while position < len(events):
+            new_segment = first is None or count >= self.segment_size
+            if new_segment:
+                if first is not None:
+                    # 已写满的段不再变化，缓存其时间范围用于查询剪枝
+                    index = self._index(series, first)
+                    with self._lock:
+                        self._time_ranges[(series, first)] = (float(index["time"].min()), float(index["time"].max()))
+                first, count = events[position]["seq"], 0
+            batch = events[position:position + self.segment_size - count]
+            self._write_segment(series_dir, first, batch)
+            if new_segment:
+                # 新段的文件写入后才对查询可见
+                with self._lock:
+                    self._segments[series].append(first)
+            position += len(batch)
+            count += len(batch)
+
+    def _repair_segment(self, series_dir, first):
+        """本进程首次向已有的段追加前，截掉上次写入中断留下的不完整记录
+
+        索引截断到完整的记录数（并去掉内容不完整的记录），内容截断到最后一条索引记录的末尾，
+        否则之后追加的索引记录会错位、内容的偏移量也不再对应。
+        """
+        idx_path = os.path.join(series_dir, f"{first:020d}.idx")
+        jsonl_path = os.path.join(series_dir, f"{first:020d}.jsonl")
+        idx_size = os.path.getsize(idx_path)
+        jsonl_size = os.path.getsize(jsonl_path) if os.path.exists(jsonl_path) else 0
+        rows = idx_size // INDEX_DTYPE.itemsize
+        end = 0
+        if rows:
+            index = np.fromfile(idx_path, dtype=INDEX_DTYPE, count=rows)
+            ends = index["offset"] + index["length"]
+            rows = int(np.searchsorted(ends, jsonl_size, side="right"))
+            end = int(ends[rows - 1]) if rows else 0
+        if idx_size != rows * INDEX_DTYPE.itemsize:
+            print(f"事件日志索引 {idx_path} 不完整，截断到 {rows} 条")
+            with open(idx_path, "r+b") as f:
+                f.truncate(rows * INDEX_DTYPE.itemsize)
+        if jsonl_size != end:
+            with open(jsonl_path, "r+b") as f:
+                f.truncate(end)
+
+    def _write_segment(self, series_dir, first, events):
+        """追加事件内容和索引记录；先写内容再写索引，读者只会看到完整的事件"""
+        lines = [(json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8") for event in events]
+        with open(os.path.join(series_dir, f"{first:020d}.jsonl"), "ab") as f:
+            offset = f.tell()
+            f.write(b"".join(lines))
+        index = np.empty(len(events), dtype=INDEX_DTYPE)
+        index["seq"] = [event["seq"] for event in events]
+        index["time"] = [event["time"] for event in events]
+        index["type"] = [TYPE_CODES.get(event["type"], 0) for event in events]
+        index["length"] = [len(line) for line in lines]
+        index["offset"] = list(itertools.accumulate((len(line) for line in lines[:-1]), initial=offset))
+        with open(os.path.join(series_dir, f"{first:020d}.idx"), "ab") as f:
+            f.write(index.tobytes())
+
+    def _run(self):
+        """后台线程：每隔flush_interval秒（或缓冲区满时）批量写入"""
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def query(self, series, after=None, before=None, types=None, start=None, end=None, limit=100):
+        """按序号分页查询事件
+
+        指定after时返回序号大于after的事件（升序），否则返回序号小于before的事件（降序，before为None时从最新开始）。
+        types为类型名集合，时间范围为[start, end)。最多返回limit条。
+        """
+        with self._lock:
+            flushed = self._flushed.get(series, 0)
+            pending = list(self._pending.get(series, ()))
+            segments = list(self._load_segments(series))
+        pending = [event for event in pending if event["seq"] > flushed]
+        codes = None if types is None else [TYPE_CODES[name] for name in types if name in TYPE_CODES]
+        ascending = after is not None
+
+        if ascending:
+            pending = [event for event in pending if event["seq"] > after and matches(event, types, start, end)]
+            results = self._query_segments(series, segments, flushed, after, None, codes, start, end, limit)
+            return (results + pending)[:limit]
+
+        pending = [event for event in reversed(pending)
+                   if (before is None or event["seq"] < before) and matches(event, types, start, end)]
+        if len(pending) >= limit:
+            return pending[:limit]
+        return pending + self._query_segments(series, segments, flushed, None, before, codes, start, end,
+                                              limit - len(pending))
+
+    def _query_segments(self, series, segments, flushed, after, before, codes, start, end, limit):
+        """在已落盘的段中查询：after不为None时升序，否则降序"""
+        ascending = after is not None
+        if ascending:
+            position = max(0, bisect.bisect_right(segments, after) - 1)
+            order = segments[position:]
+        else:
+            upper = flushed if before is None else min(flushed, before - 1)
+            order = list(reversed(segments[:bisect.bisect_right(segments, upper)]))
+            before = upper + 1
+
+        results = []
+        for first in order:
+            if len(results) >= limit:
+                break
+            index = None
+            time_range = self._time_ranges.get((series, first))
+            if time_range is None and (start is not None or end is not None) and first != segments[-1]:
+                # 重启前写满的段：首次按时间查询时计算并缓存其时间范围
+                index = self._index(series, first)
+                time_range = self._time_ranges[(series, first)] = (float(index["time"].min()), float(index["time"].max()))
+            if time_range is not None and ((start is not None and time_range[1] < start)
+                                           or (end is not None and time_range[0] >= end)):
+                continue
+            if index is None:
+                index = self._index(series, first)
+            # 段内序号连续，直接按下标截取序号范围
+            lo = max(0, after + 1 - first) if ascending else 0
+            hi = min(len(index), flushed + 1 - first)
+            if not ascending:
+                hi = min(hi, before - first)
+            if lo >= hi:
+                continue
+            rows = index[lo:hi]
+            mask = np.ones(len(rows), dtype=bool)
+            if codes is not None:
+                mask &= np.isin(rows["type"], codes)
+            if start is not None:
+                mask &= rows["time"] >= start
+            if end is not None:
+                mask &= rows["time"] < end
+            hits = np.flatnonzero(mask)
+            hits = hits[:limit - len(results)] if ascending else hits[::-1][:limit - len(results)]
+            results.extend(self._read_events(series, first, rows[hits]))
+        return results
+
+    def read(self, series, seqs):
+        """按序号读取事件，返回{序号: 事件}（不存在的序号忽略）"""
+        with self._lock:
+            flushed = self._flushed.get(series, 0)
+            pending = list(self._pending.get(series, ()))
+            segments = list(self._load_segments(series))
+        wanted = set(seqs)
+        events = {event["seq"]: event for event in pending if event["seq"] > flushed and event["seq"] in wanted}
+
+        # 已落盘的序号按所在段分组，每段一次读取
+        groups = {}
+        for seq in sorted(wanted.difference(events)):
+            position = bisect.bisect_right(segments, seq) - 1
+            if position >= 0 and seq <= flushed:
+                groups.setdefault(segments[position], []).append(seq)
+        for first, group in groups.items():
+            index = self._index(series, first)
+            rows = np.asarray(group, dtype="<u8") - first
+            records = index[rows[rows < len(index)]]
+            events.update((event["seq"], event) for event in self._read_events(series, first, records))
+        return events
+
+    def _read_events(self, series, first, records):
+        """按索引记录读取事件内容"""
+        if len(records) == 0:
+            return []
+        events = []
+        with open(os.path.join(self._series_dir(series), f"{first:020d}.jsonl"), "rb") as f:
+            for offset, length in zip(records["offset"].tolist(), records["length"].tolist()):
+                f.seek(offset)
+                events.append(json.loads(f.read(length)))
+        return events
+
+
+class EventLog:
+    """单个会话的事件日志：内存中保留最近max_entries条，配置了journal时全部事件同时写入磁盘"""
+
+    def __init__(self, series, max_entries=100, journal=None):
+        self.series = series
+        self.journal = journal
+        self.max_entries = max_entries
+        self.last_seq = journal.last_seq(series) if journal is not None else 0
+        self._entries = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+
+    def append(self, log_type, content, now=None):
+        """追加一条日志，返回事件（seq为序号，timestamp为显示用的时分秒，time为模拟时间）"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self.last_seq += 1
+            event = {
+                "seq": self.last_seq,
+                "timestamp": time.strftime("%H:%M:%S", time.localtime(now)),
+                "time": now,
+                "type": log_type,
+                "content": content,
+            }
+            self._entries.append(event)
+            if self.journal is not None:
+                self.journal.append(self.series, event)
+        return event
+
+    def recent(self, upto=None, limit=None):
+        """内存中序号不超过upto的最近limit条事件（升序）"""
+        with self._lock:
+            entries = list(self._entries)
+        if upto is not None and entries:
+            # 队列中的序号连续，按序号差直接截断
+            entries = entries[:max(0, len(entries) - (entries[-1]["seq"] - upto))]
+        if limit is not None:
+            entries = entries[-limit:] if limit else []
+        return entries
+
+    def get(self, seqs):
+        """按序号获取事件（按seqs的顺序，不存在的序号忽略），内存中没有的从磁盘日志读取"""
+        events = {event["seq"]: event for event in self.recent()}
+        missing = [seq for seq in seqs if seq not in events]
+        if missing and self.journal is not None:
+            events.update(self.journal.read(self.series, missing))
+        return [events[seq] for seq in seqs if seq in events]
+
+    def query(self, after=None, before=None, types=None, start=None, end=None, limit=100):
+        """分页查询事件，参数见EventJournal.query；未配置journal时只查询内存中的事件"""
+        if self.journal is not None:
+            return self.journal.query(self.series, after, before, types, start, end, limit)
+        entries = [event for event in self.recent() if matches(event, types, start, end)]
+        if after is not None:
+            return [event for event in entries if event["seq"] > after][:limit]
+        return [event for event in reversed(entries) if before is None or event["seq"] < before][:limit]
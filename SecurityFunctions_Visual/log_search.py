@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日志全文检索
+
+每条日志写入事件日志时同步更新倒排索引：
+    - 日志内容大多来自固定的模板，先按内容去重，相同内容只分词和建立倒排一次
+    - 中日韩文字按单字和相邻两字（bigram）切分，英文和数字按整词切分（不区分大小写）
+    - 倒排表为 词 -> 包含该词的内容；每个（内容, 日志类型）再对应一个有序的日志序号数组
+    - 按序号每4096条记录一次时间范围，时间过滤先换算为序号范围
+
+查询时每个查询词匹配所有以它开头的索引词（英文和数字按词前缀匹配，如"ag"可以找到"AGV"，
+不匹配词中间的部分），取各查询词候选内容的交集，再逐个核对关键词确实是内容的子串（bigram交集可能误命中），
+最后从候选的序号数组中按序号从新到旧归并出一页结果，耗时只与命中数有关。
+
+实时索引只覆盖最近的日志（两代轮换，内存占用有上限）；配置了磁盘日志时，
+更早的日志由后台线程从磁盘日志按序号顺序增量建立历史索引，检索请求不会等待补建。
+"""
+
+import bisect
+import heapq
+import re
+import sys
+import threading
+from array import array
+
+from event_log import TYPE_CODES
+
+
+# 中日韩文字（连续的一段）或英文数字单词
+_TOKEN_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+|[0-9a-z_]+")
+
+# 每块的日志条数（按块记录时间范围）
+TIME_BLOCK = 4096
+
+# 估算内存用的对象大小：内容ID，(内容ID, 类型码)键和空序号数组
+_NUMBER_BYTES = sys.getsizeof(1 << 20)
+_OCCURRENCES_BYTES = sys.getsizeof((0, 0)) + sys.getsizeof(array("Q"))
+
+
+def tokenize(text):
+    """把文本切分为索引词：中日韩文字为每个单字和相邻两字，英文和数字为小写整词"""
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(text.casefold()):
+        if run[0].isascii():
+            tokens.append(run)
+        else:
+            tokens.extend(run)
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class LogSearchIndex:
+    """日志倒排索引：索引序号大于base_seq的日志，按序号顺序增量添加"""
+
+    def __init__(self, base_seq=0):
+        self.base_seq = base_seq
+        self.last_seq = base_seq
+
+        self._message_ids = {}    # 内容 -> 内容ID
+        self._contents = []       # 内容ID -> 小写内容（用于核对关键词）
+        self._postings = {}       # 词 -> 内容ID集合
+        self._vocabulary = []     # 排序的全部索引词（用于前缀匹配）
+        self._occurrences = {}    # (内容ID, 类型码) -> 有序的日志序号数组
+        self._times = array("d")  # 序号 - base_seq - 1 -> 日志时间
+        self._block_min = []      # 每块的最早时间
+        self._block_max = []      # 每块的最晚时间
+        self._lock = threading.Lock()
+        # 估算内存用的增量计数：内容、索引词和倒排表集合的字节数
+        self._content_bytes = 0
+        self._token_bytes = 0
+        self._posting_bytes = 0
+
+    def add(self, event):
+        """索引一条日志（序号须大于已索引的序号）"""
+        seq, now = event["seq"], event["time"]
+        with self._lock:
+            if seq <= self.last_seq:
+                return
+            # 跳过的序号（不应出现）以NaN占位，不会命中任何时间过滤
+            while self.last_seq + 1 < seq:
+                self._append_time(float("nan"))
+            self._append_time(now)
+
+            content = event["content"]
+            message_id = self._message_ids.get(content)
+            if message_id is None:
+                message_id = self._message_ids[content] = len(self._contents)
+                self._contents.append(content.casefold())
+                self._content_bytes += sys.getsizeof(content) + sys.getsizeof(self._contents[-1])
+                for token in set(tokenize(content)):
+                    postings = self._postings.get(token)
+                    if postings is None:
+                        postings = self._postings[token] = set()
+                        bisect.insort(self._vocabulary, token)
+                        self._token_bytes += sys.getsizeof(token)
+                    size = sys.getsizeof(postings)
+                    postings.add(message_id)
+                    self._posting_bytes += sys.getsizeof(postings) - size
+            key = (message_id, TYPE_CODES.get(event["type"], 0))
+            occurrences = self._occurrences.get(key)
+            if occurrences is None:
+                occurrences = self._occurrences[key] = array("Q")
+            occurrences.append(seq)
+
+    def _append_time(self, now):
+        """记录下一个序号的时间并更新所在块的时间范围（调用方持有_lock）"""
+        position = len(self._times)
+        self._times.append(now)
+        self.last_seq += 1
+        if position % TIME_BLOCK == 0:
+            self._block_min.append(now)
+            self._block_max.append(now)
+        elif now == now:
+            block = position // TIME_BLOCK
+            if not self._block_min[block] <= now:
+                self._block_min[block] = now
+            if not self._block_max[block] >= now:
+                self._block_max[block] = now
+
+    def _prefix_postings(self, token):
+        """所有以token开头的索引词的内容ID集合（调用方持有_lock）"""
+        lo = bisect.bisect_left(self._vocabulary, token)
+        hi = bisect.bisect_left(self._vocabulary, token + "\U0010ffff", lo)
+        if hi - lo == 1:
+            return self._postings[self._vocabulary[lo]]
+        return set().union(*(self._postings[word] for word in self._vocabulary[lo:hi]))
+
+    def _matching_messages(self, terms):
+        """包含全部关键词的内容ID（调用方持有_lock）"""
+        tokens = {token for term in terms for token in tokenize(term)}
+        if tokens:
+            postings = [self._prefix_postings(token) for token in tokens]
+            if not all(postings):
+                return []
+            postings.sort(key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+        else:
+            # 关键词中没有可索引的字符（如只有标点），只能逐个核对
+            candidates = range(len(self._contents))
+        return [message_id for message_id in candidates
+                if all(term in self._contents[message_id] for term in terms)]
+
+    def _seq_range(self, start, end):
+        """时间范围[start, end)可能涉及的序号范围[lo, hi]（调用方持有_lock）"""
+        lo, hi = self.base_seq + 1, self.last_seq
+        if start is not None:
+            block = next((i for i, latest in enumerate(self._block_max) if latest >= start), None)
+            if block is None:
+                return lo, lo - 1
+            lo += block * TIME_BLOCK
+        if end is not None:
+            block = next((i for i in range(len(self._block_min) - 1, -1, -1) if self._block_min[i] < end), None)
+            if block is None:
+                return lo, lo - 1
+            hi = min(hi, self.base_seq + (block + 1) * TIME_BLOCK)
+        return lo, hi
+
+    def search(self, query, types=None, start=None, end=None, before=None, limit=100):
+        """查询包含全部关键词（空白分隔，不区分大小写）的日志，返回按序号从新到旧的序号列表
+
+        types为类型名集合，时间范围为[start, end)，只返回序号小于before的日志，最多limit条。
+        """
+        terms = query.casefold().split()
+        codes = list(TYPE_CODES.values()) if types is None else [TYPE_CODES[name] for name in types]
+        with self._lock:
+            lo, hi = self._seq_range(start, end)
+            if before is not None:
+                hi = min(hi, before - 1)
+            if lo > hi:
+                return []
+
+            # 每个（内容, 类型）的序号数组中位于[lo, hi]的部分，从新到旧归并
+            heap = []
+            for message_id in self._matching_messages(terms):
+                for code in codes:
+                    occurrences = self._occurrences.get((message_id, code))
+                    if occurrences is None:
+                        continue
+                    first = bisect.bisect_left(occurrences, lo)
+                    position = bisect.bisect_right(occurrences, hi) - 1
+                    if position >= first:
+                        heap.append((-occurrences[position], position, first, occurrences))
+            heapq.heapify(heap)
+
+            results = []
+            while heap and len(results) < limit:
+                seq, position, first, occurrences = heap[0]
+                seq = -seq
+                now = self._times[seq - self.base_seq - 1]
+                if (start is None or now >= start) and (end is None or now < end):
+                    results.append(seq)
+                if position > first:
+                    heapq.heapreplace(heap, (-occurrences[position - 1], position - 1, first, occurrences))
+                else:
+                    heapq.heappop(heap)
+            return results
+
+    def nbytes(self):
+        """估算占用的内存（字节），由增量计数和各容器本身的大小得到，不遍历索引"""
+        with self._lock:
+            containers = (self._message_ids, self._contents, self._postings, self._vocabulary, self._occurrences,
+                          self._times)
+            return (
+                sum(sys.getsizeof(container) for container in containers)
+                + self._content_bytes + self._token_bytes + self._posting_bytes
+                + len(self._contents) * _NUMBER_BYTES
+                + len(self._occurrences) * _OCCURRENCES_BYTES
+                + (self.last_seq - self.base_seq) * self._times.itemsize
+            )
+
+    def stats(self):
+        """索引规模"""
+        with self._lock:
+            return {
+                "events": self.last_seq - self.base_seq,
+                "messages": len(self._contents),
+                "tokens": len(self._postings),
+            }
+
+
+class LogSearch:
+    """单个会话的日志检索
+
+    新日志写入时实时索引。实时索引分两代，当前一代满window条后成为上一代，原来的上一代丢弃，
+    因此只覆盖最近的window到2×window条日志（默认与内存中保留的日志条数相同）。
+    配置了磁盘日志时，实时索引之前的日志在检索时由后台线程从磁盘日志增量补建历史索引，
+    补建完成前检索结果可能缺少较早的日志（indexing为True）。
+    """
+
+    def __init__(self, event_log, window=None, backfill_page=10000):
+        self.event_log = event_log
+        self.window = window or event_log.max_entries
+        self.backfill_page = backfill_page
+        # 实时索引：(当前一代, 上一代)，整体替换，检索时无需加锁
+        self._generations = (LogSearchIndex(event_log.last_seq), None)
+        self._history = None
+        self._history_thread = None
+        self._history_lock = threading.Lock()
+
+    @property
+    def live_base(self):
+        """实时索引覆盖序号大于live_base的日志"""
+        current, previous = self._generations
+        return (previous or current).base_seq
+
+    def add(self, event):
+        """索引一条新日志，当前一代满window条时轮换"""
+        current, previous = self._generations
+        current.add(event)
+        if current.last_seq - current.base_seq >= self.window:
+            self._generations = (LogSearchIndex(current.last_seq), current)
+
+    @property
+    def indexing(self):
+        """历史索引是否还没有覆盖实时索引之前的全部日志"""
+        if self.event_log.journal is None:
+            return False
+        history = self._history
+        return history is None or history.last_seq < self.live_base
+
+    def _backfill_history(self):
+        """后台线程：按序号顺序从磁盘日志读取，把历史索引补到实时索引的起点"""
+        try:
+            while self._history.last_seq < self.live_base:
+                target = self.live_base
+                events = self.event_log.query(after=self._history.last_seq, limit=self.backfill_page)
+                added = False
+                for event in events:
+                    if event["seq"] > target:
+                        break
+                    self._history.add(event)
+                    added = True
+                if not added:
+                    # 磁盘日志中已没有更早的日志
+                    return
+        except Exception as e:
+            print(f"补建日志检索历史索引出错: {e}")
+        finally:
+            with self._history_lock:
+                self._history_thread = None
+
+    def _start_backfill(self):
+        """历史索引落后于实时索引时启动后台补建（已在进行时不重复启动）"""
+        if not self.indexing:
+            return
+        with self._history_lock:
+            if self._history_thread is not None:
+                return
+            if self._history is None:
+                self._history = LogSearchIndex()
+            self._history_thread = threading.Thread(target=self._backfill_history, name="log-search-backfill", daemon=True)
+            self._history_thread.start()
+
+    def nbytes(self):
+        """估算实时索引和历史索引占用的内存（字节）"""
+        current, previous = self._generations
+        size = current.nbytes() + (previous.nbytes() if previous is not None else 0)
+        history = self._history
+        if history is not None:
+            size += history.nbytes()
+        return size
+
+    def wait_backfill(self, timeout=None):
+        """等待正在进行的历史索引补建完成"""
+        thread = self._history_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def search(self, query, types=None, start=None, end=None, before=None, limit=100):
+        """查询日志，参数见LogSearchIndex.search，返回按序号从新到旧的事件列表"""
+        self._start_backfill()
+        current, previous = self._generations
+        seqs = current.search(query, types, start, end, before, limit)
+        if previous is not None and len(seqs) < limit:
+            seqs += previous.search(query, types, start, end, before, limit - len(seqs))
+        if len(seqs) < limit:
+            history = self._history
+            if history is not None:
+                upper = (previous or current).base_seq + 1
+                upper = upper if before is None else min(before, upper)
+                seqs += history.search(query, types, start, end, upper, limit - len(seqs))
+        return self.event_log.get(seqs)
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能指标时序存储
+
+每个会话每个tick记录一行指标，按列追加写入磁盘：
+    <根目录>/<会话ID>/schema.json
+    <根目录>/<会话ID>/<YYYYMMDD>/<列名>.bin   （定长NumPy原始数组，按UTC日期分区）
+
+每列是一个只追加的定长数组文件，写入只需在文件末尾追加，读取时可以直接内存映射单列。
+写入先进入内存缓冲区，由后台线程批量落盘，不占用tick和请求线程；
+写入器保证每个序列的时间戳单调不减（早于已写入数据的行被丢弃），
+读取时只映射需要的列，按时间范围二分定位，并按块迭代，内存占用与文件大小无关。
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+from simulation_clock import REAL_TIME
+
+
+# 防御方案、风险等级的编码
+SCHEME_CODES = {"traditional": 0, "flexible": 1}
+RISK_CODES = {"低": 0, "中": 1, "高": 2}
+
+# 默认的指标列：(列名, NumPy类型)
+METRICS_SCHEMA = (
+    ("timestamp", "<f8"),        # 模拟时间（Unix时间戳）
+    ("scheme", "u1"),            # 防御方案，见SCHEME_CODES
+    ("attack_types", "u1"),      # 攻击类型位掩码：1 AGV控制系统，2 调度系统
+    ("is_attacking", "u1"),
+    ("ids_cpu_usage", "<f4"),
+    ("ids_cpu_usage_2", "<f4"),
+    ("fw_cpu_usage", "<f4"),
+    ("fw_cpu_usage_2", "<f4"),
+    ("ids_rate_1", "<f4"),       # 检测率/阻断率（百分数），无攻击时为NaN
+    ("ids_rate_2", "<f4"),
+    ("fw_rate_1", "<f4"),
+    ("fw_rate_2", "<f4"),
+    ("ids_security", "<f4"),
+    ("fw_security", "<f4"),
+    ("mttr", "<f4"),
+    ("container_qps", "<f4"),
+    ("normal_traffic", "<f4"),
+    ("risk_level", "u1"),        # 风险等级，见RISK_CODES
+)
+
+
+def metrics_row(state, timestamp):
+    """把一份模拟状态转换为一行指标"""
+    rates_valid = state["rates_valid"]
+    attack_mask = 0
+    for attack_type in state["attack_types"]:
+        attack_mask |= 1 << (attack_type - 1)
+    return {
+        "timestamp": timestamp,
+        "scheme": SCHEME_CODES.get(state["defense_scheme"], 0),
+        "attack_types": attack_mask,
+        "is_attacking": int(state["is_attacking"]),
+        "ids_cpu_usage": state["ids_cpu_usage"],
+        "ids_cpu_usage_2": state["ids_cpu_usage_2"],
+        "fw_cpu_usage": state["fw_cpu_usage"],
+        "fw_cpu_usage_2": state["fw_cpu_usage_2"],
+        "ids_rate_1": state["ids_rate_1"] if rates_valid else np.nan,
+        "ids_rate_2": state["ids_rate_2"] if rates_valid else np.nan,
+        "fw_rate_1": state["fw_rate_1"] if rates_valid else np.nan,
+        "fw_rate_2": state["fw_rate_2"] if rates_valid else np.nan,
+        "ids_security": state["ids_security"],
+        "fw_security": state["fw_security"],
+        "mttr": state["mttr"],
+        "container_qps": state["container_qps"],
+        "normal_traffic": state["normal_traffic"],
+        "risk_level": RISK_CODES.get(state["risk_level"], 0),
+    }
+
+
+def partition_name(timestamp):
+    """时间戳所在的日期分区（UTC）"""
+    return time.strftime("%Y%m%d", time.gmtime(timestamp))
+
+
+class MetricsWriter:
+    """指标写入器：append只写内存缓冲区，后台线程按间隔批量追加到各列文件
+
+    time_source须与产生行时间戳的时钟相同（分区按行的模拟时间划分，保留天数也按模拟时间计算）。
+    每个序列的时间戳须单调不减（读取时按时间二分定位）：时间戳早于该序列已写入数据的行
+    （例如重启后模拟时钟回退）被丢弃，不写入。
+    """
+
+    def __init__(self, root, schema=METRICS_SCHEMA, flush_interval=5.0, max_buffer_rows=10000, retention_days=None,
+                 time_source=REAL_TIME):
+        self.root = root
+        self.time_source = time_source
+        self.schema = tuple(schema)
+        self.flush_interval = flush_interval
+        self.max_buffer_rows = max_buffer_rows
+        self.retention_days = retention_days
+        self.rows_written = 0
+
+        self._buffers = {}
+        self._buffered_rows = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._known_series = set()
+        self._checked_partitions = set()
+        self._last_timestamps = {}  # 序列 -> 已写入的最晚时间戳
+
+    def start(self):
+        """启动后台写入线程（重复调用无副作用）"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        """停止后台线程并写出剩余数据"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            self._stopping = True
+        if thread is not None:
+            self._wakeup.set()
+            thread.join(timeout)
+        self.flush()
+
+    def append(self, series, row):
+        """追加一行（series为会话ID），只写内存缓冲区"""
+        with self._lock:
+            self._buffers.setdefault(series, []).append(row)
+            self._buffered_rows += 1
+            full = self._buffered_rows >= self.max_buffer_rows
+        if full:
+            # 缓冲区已满时立即唤醒写入线程
+            self._wakeup.set()
+
+    def flush(self):
+        """把缓冲区中的数据追加写入磁盘，返回写入的行数
+
+        取出缓冲区和写入都在_flush_lock内进行，后台线程和stop()同时flush时各批数据仍按顺序写入。
+        """
+        written = 0
+        with self._flush_lock:
+            with self._lock:
+                buffers = self._buffers
+                self._buffers = {}
+                self._buffered_rows = 0
+
+            for series, rows in buffers.items():
+                try:
+                    self._write_series(series, rows)
+                    written += len(rows)
+                except OSError as e:
+                    print(f"写入指标数据出错 ({series}): {e}")
+            self.rows_written += written
+            if self.retention_days:
+                self._apply_retention()
+        return written
+
+    def _write_series(self, series, rows):
+        """把一个序列的若干行按日期分区、按列追加写入"""
+        series_dir = os.path.join(self.root, series)
+        if series not in self._known_series:
+            os.makedirs(series_dir, exist_ok=True)
+            schema_path = os.path.join(series_dir, "schema.json")
+            if not os.path.exists(schema_path):
+                with open(schema_path, "w", encoding="utf-8") as f:
+                    json.dump([list(column) for column in self.schema], f)
+            self._known_series.add(series)
+
+        rows = self._ordered_rows(series, rows)
+
+        # 同一批数据可能跨越日期分区
+        partitions = {}
+        for row in rows:
+            partitions.setdefault(partition_name(row["timestamp"]), []).append(row)
+
+        for partition, partition_rows in partitions.items():
+            partition_dir = os.path.join(series_dir, partition)
+            os.makedirs(partition_dir, exist_ok=True)
+            if partition_dir not in self._checked_partitions:
+                self._align_columns(partition_dir)
+                self._checked_partitions.add(partition_dir)
+            for name, dtype in self.schema:
+                values = np.array([row[name] for row in partition_rows], dtype=dtype)
+                with open(os.path.join(partition_dir, f"{name}.bin"), "ab") as f:
+                    f.write(values.tobytes())
+
+    def _ordered_rows(self, series, rows):
+        """丢弃时间戳早于该序列已写入数据（本进程首次写入时从磁盘读取）的行，返回其余的行"""
+        last = self._last_timestamps.get(series)
+        if series not in self._last_timestamps:
+            last = MetricsReader(self.root).last_timestamp(series)
+        ordered = []
+        for row in rows:
+            if last is None or row["timestamp"] >= last:
+                ordered.append(row)
+                last = row["timestamp"]
+        if len(ordered) < len(rows):
+            print(f"指标序列 {series} 有 {len(rows) - len(ordered)} 行的时间戳早于已写入的数据（时钟回退），已丢弃")
+        self._last_timestamps[series] = last
+        return ordered
+
+    def _align_columns(self, partition_dir):
+        """本进程首次写入分区前，把各列截断到共同的完整行数
+
+        上次写入中断时各列长度可能不同（或末尾有不完整的值），不截断的话之后追加的行在各列中的位置会错开。
+        """
+        sizes = {}
+        for name, dtype in self.schema:
+            path = os.path.join(partition_dir, f"{name}.bin")
+            sizes[name] = os.path.getsize(path) if os.path.exists(path) else 0
+        if not any(sizes.values()):
+            return
+        rows = min(sizes[name] // np.dtype(dtype).itemsize for name, dtype in self.schema)
+        for name, dtype in self.schema:
+            size = rows * np.dtype(dtype).itemsize
+            if sizes[name] != size:
+                print(f"指标列 {partition_dir}/{name}.bin 不完整，截断到 {rows} 行")
+                with open(os.path.join(partition_dir, f"{name}.bin"), "r+b") as f:
+                    f.truncate(size)
+
+    def _apply_retention(self):
+        """删除超出保留天数的日期分区（按time_source的当前时间计算）"""
+        cutoff = partition_name(self.time_source.now() - self.retention_days * 86400)
+        for series in list(self._known_series):
+            series_dir = os.path.join(self.root, series)
+            try:
+                entries = os.listdir(series_dir)
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.isdigit() and entry < cutoff:
+                    shutil.rmtree(os.path.join(series_dir, entry), ignore_errors=True)
+
+    def _run(self):
+        """后台线程：每隔flush_interval秒（或缓冲区满时）批量写入"""
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+class MetricsReader:
+    """指标历史读取器：按列内存映射，只读取需要的列和时间范围"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def series(self):
+        """已记录的序列（会话ID）列表"""
+        try:
+            entries = os.listdir(self.root)
+        except OSError:
+            return []
+        return sorted(entry for entry in entries if os.path.exists(os.path.join(self.root, entry, "schema.json")))
+
+    def schema(self, series):
+        """序列的列定义：{列名: NumPy类型}"""
+        with open(os.path.join(self.root, series, "schema.json"), encoding="utf-8") as f:
+            return {name: np.dtype(dtype) for name, dtype in json.load(f)}
+
+    def partitions(self, series, start=None, end=None):
+        """与时间范围[start, end)有交集的日期分区，按时间顺序"""
+        series_dir = os.path.join(self.root, series)
+        first = partition_name(start) if start is not None else None
+        last = partition_name(end) if end is not None else None
+        names = sorted(entry for entry in os.listdir(series_dir) if entry.isdigit())
+        return [
+            os.path.join(series_dir, name) for name in names
+            if (first is None or name >= first) and (last is None or name <= last)
+        ]
+
+    def _partition_rows(self, partition_dir, dtypes, columns):
+        """分区中所有指定列都已完整写入的行数（写入中断时各列长度可能不同）"""
+        rows = None
+        for name in columns:
+            path = os.path.join(partition_dir, f"{name}.bin")
+            size = os.path.getsize(path) // dtypes[name].itemsize if os.path.exists(path) else 0
+            rows = size if rows is None else min(rows, size)
+        return rows or 0
+
+    def last_timestamp(self, series=None):
+        """序列（为None时为全部序列）已完整写入的最晚时间戳，没有数据时返回None"""
+        latest = None
+        for name in self.series() if series is None else [series]:
+            dtypes = self.schema(name)
+            for partition_dir in reversed(self.partitions(name)):
+                rows = self._partition_rows(partition_dir, dtypes, list(dtypes))
+                if rows == 0:
+                    continue
+                timestamps = np.memmap(os.path.join(partition_dir, "timestamp.bin"), dtype=dtypes["timestamp"],
+                                       mode="r", shape=(rows,))
+                # 取最大值而非最后一行：此前的版本写入的数据可能不是单调的
+                value = float(timestamps.max())
+                del timestamps
+                latest = value if latest is None else max(latest, value)
+                break
+        return latest
+
+    def iter_blocks(self, series, columns, start=None, end=None, block_rows=1 << 20):
+        """按块迭代时间范围[start, end)内的数据，每块为{列名: 只读内存映射数组}，最多block_rows行
+
+        每块单独映射，块用完后映射即被释放，常驻内存只与块大小有关。
+        """
+        dtypes = self.schema(series)
+        columns = list(dict.fromkeys(["timestamp"] + list(columns)))
+        for partition_dir in self.partitions(series, start, end):
+            rows = self._partition_rows(partition_dir, dtypes, columns)
+            if rows == 0:
+                continue
+
+            # 写入器保证时间戳单调不减，二分查找时间范围（只会访问少量页面）
+            timestamps = np.memmap(os.path.join(partition_dir, "timestamp.bin"), dtype=dtypes["timestamp"], mode="r", shape=(rows,))
+            lo = int(np.searchsorted(timestamps, start, side="left")) if start is not None else 0
+            hi = int(np.searchsorted(timestamps, end, side="left")) if end is not None else rows
+            del timestamps
+
+            for offset in range(lo, hi, block_rows):
+                count = min(block_rows, hi - offset)
+                yield {
+                    name: np.memmap(os.path.join(partition_dir, f"{name}.bin"), dtype=dtypes[name], mode="r",
+                                    offset=offset * dtypes[name].itemsize, shape=(count,))
+                    for name in columns
+                }
+
+    def read(self, series, columns, start=None, end=None):
+        """读取时间范围[start, end)内的指定列，返回{列名: 数组}（数据会复制到内存）"""
+        blocks = list(self.iter_blocks(series, columns, start, end))
+        dtypes = self.schema(series)
+        names = list(dict.fromkeys(["timestamp"] + list(columns)))
+        if not blocks:
+            return {name: np.empty(0, dtype=dtypes[name]) for name in names}
+        return {name: np.concatenate([block[name] for block in blocks]) for name in names}
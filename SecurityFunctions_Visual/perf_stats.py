@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能指标统计
+
+每个方案的每项指标保存在定长的NumPy环形缓冲区中，追加和淘汰都是O(1)，
+同时增量维护滑动窗口内的均值和方差（Welford算法）、最小值/最大值（单调队列）
+和分位数草图（样本淘汰时从草图中移除），查询时无需遍历或排序样本。
+"""
+
+import threading
+from collections import deque
+
+import numpy as np
+
+from rollups import QuantileSketch
+
+
+# 性能指标键名（样本列表名 -> 接口返回字段名）
+METRIC_KEYS = {
+    "ids_detection_rates": "ids_detection_rate",  # IDS检测率
+    "fw_block_rates": "fw_block_rate",            # 防火墙拦截率
+    "qps_values": "qps",                          # QPS值
+    "mttr_values": "mttr",                        # MTTR值
+}
+
+# 防御方案
+SCHEMES = ("traditional", "flexible")
+
+# 统计接口返回的分位数
+QUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+
+class RingBuffer:
+    """定长环形缓冲区，维护窗口内的均值和方差"""
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError(f"capacity必须为正数: {capacity}")
+        self.capacity = capacity
+        self._data = np.empty(capacity, dtype=np.float64)
+        self._start = 0   # 最早样本的位置
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0    # 与均值之差的平方和
+        self._evictions = 0
+        self._appended = 0  # 已追加的样本总数，作为样本序号
+        # 单调队列：(样本序号, 值)，队首分别为窗口内的最小值和最大值
+        self._min_queue = deque()
+        self._max_queue = deque()
+        # 窗口内样本的分位数草图
+        self.sketch = QuantileSketch()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        """缓冲区占用的字节数"""
+        return self._data.nbytes
+
+    def append(self, value):
+        """追加一个样本，缓冲区已满时淘汰最早的样本"""
+        value = float(value)
+        index = (self._start + self._count) % self.capacity
+
+        if self._count == self.capacity:
+            # 先从统计量中移除最早的样本（Welford逆向更新）
+            old = float(self._data[self._start])
+            self._start = (self._start + 1) % self.capacity
+            self._count -= 1
+            if self._count == 0:
+                self._mean = 0.0
+                self._m2 = 0.0
+            else:
+                old_mean = self._mean
+                self._mean = old_mean + (old_mean - old) / self._count
+                self._m2 -= (old - old_mean) * (old - self._mean)
+            self._evictions += 1
+            self.sketch.remove(old)
+            # 被淘汰样本的序号
+            evicted = self._appended - self.capacity
+            if self._min_queue[0][0] == evicted:
+                self._min_queue.popleft()
+            if self._max_queue[0][0] == evicted:
+                self._max_queue.popleft()
+
+        self._data[index] = value
+        self._count += 1
+        delta = value - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (value - self._mean)
+
+        self.sketch.add(value)
+        while self._min_queue and self._min_queue[-1][1] >= value:
+            self._min_queue.pop()
+        self._min_queue.append((self._appended, value))
+        while self._max_queue and self._max_queue[-1][1] <= value:
+            self._max_queue.pop()
+        self._max_queue.append((self._appended, value))
+        self._appended += 1
+
+        # 每淘汰一整轮重新精确计算一次，消除浮点误差的累积（均摊O(1)）
+        if self._evictions >= self.capacity:
+            self._evictions = 0
+            self._mean = float(self._data.mean())
+            self._m2 = float(((self._data - self._mean) ** 2).sum())
+
+    @property
+    def mean(self):
+        """窗口内均值，无样本时为0"""
+        return self._mean if self._count else 0.0
+
+    @property
+    def variance(self):
+        """窗口内样本方差，样本数不足2时为0"""
+        if self._count < 2:
+            return 0.0
+        return max(0.0, self._m2 / (self._count - 1))
+
+    @property
+    def std(self):
+        """窗口内样本标准差"""
+        return self.variance ** 0.5
+
+    @property
+    def min(self):
+        """窗口内最小值，无样本时为0"""
+        return self._min_queue[0][1] if self._count else 0.0
+
+    @property
+    def max(self):
+        """窗口内最大值，无样本时为0"""
+        return self._max_queue[0][1] if self._count else 0.0
+
+    def quantile(self, q):
+        """窗口内q分位数的估计值（相对误差约1%），限定在[min, max]内，无样本时为0"""
+        if not self._count:
+            return 0.0
+        return max(self.min, min(self.max, self.sketch.quantile(q)))
+
+    def values(self):
+        """按时间顺序返回窗口内样本的副本"""
+        end = self._start + self._count
+        if end <= self.capacity:
+            return self._data[self._start:end].copy()
+        return np.concatenate((self._data[self._start:], self._data[:end - self.capacity]))
+
+
+class PerformanceStats:
+    """按方案和指标组织的性能统计数据"""
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.version = 0  # 每追加一个样本加1，用于缓存按数据版本失效
+        self._lock = threading.Lock()
+        self._buffers = {
+            scheme: {key: RingBuffer(capacity) for key in METRIC_KEYS}
+            for scheme in SCHEMES
+        }
+
+    def __getitem__(self, scheme):
+        """获取某个方案的全部指标缓冲区"""
+        return self._buffers[scheme]
+
+    @property
+    def nbytes(self):
+        """全部缓冲区占用的字节数"""
+        return sum(buffer.nbytes for metrics in self._buffers.values() for buffer in metrics.values())
+
+    def append(self, scheme, key, value):
+        """追加一个样本"""
+        with self._lock:
+            self._buffers[scheme][key].append(value)
+            self.version += 1
+
+    def summary(self):
+        """各方案各指标的均值、标准差、最小值/最大值和分位数"""
+        return self.versioned_summary()[1]
+
+    def versioned_summary(self):
+        """返回(数据版本, summary())，两者来自同一时刻"""
+        stats = {}
+        with self._lock:
+            for scheme, metrics in self._buffers.items():
+                stats[scheme] = {METRIC_KEYS[key]: buffer.mean for key, buffer in metrics.items()}
+                stats[scheme]["stddev"] = {METRIC_KEYS[key]: buffer.std for key, buffer in metrics.items()}
+                stats[scheme]["min"] = {METRIC_KEYS[key]: buffer.min for key, buffer in metrics.items()}
+                stats[scheme]["max"] = {METRIC_KEYS[key]: buffer.max for key, buffer in metrics.items()}
+                for name, q in QUANTILES.items():
+                    stats[scheme][name] = {METRIC_KEYS[key]: buffer.quantile(q) for key, buffer in metrics.items()}
+            version = self.version
+        return version, stats
@@ -8,42 +8,83 @@
 1. 从API获取传统方案和AI方案的性能数据
 2. 将数据保存到CSV文件
 3. 生成性能对比图表
+4. 在多进程中批量运行场景网格（--sweep），不需要启动Web服务
+5. 从服务记录的指标历史生成图表（--history），按列内存映射，只读取需要的列和时间范围
+6. 批量为大量已记录的运行数据生成图表（--batch），图表在多进程中并行渲染，数据未变化的图表直接复用
+7. 常驻采集（--daemon），按固定频率采集性能统计和系统状态，批量写入CSV
+8. 并发采集多个模拟实例（--instances），结果按实例标记合并为一份数据
+
+numpy、pandas、matplotlib、seaborn等较重的依赖只在需要的功能中按需导入，
+只采集数据（--collect）时启动只需几十毫秒，适合频繁的定时任务。
 """
 
 import os
 import json
 import time
 import csv
+import io
+import glob
+import shutil
+import hashlib
+import functools
 import argparse
-import requests
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import subprocess
+import sys
 from datetime import datetime
-
-# 使用英文字体，避免中文乱码问题
-plt.rcParams['font.sans-serif'] = ['Arial']
-plt.rcParams['axes.unicode_minus'] = False
+from concurrent.futures import ProcessPoolExecutor
 
 # 配置
 API_BASE_URL = "http://127.0.0.1:8082"
 DATA_DIR = "performance_data"
 CHARTS_DIR = "performance_charts"
+HISTORY_DIR = "metrics_history"
+
+# 图表缓存索引：数据内容哈希 -> 已生成的图表文件名
+CHART_INDEX_FILE = os.path.join(CHARTS_DIR, "chart_index.json")
+# 图表样式版本，修改图表外观后递增，使已缓存的图表重新生成
+CHART_STYLE_VERSION = 1
+# 图表使用的指标
+CHART_METRICS = ("ids_detection_rate", "fw_block_rate", "qps", "mttr")
+
+# 导入本模块时不应加载的重型依赖，以及导入耗时预算（毫秒），见--check-import-budget
+HEAVY_MODULES = ("numpy", "pandas", "matplotlib", "seaborn", "requests")
+IMPORT_BUDGET_MS = 100
+
+_chart_style_ready = False
+
+def ensure_dir(directory):
+    """Create an output directory on first use"""
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+def init_chart_style():
+    """Load matplotlib/seaborn on first use and configure the chart style once"""
+    global _chart_style_ready
+    if _chart_style_ready:
+        return
+    import matplotlib
+    matplotlib.use('Agg')  # 只输出文件，不需要交互式后端
+    import seaborn as sns
+
+    # 图表样式只设置一次
+    sns.set(style="whitegrid")
 
-# 确保目录存在
-os.makedirs(DATA_DIR, exist_ok=True)
-os.makedirs(CHARTS_DIR, exist_ok=True)
+    # 使用英文字体，避免中文乱码问题
+    matplotlib.rcParams['font.sans-serif'] = ['Arial']
+    matplotlib.rcParams['axes.unicode_minus'] = False
+    _chart_style_ready = True
 
 def get_performance_data():
     """Get performance data from API"""
+    # The standard library client keeps collection-only runs free of heavy imports
+    from urllib.error import HTTPError
+    from urllib.request import urlopen
     try:
-        response = requests.get(f"{API_BASE_URL}/api/performance-stats")
-        if response.status_code == 200:
-            return response.json()
-        else:
-            print(f"Error: API returned status code {response.status_code}")
-            return None
+        with urlopen(f"{API_BASE_URL}/api/performance-stats", timeout=10) as response:
+            return json.load(response)
+    except HTTPError as e:
+        print(f"Error: API returned status code {e.code}")
+        return None
     except Exception as e:
         print(f"Error getting performance data: {e}")
         return None
@@ -59,7 +100,7 @@ def save_data_to_csv(data, filename=None):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"performance_data_{timestamp}.csv"
 
-    filepath = os.path.join(DATA_DIR, filename)
+    filepath = os.path.join(ensure_dir(DATA_DIR), filename)
 
     # Prepare CSV data
     csv_data = []
@@ -85,24 +126,129 @@ def save_data_to_csv(data, filename=None):
         print(f"Error saving data: {e}")
         return None
 
-def generate_bar_chart(data, output_filename=None):
-    """Generate performance comparison bar chart"""
-    if not data:
-        print("No data to plot")
-        return None
-
-    # Generate filename
-    if not output_filename:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_filename = f"performance_comparison_{timestamp}.png"
+# run_scenario parameters, in the order of a sweep task tuple
+SWEEP_PARAMS = ("defense_scheme", "attack_id", "agv_traffic", "scheduler_traffic", "duration", "tick_interval", "seed")
+
+def build_sweep_grid(traffic_levels, replicas=1, duration=120.0, seed=0):
+    """Build the scenario grid: scheme x attack id x AGV traffic x scheduler traffic x replicas"""
+    tasks = []
+    for scheme in ("traditional", "flexible"):
+        for attack_id in range(4):
+            for agv_traffic in traffic_levels:
+                for scheduler_traffic in traffic_levels:
+                    for _ in range(replicas):
+                        # Every task gets its own seed so that workers do not repeat each other
+                        tasks.append((scheme, attack_id, agv_traffic, scheduler_traffic, duration, 3.0, seed + len(tasks)))
+    return tasks
+
+def run_sweep(tasks, workers=None, cache_dir=None):
+    """Run all scenarios on a process pool and merge the results into one DataFrame
+
+    With cache_dir, scenarios already in the scenario result cache are not run again
+    and newly run scenarios are added to it.
+    """
+    import pandas as pd
+    from simulator import run_scenario
+
+    workers = workers or os.cpu_count() or 1
+    cache = None
+    results = [None] * len(tasks)
+    pending = list(range(len(tasks)))
+    if cache_dir:
+        from scenario_cache import ScenarioCache
+        cache = ScenarioCache(None, directory=cache_dir, max_entries=0)
+        params = [dict(zip(SWEEP_PARAMS, task)) for task in tasks]
+        for i in range(len(tasks)):
+            results[i] = cache.lookup(params[i])
+        pending = [i for i in pending if results[i] is None]
+        print(f"{len(tasks) - len(pending)} scenarios found in cache {cache_dir}, running {len(pending)}")
+
+    if pending:
+        # Cached results carry the timeline and logs as well
+        run = functools.partial(run_scenario, details=True) if cache is not None else run_scenario
+        # Hand out tasks in chunks to keep inter-process overhead low
+        chunksize = max(1, len(pending) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            computed = executor.map(run, *zip(*(tasks[i] for i in pending)), chunksize=chunksize)
+            for i, result in zip(pending, computed):
+                if cache is not None:
+                    cache.put(params[i], result)
+                results[i] = result
+    if cache is not None:
+        results = [{k: v for k, v in result.items() if k not in ("timeline", "logs")} for result in results]
+    return pd.DataFrame(results)
+
+def sweep_to_performance_data(df):
+    """Average the attack scenarios of a sweep per scheme, in the /api/performance-stats format"""
+    attacked = df[df['attack_id'] != 0]
+    data = {}
+    for scheme in ("traditional", "flexible"):
+        rows = attacked[attacked['defense_scheme'] == scheme]
+        data[scheme] = {
+            "ids_detection_rate": float(rows['ids_detection_rate'].mean()),
+            "fw_block_rate": float(rows['fw_block_rate'].mean()),
+            "qps": float(rows['qps'].mean()),
+            "mttr": float(rows['mttr'].mean())
+        }
+    return data
 
-    output_path = os.path.join(CHARTS_DIR, output_filename)
+def parse_time(value):
+    """Parse a Unix timestamp or an ISO date/time string (local time)"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+def history_to_performance_data(reader, series, start=None, end=None):
+    """Average the recorded attack ticks of one session per scheme, streaming memory-mapped column blocks"""
+    import numpy as np
+    from metrics_store import SCHEME_CODES
+
+    columns = ["scheme", "is_attacking", "ids_rate_1", "ids_rate_2", "fw_rate_1", "fw_rate_2", "container_qps", "mttr"]
+    sums = {scheme: {"ids_detection_rate": 0.0, "fw_block_rate": 0.0, "qps": 0.0, "mttr": 0.0} for scheme in SCHEME_CODES}
+    counts = {scheme: {"rates": 0, "ticks": 0} for scheme in SCHEME_CODES}
+
+    for block in reader.iter_blocks(series, columns, start, end):
+        attacking = block["is_attacking"] == 1
+        for scheme, code in SCHEME_CODES.items():
+            mask = attacking & (block["scheme"] == code)
+            if not mask.any():
+                continue
+            # Rates are NaN while no attack is configured, same as the live collector skipping "N/A"
+            ids_rate = (block["ids_rate_1"][mask].astype(np.float64) + block["ids_rate_2"][mask]) / 2
+            fw_rate = (block["fw_rate_1"][mask].astype(np.float64) + block["fw_rate_2"][mask]) / 2
+            valid = ~np.isnan(ids_rate)
+            sums[scheme]["ids_detection_rate"] += ids_rate[valid].sum()
+            sums[scheme]["fw_block_rate"] += fw_rate[valid].sum()
+            sums[scheme]["qps"] += block["container_qps"][mask].sum(dtype=np.float64)
+            sums[scheme]["mttr"] += block["mttr"][mask].sum(dtype=np.float64)
+            counts[scheme]["rates"] += int(valid.sum())
+            counts[scheme]["ticks"] += int(mask.sum())
+
+    data = {}
+    for scheme, totals in sums.items():
+        rate_count = counts[scheme]["rates"] or 1
+        tick_count = counts[scheme]["ticks"] or 1
+        data[scheme] = {
+            "ids_detection_rate": float(totals["ids_detection_rate"] / rate_count),
+            "fw_block_rate": float(totals["fw_block_rate"] / rate_count),
+            "qps": float(totals["qps"] / tick_count),
+            "mttr": float(totals["mttr"] / tick_count)
+        }
+    print(f"Attack ticks used: traditional={counts['traditional']['ticks']}, flexible={counts['flexible']['ticks']}")
+    return data
 
-    # Set chart style
-    sns.set(style="whitegrid")
+def draw_bar_chart(data):
+    """Draw the performance comparison bar chart, returns a Figure (not managed by pyplot)"""
+    init_chart_style()
+    import seaborn as sns
+    from matplotlib.figure import Figure
 
     # Create chart
-    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+    fig = Figure(figsize=(15, 12))
+    axes = fig.subplots(2, 2)
     fig.suptitle('Traditional vs AI-based Security Function Reorganization Performance Comparison', fontsize=16)
 
     # Prepare data
@@ -125,10 +271,10 @@ def generate_bar_chart(data, output_filename=None):
         }
     }
 
-    # Color settings
+    # Color settings (desaturated like seaborn bar plots)
     colors = {
-        "Traditional": "#FF6B6B",  # Red
-        "AI-based": "#4ECDC4"      # Cyan
+        "Traditional": sns.desaturate("#FF6B6B", 0.75),  # Red
+        "AI-based": sns.desaturate("#4ECDC4", 0.75)      # Cyan
     }
 
     # Draw four subplots
@@ -136,18 +282,15 @@ def generate_bar_chart(data, output_filename=None):
         row, col = i // 2, i % 2
         ax = axes[row, col]
 
-        # Create DataFrame
-        df = pd.DataFrame({
-            "Strategy": list(values.keys()),
-            "Value": list(values.values())
-        })
-
         # Draw bar plot
-        sns.barplot(x="Strategy", y="Value", data=df, palette=colors, ax=ax)
+        strategies = list(values.keys())
+        ax.bar(strategies, list(values.values()), width=0.8, color=[colors[name] for name in strategies])
+        ax.xaxis.grid(False)
 
         # Set title and labels
         ax.set_title(metric, fontsize=14)
         ax.set_xlabel("")
+        ax.set_ylabel("Value")
 
         # Add value labels
         for j, p in enumerate(ax.patches):
@@ -158,31 +301,14 @@ def generate_bar_chart(data, output_filename=None):
                     ha="center", fontsize=12)
 
     # Adjust layout
-    plt.tight_layout(rect=[0, 0, 1, 0.96])
+    fig.tight_layout(rect=[0, 0, 1, 0.96])
+    return fig
 
-    # Save chart
-    try:
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        print(f"Chart saved to {output_path}")
-        return output_path
-    except Exception as e:
-        print(f"Error saving chart: {e}")
-        return None
-    finally:
-        plt.close(fig)
-
-def generate_radar_chart(data, output_filename=None):
-    """Generate performance comparison radar chart"""
-    if not data:
-        print("No data to plot")
-        return None
-
-    # Generate filename
-    if not output_filename:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_filename = f"performance_radar_{timestamp}.png"
-
-    output_path = os.path.join(CHARTS_DIR, output_filename)
+def draw_radar_chart(data):
+    """Draw the performance comparison radar chart, returns a Figure (not managed by pyplot)"""
+    init_chart_style()
+    import numpy as np
+    from matplotlib.figure import Figure
 
     # Prepare data
     # For radar chart, we need to normalize all metrics to the same range
@@ -230,7 +356,7 @@ def generate_radar_chart(data, output_filename=None):
             flexible_normalized.append(flexible_values[i] / max_values[i])
 
     # Create radar chart
-    fig = plt.figure(figsize=(10, 8))
+    fig = Figure(figsize=(10, 8))
     ax = fig.add_subplot(111, polar=True)
 
     # Set angles
@@ -253,18 +379,200 @@ def generate_radar_chart(data, output_filename=None):
 
     # Add legend and title
     ax.legend(loc='upper right', bbox_to_anchor=(0.1, 0.1))
-    plt.title('Traditional vs AI-based Security Function Reorganization (Radar Chart)', fontsize=15)
+    ax.set_title('Traditional vs AI-based Security Function Reorganization (Radar Chart)', fontsize=15)
+    return fig
 
-    # Save chart
+def save_chart(fig, output_path, label="Chart"):
+    """Save a chart figure as a 300 dpi image file"""
     try:
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        print(f"Radar chart saved to {output_path}")
+        fig.savefig(output_path, dpi=300, bbox_inches='tight')
+        print(f"{label} saved to {output_path}")
         return output_path
     except Exception as e:
-        print(f"Error saving radar chart: {e}")
+        print(f"Error saving {label.lower()}: {e}")
+        return None
+
+def generate_bar_chart(data, output_filename=None):
+    """Generate performance comparison bar chart"""
+    if not data:
+        print("No data to plot")
         return None
-    finally:
-        plt.close(fig)
+
+    # Generate filename
+    if not output_filename:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_filename = f"performance_comparison_{timestamp}.png"
+
+    return save_chart(draw_bar_chart(data), os.path.join(ensure_dir(CHARTS_DIR), output_filename))
+
+def generate_radar_chart(data, output_filename=None):
+    """Generate performance comparison radar chart"""
+    if not data:
+        print("No data to plot")
+        return None
+
+    # Generate filename
+    if not output_filename:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_filename = f"performance_radar_{timestamp}.png"
+
+    return save_chart(draw_radar_chart(data), os.path.join(ensure_dir(CHARTS_DIR), output_filename), "Radar chart")
+
+CHART_DRAWERS = {
+    "bar": draw_bar_chart,
+    "radar": draw_radar_chart,
+}
+
+def render_chart_bytes(kind, data, fmt="png", dpi=100):
+    """Render a chart in memory and return the encoded image (png or svg)"""
+    buffer = io.BytesIO()
+    CHART_DRAWERS[kind](data).savefig(buffer, format=fmt, dpi=dpi, bbox_inches='tight')
+    return buffer.getvalue()
+
+CHART_GENERATORS = {
+    "bar": generate_bar_chart,
+    "radar": generate_radar_chart,
+}
+
+def chart_hash(kind, data):
+    """Content hash of the data a chart is drawn from"""
+    content = {
+        "kind": kind,
+        "style": CHART_STYLE_VERSION,
+        "data": {scheme: {key: float(data[scheme][key]) for key in CHART_METRICS} for scheme in ("traditional", "flexible")},
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+def load_chart_index():
+    """Load the chart cache index (content hash -> chart filename)"""
+    try:
+        with open(CHART_INDEX_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_chart_index(index):
+    """Save the chart cache index atomically"""
+    ensure_dir(CHARTS_DIR)
+    tmp_path = CHART_INDEX_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, CHART_INDEX_FILE)
+
+def chart_jobs(data, output_prefix):
+    """Bar and radar chart jobs for one data set"""
+    return [("bar", data, f"{output_prefix}_bar.png"), ("radar", data, f"{output_prefix}_radar.png")]
+
+def _render_chart(job):
+    """Render one (kind, data, filename) job, run in a worker process"""
+    kind, data, filename = job
+    return CHART_GENERATORS[kind](data, filename)
+
+def render_charts(jobs, workers=None):
+    """Render (kind, data, filename) chart jobs in parallel worker processes
+
+    Charts whose data hash matches an existing chart are not re-rendered: the existing file
+    is copied to the requested name instead. Returns the output paths in job order.
+    """
+    index = load_chart_index()
+    paths = [None] * len(jobs)
+    reused = 0
+    pending = {}  # content hash -> (job, indices of jobs sharing the hash)
+
+    for i, job in enumerate(jobs):
+        kind, data, filename = job
+        try:
+            digest = chart_hash(kind, data)
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Skipping {filename}: invalid data ({e})")
+            continue
+        cached = index.get(digest)
+        cached_path = os.path.join(CHARTS_DIR, cached) if cached else None
+        if cached_path and os.path.exists(cached_path):
+            output_path = os.path.join(CHARTS_DIR, filename)
+            if cached != filename:
+                shutil.copyfile(cached_path, output_path)
+            print(f"Chart unchanged, reused {cached_path} for {output_path}")
+            paths[i] = output_path
+            reused += 1
+        elif digest in pending:
+            pending[digest][1].append(i)
+        else:
+            pending[digest] = (job, [i])
+
+    if pending:
+        items = list(pending.items())
+        render_jobs = [job for _, (job, _) in items]
+        if workers == 1 or len(render_jobs) == 1:
+            results = [_render_chart(job) for job in render_jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_render_chart, render_jobs))
+
+        for (digest, (job, indices)), output_path in zip(items, results):
+            if output_path is None:
+                continue
+            index[digest] = job[2]
+            for i in indices:
+                filename = jobs[i][2]
+                target = os.path.join(CHARTS_DIR, filename)
+                if filename != job[2]:
+                    shutil.copyfile(output_path, target)
+                paths[i] = target
+        save_chart_index(index)
+
+    print(f"Charts: {len(pending)} rendered, {reused} reused")
+    return paths
+
+def load_data_from_csv(filepath):
+    """Load performance data saved by save_data_to_csv, in the API format"""
+    import pandas as pd
+
+    # Index by metric name once
+    df = pd.read_csv(filepath, index_col='Metric', usecols=['Metric', 'Traditional', 'AI-based'])
+    metrics = {
+        "ids_detection_rate": 'IDS Detection Rate(%)',
+        "fw_block_rate": 'Firewall Block Rate(%)',
+        "qps": 'QPS',
+        "mttr": 'MTTR(sec)'
+    }
+    return {
+        "traditional": {key: float(df.at[name, 'Traditional']) for key, name in metrics.items()},
+        "flexible": {key: float(df.at[name, 'AI-based']) for key, name in metrics.items()}
+    }
+
+def measure_import():
+    """Import this module in a fresh interpreter; returns {'elapsed_ms', 'heavy'} (heavy modules loaded by the import)"""
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        "import performance_analyzer\n"
+        "elapsed = (time.perf_counter() - start) * 1000\n"
+        f"heavy = [name for name in {HEAVY_MODULES!r} if name in sys.modules]\n"
+        "print(json.dumps({'elapsed_ms': elapsed, 'heavy': heavy}))\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], cwd=module_dir, capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+def check_import_budget(budget_ms=IMPORT_BUDGET_MS):
+    """Import this module in a fresh interpreter and check that it stays light
+
+    Fails if any of HEAVY_MODULES is loaded at import time or the import takes longer than budget_ms.
+    tests/test_import_budget.py runs the heavy-module check; its time check is opt-in (CHECK_IMPORT_TIME=1).
+    """
+    result = measure_import()
+    print(f"Import time: {result['elapsed_ms']:.1f} ms (budget {budget_ms} ms)")
+    ok = True
+    if result["heavy"]:
+        print(f"FAIL: heavy modules loaded at import time: {', '.join(result['heavy'])}")
+        ok = False
+    if result["elapsed_ms"] > budget_ms:
+        print("FAIL: import time over budget")
+        ok = False
+    if ok:
+        print("OK: import stays within budget")
+    return ok
 
 def main():
     """Main function"""
@@ -272,10 +580,69 @@ def main():
     parser.add_argument('--collect', action='store_true', help='Collect data from API')
     parser.add_argument('--file', type=str, help='Use specified CSV file to generate charts')
     parser.add_argument('--output', type=str, help='Output filename prefix')
+    parser.add_argument('--sweep', action='store_true', help='Run a scenario grid in-process on all CPU cores')
+    parser.add_argument('--workers', type=int, help='Number of worker processes for --sweep and chart rendering (default: CPU count)')
+    parser.add_argument('--traffic', type=int, nargs='+', default=[1000, 2000, 4000], help='AGV/scheduler traffic levels for --sweep')
+    parser.add_argument('--replicas', type=int, default=1, help='Runs per grid cell for --sweep')
+    parser.add_argument('--duration', type=float, default=120.0, help='Simulated seconds per scenario for --sweep')
+    parser.add_argument('--seed', type=int, help='Base random seed for --sweep')
+    parser.add_argument('--scenario-cache', type=str, metavar='DIR', help='Scenario result cache directory for --sweep (reuses results of earlier runs with the same seeds)')
+    parser.add_argument('--history', type=str, metavar='SESSION', help='Generate charts from the recorded metrics history of a session')
+    parser.add_argument('--history-dir', type=str, default=HISTORY_DIR, help='Metrics history directory')
+    parser.add_argument('--start', type=str, help='History start time (Unix timestamp or ISO format)')
+    parser.add_argument('--end', type=str, help='History end time (Unix timestamp or ISO format)')
+    parser.add_argument('--daemon', action='store_true', help='Keep sampling performance stats and status on a fixed schedule until interrupted')
+    parser.add_argument('--url', type=str, default=API_BASE_URL, help='API base URL')
+    parser.add_argument('--rate', type=float, default=10.0, help='Samples per second for --daemon')
+    parser.add_argument('--timeout', type=float, default=1.0, help='Per-request timeout in seconds for --daemon and --instances')
+    parser.add_argument('--flush-interval', type=float, default=5.0, help='Seconds between batched writes for --daemon')
+    parser.add_argument('--run-for', type=float, metavar='SECONDS', help='Stop --daemon after this many seconds')
+    parser.add_argument('--instances', type=str, metavar='FILE', help='Collect from every instance listed in FILE ("URL" or "NAME URL" per line) concurrently')
+    parser.add_argument('--concurrency', type=int, default=100, help='Maximum concurrent requests for --instances')
+    parser.add_argument('--no-charts', action='store_true', help='Only collect/load data, do not generate charts (fast collection-only runs)')
+    parser.add_argument('--check-import-budget', type=float, nargs='?', const=IMPORT_BUDGET_MS, metavar='MS',
+                        help=f'Check that importing this module loads no heavy dependencies and takes at most MS milliseconds (default {IMPORT_BUDGET_MS})')
+    parser.add_argument('--batch', type=str, nargs='+', metavar='PATTERN', help='Generate charts for every CSV file in the data directory matching the patterns (e.g. "*_data.csv")')
     args = parser.parse_args()
 
     data = None
 
+    if args.check_import_budget is not None:
+        sys.exit(0 if check_import_budget(args.check_import_budget) else 1)
+
+    if args.daemon:
+        import signal
+        from collector import PerformanceCollector
+
+        output_prefix = args.output if args.output else datetime.now().strftime("%Y%m%d_%H%M%S")
+        filepath = os.path.join(DATA_DIR, f"{output_prefix}_collector.csv")
+        collector = PerformanceCollector(args.url, filepath, rate=args.rate, timeout=args.timeout,
+                                         flush_interval=args.flush_interval)
+        # Stop cleanly on Ctrl+C / SIGTERM so buffered samples are flushed and connections closed
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: collector.stop())
+        print(f"Sampling {args.url} at {args.rate} Hz into {filepath} (Ctrl+C to stop)...")
+        summary = collector.run(args.run_for)
+        print("Collector stopped: " + ", ".join(f"{key}={value:.1f}" if isinstance(value, float) else f"{key}={value}"
+                                                for key, value in summary.items()))
+        return
+
+    if args.batch:
+        filepaths = sorted({path for pattern in args.batch for path in glob.glob(os.path.join(DATA_DIR, pattern))})
+        print(f"Loading {len(filepaths)} data files...")
+        jobs = []
+        for filepath in filepaths:
+            try:
+                data = load_data_from_csv(filepath)
+            except Exception as e:
+                print(f"Skipping {filepath}: {e}")
+                continue
+            jobs.extend(chart_jobs(data, os.path.splitext(os.path.basename(filepath))[0]))
+        start = time.perf_counter()
+        render_charts(jobs, args.workers)
+        print(f"Batch chart generation finished in {time.perf_counter() - start:.2f} seconds")
+        return
+
     if args.collect:
         print("Collecting performance data from API...")
         data = get_performance_data()
@@ -283,28 +650,55 @@ def main():
             output_prefix = args.output if args.output else datetime.now().strftime("%Y%m%d_%H%M%S")
             csv_file = f"{output_prefix}_data.csv"
             save_data_to_csv(data, csv_file)
+    elif args.instances:
+        from collector import INSTANCE_FIELDS, average_instances, collect_instances, load_instances
+
+        instances = load_instances(args.instances)
+        print(f"Collecting performance data from {len(instances)} instances (concurrency {args.concurrency})...")
+        start = time.perf_counter()
+        rows = collect_instances(instances, args.concurrency, args.timeout)
+        ok = sum(row["ok"] for row in rows)
+        print(f"Collected {ok}/{len(rows)} instances in {time.perf_counter() - start:.2f} seconds")
+        for row in rows:
+            if not row["ok"]:
+                print(f"  {row['instance']} ({row['url']}): {row['error']}")
+
+        output_prefix = args.output if args.output else datetime.now().strftime("%Y%m%d_%H%M%S")
+        filepath = os.path.join(ensure_dir(DATA_DIR), f"{output_prefix}_instances.csv")
+        with open(filepath, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=INSTANCE_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Instance data saved to {filepath}")
+        # Charts compare the schemes averaged over all reachable instances
+        data = average_instances(rows)
+    elif args.sweep:
+        seed = args.seed if args.seed is not None else int(time.time())
+        tasks = build_sweep_grid(args.traffic, args.replicas, args.duration, seed)
+        print(f"Running {len(tasks)} scenarios on {args.workers or os.cpu_count()} processes (seed {seed})...")
+        start = time.perf_counter()
+        df = run_sweep(tasks, args.workers, args.scenario_cache)
+        print(f"Sweep finished in {time.perf_counter() - start:.2f} seconds")
+
+        output_prefix = args.output if args.output else datetime.now().strftime("%Y%m%d_%H%M%S")
+        filepath = os.path.join(ensure_dir(DATA_DIR), f"{output_prefix}_sweep.csv")
+        df.to_csv(filepath, index=False)
+        print(f"Sweep results saved to: {filepath}")
+
+        print(df.groupby(['defense_scheme', 'attack_id'])[['ids_detection_rate', 'fw_block_rate', 'qps', 'mttr']].mean())
+        data = sweep_to_performance_data(df)
+    elif args.history:
+        from metrics_store import MetricsReader
+        reader = MetricsReader(args.history_dir)
+        if args.history not in reader.series():
+            print(f"No recorded history for session {args.history} in {args.history_dir}")
+            return
+        print(f"Loading metrics history of session {args.history}...")
+        data = history_to_performance_data(reader, args.history, parse_time(args.start), parse_time(args.end))
     elif args.file:
         print(f"Loading data from file {args.file}...")
         try:
-            # Load data from CSV file
-            filepath = os.path.join(DATA_DIR, args.file)
-            df = pd.read_csv(filepath)
-
-            # Convert data to API format
-            data = {
-                "traditional": {
-                    "ids_detection_rate": float(df[df['Metric'] == 'IDS Detection Rate(%)']['Traditional'].values[0]),
-                    "fw_block_rate": float(df[df['Metric'] == 'Firewall Block Rate(%)']['Traditional'].values[0]),
-                    "qps": float(df[df['Metric'] == 'QPS']['Traditional'].values[0]),
-                    "mttr": float(df[df['Metric'] == 'MTTR(sec)']['Traditional'].values[0])
-                },
-                "flexible": {
-                    "ids_detection_rate": float(df[df['Metric'] == 'IDS Detection Rate(%)']['AI-based'].values[0]),
-                    "fw_block_rate": float(df[df['Metric'] == 'Firewall Block Rate(%)']['AI-based'].values[0]),
-                    "qps": float(df[df['Metric'] == 'QPS']['AI-based'].values[0]),
-                    "mttr": float(df[df['Metric'] == 'MTTR(sec)']['AI-based'].values[0])
-                }
-            }
+            data = load_data_from_csv(os.path.join(DATA_DIR, args.file))
         except Exception as e:
             print(f"Error loading data: {e}")
             return
@@ -312,16 +706,13 @@ def main():
         print("Collecting performance data from API...")
         data = get_performance_data()
 
+    if data and args.no_charts:
+        return
     if data:
         output_prefix = args.output if args.output else datetime.now().strftime("%Y%m%d_%H%M%S")
 
-        # Generate bar chart
-        bar_chart_file = f"{output_prefix}_bar.png"
-        generate_bar_chart(data, bar_chart_file)
-
-        # Generate radar chart
-        radar_chart_file = f"{output_prefix}_radar.png"
-        generate_radar_chart(data, radar_chart_file)
+        # Generate bar and radar charts in parallel
+        render_charts(chart_jobs(data, output_prefix), args.workers)
 
         print("Charts generation completed!")
     else:
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+可复现的随机数流
+
+每个模拟器由一个种子通过SeedSequence派生出各组件独立的NumPy随机数生成器（PCG64）：
+同一种子、同一操作序列得到完全相同的结果；各组件的流互不影响（例如多生成一条日志不会改变检测率），
+不同种子派生的流在统计上独立，可以安全地在多个进程中并行模拟。
+"""
+
+import secrets
+
+import numpy as np
+
+
+# 各组件的随机数流，顺序决定派生关系，只能在末尾追加
+COMPONENTS = (
+    "traffic",     # 正常安全数据流量
+    "ids",         # IDS检测率和CPU使用率
+    "firewall",    # 防火墙阻断率和CPU使用率
+    "container",   # 容器MTTR和QPS
+    "resources",   # 资源分配
+    "logs",        # 日志的生成概率和内容
+    "stats",       # 初始性能统计样本
+)
+
+# 自动生成的种子范围：不超过2^53，前端JavaScript可以精确表示
+MAX_SEED = 1 << 53
+
+
+class ComponentRandom:
+    """单个组件的随机数流，提供与random模块一致的常用接口"""
+
+    __slots__ = ("generator",)
+
+    def __init__(self, generator):
+        self.generator = generator
+
+    def random(self):
+        """[0, 1)均匀分布"""
+        return float(self.generator.random())
+
+    def uniform(self, low, high):
+        """[low, high)均匀分布"""
+        return float(self.generator.uniform(low, high))
+
+    def randint(self, low, high):
+        """[low, high]整数均匀分布，与random.randint一致"""
+        return int(self.generator.integers(low, high + 1))
+
+    def choice(self, seq):
+        """从非空序列中随机选择一个元素"""
+        return seq[int(self.generator.integers(len(seq)))]
+
+
+class RandomStreams:
+    """一个模拟器的全部随机数流，seed为None时随机生成种子（可通过seed属性取得，用于复现）"""
+
+    def __init__(self, seed=None):
+        self.seed = secrets.randbelow(MAX_SEED) if seed is None else int(seed)
+        children = np.random.SeedSequence(self.seed).spawn(len(COMPONENTS))
+        for name, child in zip(COMPONENTS, children):
+            setattr(self, name, ComponentRandom(np.random.Generator(np.random.PCG64(child))))
+
+    def for_key(self, key):
+        """按状态字段名选择组件的随机数流：ids_开头为IDS，fw_开头为防火墙"""
+        return self.ids if key.startswith("ids") else self.firewall
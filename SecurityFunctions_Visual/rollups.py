@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+指标的多分辨率汇总
+
+每个tick写入指标时，同时增量更新1秒、10秒两个分辨率的汇总桶
+（样本数、和、最小值、最大值、分位数草图）。查询最近时间范围时，
+只需合并已有的汇总桶，不必扫描原始数据点。
+
+汇总桶常驻在每个会话的内存中，因此只保留最近2小时；更早的时间范围由query_history
+从磁盘上的指标历史（metrics_store）按块聚合，进程重启后由backfill从指标历史重建内存中的汇总。
+"""
+
+import bisect
+import math
+import sys
+import threading
+
+import numpy as np
+
+from metrics_store import SCHEME_CODES
+
+
+# 内存中的分辨率（秒）及其保留时长（秒）
+RESOLUTIONS = (
+    (1, 30 * 60),              # 1秒桶保留30分钟
+    (10, 2 * 3600),            # 10秒桶保留2小时
+)
+
+# 可查询的指标：指标名 -> 从一行指标历史中取值的函数
+ROLLUP_METRICS = {
+    "ids_detection_rate": lambda row: (row["ids_rate_1"] + row["ids_rate_2"]) / 2,
+    "fw_block_rate": lambda row: (row["fw_rate_1"] + row["fw_rate_2"]) / 2,
+    "qps": lambda row: row["container_qps"],
+    "mttr": lambda row: row["mttr"],
+    "ids_cpu_usage": lambda row: (row["ids_cpu_usage"] + row["ids_cpu_usage_2"]) / 2,
+    "fw_cpu_usage": lambda row: (row["fw_cpu_usage"] + row["fw_cpu_usage_2"]) / 2,
+}
+
+# ROLLUP_METRICS用到的指标历史列
+ROLLUP_COLUMNS = ("scheme", "ids_rate_1", "ids_rate_2", "fw_rate_1", "fw_rate_2", "container_qps", "mttr",
+                  "ids_cpu_usage", "ids_cpu_usage_2", "fw_cpu_usage", "fw_cpu_usage_2")
+
+SCHEME_NAMES = {code: name for name, code in SCHEME_CODES.items()}
+
+# 估算内存时一个浮点数/整数对象和一个列表槽位的大小
+_NUMBER_BYTES = sys.getsizeof(0.0)
+_POINTER_BYTES = 8
+
+
+class QuantileSketch:
+    """对数分桶的分位数草图（DDSketch），分位数的相对误差不超过relative_accuracy，可合并
+
+    只统计非负数，小于等于0的值计入零桶。
+    """
+
+    __slots__ = ("relative_accuracy", "gamma", "_log_gamma", "bins", "zero_count", "count")
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value):
+        """加入一个样本"""
+        if value > 0:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + 1
+        else:
+            self.zero_count += 1
+        self.count += 1
+
+    def remove(self, value):
+        """移除一个之前加入过的样本（用于滑动窗口）"""
+        if value > 0:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            remaining = self.bins.get(key, 0) - 1
+            if remaining > 0:
+                self.bins[key] = remaining
+            else:
+                self.bins.pop(key, None)
+        else:
+            self.zero_count -= 1
+        self.count -= 1
+
+    def merge(self, other):
+        """合并另一个相同精度的草图"""
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q):
+        """估算q分位数（0 <= q <= 1），无样本时返回None"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        cumulative = self.zero_count
+        for key in sorted(self.bins):
+            cumulative += self.bins[key]
+            if cumulative > rank:
+                # 取桶(gamma^(k-1), gamma^k]的代表值，使相对误差不超过relative_accuracy
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+
+class RollupBucket:
+    """一个汇总桶：样本数、和、最小值、最大值和分位数草图"""
+
+    __slots__ = ("count", "total", "min", "max", "sketch")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch = QuantileSketch()
+
+    def add(self, value):
+        """加入一个样本"""
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.sketch.add(value)
+
+    def merge(self, other):
+        """合并另一个桶"""
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+
+    def nbytes(self):
+        """估算占用的内存（字节）：桶、草图、分桶字典及其键值，加上所在序列中的起始时间和两个列表槽位"""
+        bins = self.sketch.bins
+        return (sys.getsizeof(self) + sys.getsizeof(self.sketch) + sys.getsizeof(bins)
+                + (4 + 2 * len(bins)) * _NUMBER_BYTES + 2 * _POINTER_BYTES)
+
+    def to_dict(self, timestamp):
+        """转换为API返回格式"""
+        p95 = self.sketch.quantile(0.95)
+        return {
+            "t": timestamp,
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.total / self.count,
+            "p95": max(self.min, min(self.max, p95)),
+        }
+
+
+class RollupSeries:
+    """单一分辨率的汇总序列，桶按起始时间排序保存，超出保留时长的桶被丢弃"""
+
+    def __init__(self, resolution, retention):
+        self.resolution = resolution
+        self.retention = retention
+        # 桶起始时间和桶，升序；丢弃的旧桶只移动_head，积累到八分之一时再压缩
+        self._times = []
+        self._buckets = []
+        self._head = 0
+
+    def __len__(self):
+        return len(self._times) - self._head
+
+    def add(self, timestamp, value):
+        """把样本加入所在的桶"""
+        start = math.floor(timestamp / self.resolution) * self.resolution
+        times = self._times
+        if len(times) > self._head and times[-1] == start:
+            bucket = self._buckets[-1]
+        elif len(times) == self._head or times[-1] < start:
+            bucket = RollupBucket()
+            times.append(start)
+            self._buckets.append(bucket)
+            self._expire(start - self.retention)
+        else:
+            # 时间戳回退（不常见）：二分找到或插入所在的桶
+            position = bisect.bisect_left(times, start, self._head)
+            if times[position] == start:
+                bucket = self._buckets[position]
+            else:
+                bucket = RollupBucket()
+                times.insert(position, start)
+                self._buckets.insert(position, bucket)
+        bucket.add(value)
+
+    def _expire(self, cutoff):
+        """丢弃起始时间早于cutoff的桶"""
+        self._head = bisect.bisect_left(self._times, cutoff, self._head)
+        if self._head > len(self._times) // 8:
+            del self._times[:self._head]
+            del self._buckets[:self._head]
+            self._head = 0
+
+    def range(self, start, end):
+        """时间范围[start, end)内的桶：(起始时间, 桶)，二分定位"""
+        lo = bisect.bisect_left(self._times, start, self._head)
+        hi = bisect.bisect_left(self._times, end, lo)
+        return list(zip(self._times[lo:hi], self._buckets[lo:hi]))
+
+    def nbytes(self):
+        """估算占用的内存（字节）：以最新的桶为样本乘以保存的桶数（含尚未压缩的旧桶），不逐个遍历"""
+        if len(self) == 0:
+            return 0
+        return len(self._buckets) * self._buckets[-1].nbytes()
+
+
+class MetricRollups:
+    """按防御方案和指标维护的多分辨率汇总"""
+
+    def __init__(self, resolutions=RESOLUTIONS, metrics=ROLLUP_METRICS):
+        self.resolutions = tuple(resolutions)
+        self.metrics = dict(metrics)
+        self._series = {}
+        self._lock = threading.Lock()
+        # 写入过的最早和最晚时间，用于判断各分辨率的保留时长能否覆盖查询
+        self.earliest = None
+        self.latest = None
+        # 从指标历史重建时读取的起点：更早的数据只在指标历史中
+        self.history_start = None
+
+    def ingest(self, row):
+        """写入一行指标历史（见metrics_store.metrics_row），无效值（NaN）不计入"""
+        scheme = SCHEME_NAMES.get(row["scheme"], "traditional")
+        timestamp = row["timestamp"]
+        with self._lock:
+            if self.latest is None:
+                self.earliest = self.latest = timestamp
+            else:
+                self.earliest = min(self.earliest, timestamp)
+                self.latest = max(self.latest, timestamp)
+            for metric, extract in self.metrics.items():
+                value = extract(row)
+                if value != value:
+                    continue
+                series = self._series.get((scheme, metric))
+                if series is None:
+                    series = self._series[(scheme, metric)] = [
+                        RollupSeries(resolution, retention) for resolution, retention in self.resolutions
+                    ]
+                for rollup in series:
+                    rollup.add(timestamp, value)
+
+    def backfill(self, reader, series, end):
+        """从指标历史（metrics_store.MetricsReader）重建保留时长内、end之前的汇总，用于进程重启后恢复会话
+
+        只应在写入新数据之前调用一次。返回读取的行数。
+        """
+        if series not in reader.series():
+            return 0
+        start = end - max(retention for _, retention in self.resolutions)
+        rows = 0
+        for block in reader.iter_blocks(series, ROLLUP_COLUMNS, start, end):
+            columns = {name: values.tolist() for name, values in block.items()}
+            for i in range(len(columns["timestamp"])):
+                self.ingest({name: values[i] for name, values in columns.items()})
+            rows += len(columns["timestamp"])
+        if rows:
+            with self._lock:
+                self.history_start = start
+        return rows
+
+    def nbytes(self):
+        """估算全部汇总桶占用的内存（字节）"""
+        with self._lock:
+            return sum(rollup.nbytes() for series in self._series.values() for rollup in series)
+
+    def covers(self, resolution, start):
+        """该分辨率保留的桶是否覆盖从start开始的时间范围（还没有丢弃过桶、且start不早于重建起点时总是覆盖）"""
+        if start is None or self.latest is None:
+            return True
+        if self.history_start is not None and start < self.history_start:
+            return False
+        retention = dict(self.resolutions)[resolution]
+        return max(start, self.earliest) >= self.latest - retention
+
+    def choose_resolution(self, bucket, start=None):
+        """选择能整除查询桶大小、且保留时长覆盖start的最精细分辨率，不存在时返回None
+
+        桶大小为多个分辨率的倍数时，更精细的分辨率合并结果相同，但其保留时长更短，
+        因此须确认保留时长覆盖查询起点，否则查询结果会被无声截断。
+        """
+        for resolution, _ in self.resolutions:
+            if resolution <= bucket and bucket % resolution == 0 and self.covers(resolution, start):
+                return resolution
+        return None
+
+    def query(self, metrics, start, end, bucket, scheme=None):
+        """查询时间范围[start, end)内各指标按bucket秒聚合的序列，scheme为None时合并两种方案"""
+        resolution = self.choose_resolution(bucket, start) or self.choose_resolution(bucket)
+        index = [r for r, _ in self.resolutions].index(resolution)
+        schemes = [scheme] if scheme else list(SCHEME_CODES)
+        # 起点对齐到桶边界，保证每个返回的桶都是完整的
+        start = math.floor(start / bucket) * bucket
+
+        result = {}
+        with self._lock:
+            for metric in metrics:
+                merged = {}
+                for name in schemes:
+                    series = self._series.get((name, metric))
+                    if series is None:
+                        continue
+                    for t, stored in series[index].range(start, end):
+                        key = math.floor(t / bucket) * bucket
+                        target = merged.get(key)
+                        if target is None:
+                            target = merged[key] = RollupBucket()
+                        target.merge(stored)
+                result[metric] = [merged[t].to_dict(t) for t in sorted(merged)]
+        return resolution, result
+
+
+def query_history(reader, series, metrics, start, end, bucket, scheme=None, extractors=ROLLUP_METRICS):
+    """从指标历史（metrics_store.MetricsReader）聚合时间范围[start, end)内各指标按bucket秒的序列
+
+    返回格式与MetricRollups.query的结果相同（分位数同样由草图估算）。只映射需要的列，按块向量化分组，
+    内存占用与桶数有关而与时间范围无关；用于超出内存中汇总保留时长的查询。
+    """
+    start = math.floor(start / bucket) * bucket
+    merged = {metric: {} for metric in metrics}
+    if series in reader.series():
+        log_gamma = QuantileSketch()._log_gamma
+        for block in reader.iter_blocks(series, ROLLUP_COLUMNS, start, end):
+            keep = block["scheme"] == SCHEME_CODES[scheme] if scheme else np.ones(len(block["timestamp"]), dtype=bool)
+            columns = {name: np.asarray(values[keep], dtype=np.float64) for name, values in block.items()}
+            keys = np.floor(columns["timestamp"] / bucket) * bucket
+            for metric in metrics:
+                values = extractors[metric](columns)
+                valid = ~np.isnan(values)
+                _merge_block(merged[metric], keys[valid], values[valid], log_gamma)
+    return {metric: [buckets[t].to_dict(t) for t in sorted(buckets)] for metric, buckets in merged.items()}
+
+
+def _merge_block(buckets, keys, values, log_gamma):
+    """把一块样本按桶起始时间keys分组并入buckets（桶起始时间 -> RollupBucket）"""
+    if len(values) == 0:
+        return
+    times, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(times))
+    totals = np.bincount(inverse, weights=values, minlength=len(times))
+    mins = np.full(len(times), np.inf)
+    np.minimum.at(mins, inverse, values)
+    maxs = np.full(len(times), -np.inf)
+    np.maximum.at(maxs, inverse, values)
+    positive = values > 0
+    zeros = np.bincount(inverse[~positive], minlength=len(times))
+    # 草图的分桶与QuantileSketch.add相同：正数按ceil(log(v) / log(gamma))分桶
+    pairs, pair_counts = np.unique(
+        np.column_stack((inverse[positive], np.ceil(np.log(values[positive]) / log_gamma).astype(np.int64))),
+        axis=0, return_counts=True)
+
+    targets = []
+    for i, t in enumerate(times.tolist()):
+        t = int(t)
+        target = buckets.get(t)
+        if target is None:
+            target = buckets[t] = RollupBucket()
+        target.count += int(counts[i])
+        target.total += float(totals[i])
+        target.min = min(target.min, float(mins[i]))
+        target.max = max(target.max, float(maxs[i]))
+        target.sketch.zero_count += int(zeros[i])
+        target.sketch.count += int(counts[i])
+        targets.append(target)
+    for (i, key), count in zip(pairs.tolist(), pair_counts.tolist()):
+        bins = targets[i].sketch.bins
+        bins[key] = bins.get(key, 0) + count
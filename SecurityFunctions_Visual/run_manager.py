@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模拟任务管理
+
+攻击模拟在固定大小的线程池中执行，每次运行持有一个取消令牌。
+无论攻击被启动/停止多少次，线程数都不会超过线程池上限。
+"""
+
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CancelToken:
+    """取消令牌：协作式取消，等待中的sleep会被立即唤醒"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self):
+        """是否已被取消"""
+        return self._event.is_set()
+
+    def cancel(self):
+        """请求取消"""
+        self._event.set()
+
+    def sleep(self, seconds, time_source=None):
+        """可中断的sleep，正常睡满返回True，被取消返回False；time_source为模拟器的时间源"""
+        if time_source is None:
+            return not self._event.wait(seconds)
+        return time_source.sleep(seconds, self._event)
+
+
+class SimulationRun:
+    """一次模拟运行"""
+
+    def __init__(self, run_id, name, token, owner=None):
+        self.run_id = run_id
+        self.name = name
+        self.token = token
+        self.owner = owner
+        self.future = None
+        self.submitted_at = time.time()
+
+    @property
+    def status(self):
+        """运行状态：queued / running / cancelling / finished"""
+        if self.future is not None and self.future.done():
+            return "finished"
+        if self.token.cancelled:
+            return "cancelling"
+        if self.future is not None and self.future.running():
+            return "running"
+        return "queued"
+
+    def to_dict(self):
+        """转换为API返回格式"""
+        return {
+            "id": self.run_id,
+            "name": self.name,
+            "owner": self.owner,
+            "status": self.status,
+            "submitted_at": time.strftime("%H:%M:%S", time.localtime(self.submitted_at)),
+        }
+
+
+class RunManager:
+    """模拟任务管理器：固定线程预算，支持列出和取消运行中的任务"""
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="simulation")
+        self._runs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, target, name, *args, owner=None):
+        """提交模拟任务，target的第一个参数为取消令牌；owner用于按会话分组"""
+        run = SimulationRun(next(self._ids), name, CancelToken(), owner)
+        with self._lock:
+            self._runs[run.run_id] = run
+        run.future = self._executor.submit(self._execute, run, target, args)
+        return run
+
+    def _execute(self, run, target, args):
+        """在线程池中执行任务，结束后移出活动列表"""
+        try:
+            if not run.token.cancelled:
+                target(run.token, *args)
+        except Exception as e:
+            print(f"模拟任务 {run.name}#{run.run_id} 出错: {e}")
+        finally:
+            with self._lock:
+                self._runs.pop(run.run_id, None)
+
+    def _select(self, owner):
+        """按owner筛选任务，owner为None时返回全部"""
+        with self._lock:
+            return [run for run in self._runs.values() if owner is None or run.owner == owner]
+
+    def list_runs(self, owner=None):
+        """列出排队中和运行中的任务"""
+        return [run.to_dict() for run in self._select(owner)]
+
+    def cancel(self, run_id, owner=None):
+        """取消指定任务，任务不存在（或不属于owner）时返回False"""
+        with self._lock:
+            run = self._runs.get(run_id)
+        if run is None or (owner is not None and run.owner != owner):
+            return False
+        run.token.cancel()
+        return True
+
+    def cancel_all(self, owner=None):
+        """取消所有任务（或指定owner的任务），返回被取消的任务数"""
+        runs = self._select(owner)
+        for run in runs:
+            run.token.cancel()
+        return len(runs)
+
+    def shutdown(self, wait=True):
+        """取消所有任务并关闭线程池"""
+        self.cancel_all()
+        self._executor.shutdown(wait=wait)
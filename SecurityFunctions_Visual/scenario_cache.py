@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+场景结果缓存
+
+完整运行一个攻击场景（simulator.run_scenario）的结果按内容寻址缓存：
+键为场景参数（含种子）和模拟代码指纹（simulator.py及其导入的全部本地模块、缓存格式版本）的SHA-256，
+模拟代码修改后旧结果不会再被命中。两级缓存：
+    - 内存：最近使用的max_entries个结果（LRU）
+    - 磁盘：<目录>/<键的前2位>/<键>.json，总大小超过max_bytes时按最近使用时间淘汰
+同一个键的并发请求只运行一次场景，其余请求等待同一个结果。
+"""
+
+import ast
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+# 场景评估的入口模块：它及其（递归）导入的本目录下的全部模块决定场景结果，内容变化后缓存的键随之变化
+FINGERPRINT_ROOT = "simulator.py"
+
+# 缓存格式版本：结果格式变化或依赖库的行为变化（源文件指纹覆盖不到）时递增，使旧结果全部失效
+CACHE_VERSION = 1
+
+
+def local_imports(name, base):
+    """模块name（本目录下的文件名）递归导入的本目录下的全部模块文件名，按名称排序（包含name本身）"""
+    seen = set()
+    pending = [name]
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        with open(os.path.join(base, current), "rb") as f:
+            tree = ast.parse(f.read(), filename=current)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                modules = [node.module]
+            else:
+                continue
+            for module in modules:
+                filename = module.split(".")[0] + ".py"
+                if os.path.exists(os.path.join(base, filename)):
+                    pending.append(filename)
+    return sorted(seen)
+
+
+def code_fingerprint(root=FINGERPRINT_ROOT):
+    """模拟代码的指纹：缓存格式版本和root及其导入的各本地模块源文件的SHA-256"""
+    digest = hashlib.sha256(f"v{CACHE_VERSION}".encode("ascii"))
+    base = os.path.dirname(os.path.abspath(__file__))
+    for name in local_imports(root, base):
+        digest.update(name.encode("utf-8") + b"\0")
+        with open(os.path.join(base, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def scenario_key(params, fingerprint):
+    """场景参数对应的缓存键"""
+    content = json.dumps({"params": params, "code": fingerprint}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class ScenarioCache:
+    """场景结果的两级缓存，未命中时以场景参数调用compute计算"""
+
+    def __init__(self, compute, directory=None, max_entries=256, max_bytes=256 * 1024 * 1024, fingerprint=None):
+        self.compute = compute
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.fingerprint = fingerprint or code_fingerprint()
+        # 命中统计
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._disk_index = None  # 键 -> 文件大小，按最近使用排序
+        self._disk_bytes = 0
+
+    def key(self, params):
+        """场景参数对应的缓存键"""
+        return scenario_key(params, self.fingerprint)
+
+    def get(self, params):
+        """获取场景结果，返回(键, 结果, 来源)，来源为"memory"、"disk"或"miss"（本次运行得到）"""
+        key = self.key(params)
+        while True:
+            with self._lock:
+                result = self._entries.get(key)
+                if result is not None:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return key, result, "memory"
+                event = self._inflight.get(key)
+                owner = event is None
+                if owner:
+                    event = self._inflight[key] = threading.Event()
+            if owner:
+                break
+            # 等待进行中的同一场景；它失败时重新检查并由本线程计算
+            event.wait()
+
+        try:
+            result = self._load(key)
+            source = "disk"
+            if result is None:
+                result = self.compute(**params)
+                source = "miss"
+                self._save(key, result)
+            with self._lock:
+                if source == "disk":
+                    self.disk_hits += 1
+                else:
+                    self.misses += 1
+                self._remember(key, result)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+        return key, result, source
+
+    def lookup(self, params):
+        """只查缓存（内存和磁盘），未命中时返回None，不计算"""
+        key = self.key(params)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return result
+        result = self._load(key)
+        if result is not None:
+            with self._lock:
+                self.disk_hits += 1
+                self._remember(key, result)
+        return result
+
+    def put(self, params, result):
+        """写入一个在别处计算的场景结果"""
+        key = self.key(params)
+        self._save(key, result)
+        with self._lock:
+            self._remember(key, result)
+        return key
+
+    def _remember(self, key, result):
+        """写入内存LRU并淘汰最久未用的结果（调用方持有_lock）"""
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _scan_disk(self):
+        """首次访问磁盘缓存时扫描已有文件，按修改时间（最近使用时间）排序（调用方持有_lock）"""
+        if self._disk_index is not None:
+            return
+        files = []
+        try:
+            for prefix in os.scandir(self.directory):
+                if not prefix.is_dir():
+                    continue
+                for entry in os.scandir(prefix.path):
+                    if entry.name.endswith(".json"):
+                        stat = entry.stat()
+                        files.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+        except OSError:
+            pass
+        files.sort()
+        self._disk_index = OrderedDict((key, size) for _, key, size in files)
+        self._disk_bytes = sum(self._disk_index.values())
+
+    def _load(self, key):
+        """从磁盘读取结果，命中时更新其最近使用时间"""
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._scan_disk()
+            if key in self._disk_index:
+                self._disk_index.move_to_end(key)
+        return result
+
+    def _save(self, key, result):
+        """原子地写入磁盘，并在总大小超过上限时删除最久未用的结果"""
+        if not self.directory:
+            return
+        path = self._path(key)
+        data = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"写入场景缓存出错: {e}")
+            return
+
+        with self._lock:
+            self._scan_disk()
+            self._disk_bytes += len(data) - self._disk_index.pop(key, 0)
+            self._disk_index[key] = len(data)
+            evicted = []
+            while self._disk_bytes > self.max_bytes and len(self._disk_index) > 1:
+                old_key, size = self._disk_index.popitem(last=False)
+                self._disk_bytes -= size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+    def stats(self):
+        """缓存统计"""
+        with self._lock:
+            return {
+                "memory_entries": len(self._entries),
+                "memory_hits": self.memory_hits,
+                "disk_entries": len(self._disk_index) if self._disk_index is not None else None,
+                "disk_bytes": self._disk_bytes if self._disk_index is not None else None,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
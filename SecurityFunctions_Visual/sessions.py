@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模拟会话管理
+
+每个会话（按会话ID区分）拥有独立的Simulator实例，首次访问时按需创建。
+空闲超时的会话会被淘汰，存活会话总数有上限，单会话的日志和统计样本数有上限，
+单会话的估算内存超过上限时拒绝创建或淘汰该会话。
+"""
+
+import re
+import threading
+import time
+
+
+# 会话ID只允许字母、数字、下划线和连字符
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# 默认会话，兼容不携带会话ID的客户端，不会因空闲被淘汰
+DEFAULT_SESSION_ID = "default"
+
+
+class SessionLimitError(Exception):
+    """存活会话数或单会话内存已达上限"""
+
+
+class SessionManager:
+    """会话管理器：按需创建、空闲淘汰、总数上限、单会话内存上限（max_session_memory字节，None为不限制）"""
+
+    def __init__(self, factory, max_sessions=200, idle_timeout=1800, max_session_memory=None):
+        # factory: 接收会话ID，返回新的Simulator实例
+        self._factory = factory
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_session_memory = max_session_memory
+
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id=DEFAULT_SESSION_ID):
+        """获取会话，不存在时创建；超出上限时抛出SessionLimitError"""
+        session = self._sessions.get(session_id)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(session_id)
+                if session is None:
+                    if len(self._sessions) >= self.max_sessions:
+                        self._evict_idle_locked()
+                    if len(self._sessions) >= self.max_sessions:
+                        raise SessionLimitError(f"存活会话数已达上限: {self.max_sessions}")
+                    session = self._factory(session_id)
+                    if self._over_memory(session):
+                        # 新会话的固定开销（如预分配的样本缓冲区）已超过上限，说明配置不合理
+                        session.close()
+                        raise SessionLimitError(f"会话内存占用超过上限: {self.max_session_memory}字节")
+                    self._sessions[session_id] = session
+        session.touch()
+        return session
+
+    def sessions(self):
+        """当前所有存活会话"""
+        with self._lock:
+            return list(self._sessions.values())
+
+    def remove(self, session_id):
+        """关闭会话并取消其运行中的模拟，会话不存在时返回False"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.close()
+        return True
+
+    def _over_memory(self, session):
+        """会话的估算内存是否超过上限"""
+        return self.max_session_memory is not None and session.memory_estimate() > self.max_session_memory
+
+    def evict_over_memory(self):
+        """淘汰估算内存超过上限的会话（包括默认会话，下次访问时重新创建），返回被淘汰的会话ID列表"""
+        if self.max_session_memory is None:
+            return []
+        evicted = []
+        for session in self.sessions():
+            if self._over_memory(session):
+                with self._lock:
+                    if self._sessions.get(session.session_id) is not session:
+                        continue
+                    del self._sessions[session.session_id]
+                print(f"会话 {session.session_id} 的内存占用超过上限，已关闭")
+                session.close()
+                evicted.append(session.session_id)
+        return evicted
+
+    def evict_idle(self):
+        """淘汰空闲超时的会话，返回被淘汰的会话ID列表"""
+        with self._lock:
+            return self._evict_idle_locked()
+
+    def _evict_idle_locked(self):
+        """淘汰空闲超时的会话（调用方需持有锁）"""
+        now = time.time()
+        evicted = []
+        for session_id, session in list(self._sessions.items()):
+            if session_id == DEFAULT_SESSION_ID:
+                continue
+            # 仍有推送订阅者的会话视为活跃
+            if session.broadcaster.subscriber_count > 0:
+                continue
+            if now - session.last_access > self.idle_timeout:
+                del self._sessions[session_id]
+                session.close()
+                evicted.append(session_id)
+        return evicted
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模拟时钟
+
+由单个后台线程按固定tick频率推进模拟状态，HTTP请求只读取最新快照，
+模拟速度不再取决于有多少客户端在轮询。
+
+模拟器通过可替换的时间源获取当前时间和执行等待：
+- RealTimeSource：真实时间
+- ScaledTimeSource：按倍速流逝的时间，等待时长按倍数缩短
+- VirtualTimeSource：虚拟时间，等待不占用真实时间，定时回调在虚拟时间到达时执行
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+
+class RealTimeSource:
+    """真实时间"""
+
+    speed = 1.0
+
+    def now(self):
+        """当前时间（Unix时间戳）"""
+        return time.time()
+
+    def sleep(self, seconds, event=None):
+        """等待指定秒数，event被设置时提前返回；正常睡满返回True，被打断返回False"""
+        if event is None:
+            time.sleep(seconds)
+            return True
+        return not event.wait(seconds)
+
+
+class ScaledTimeSource:
+    """倍速时间：模拟时间以speed倍的速度流逝"""
+
+    def __init__(self, speed, start=None):
+        if speed <= 0:
+            raise ValueError(f"speed必须为正数: {speed}")
+        self.speed = speed
+        self._origin = time.time() if start is None else start
+        self._real_origin = time.monotonic()
+
+    def now(self):
+        """当前模拟时间"""
+        return self._origin + (time.monotonic() - self._real_origin) * self.speed
+
+    def sleep(self, seconds, event=None):
+        """等待模拟时间seconds秒（真实等待seconds / speed秒）"""
+        real_seconds = seconds / self.speed
+        if event is None:
+            time.sleep(real_seconds)
+            return True
+        return not event.wait(real_seconds)
+
+
+class VirtualTimeSource:
+    """虚拟时间：sleep立即把时间向前推进，不真正等待，模拟以CPU允许的最快速度运行
+
+    通过schedule注册的定时回调（例如模拟器的tick）在虚拟时间越过其到期时刻时，
+    由推进时间的线程按时间顺序执行，因此整个场景的运行结果与真实时间下的节奏一致。
+    """
+
+    speed = None
+
+    def __init__(self, start=None):
+        self._now = time.time() if start is None else start
+        self._timers = []
+        self._ids = itertools.count()
+        self._lock = threading.RLock()
+
+    def now(self):
+        """当前虚拟时间"""
+        return self._now
+
+    def schedule(self, callback, delay, interval=None):
+        """delay秒后执行callback；interval不为None时此后每隔interval秒重复执行"""
+        with self._lock:
+            heapq.heappush(self._timers, (self._now + delay, next(self._ids), interval, callback))
+
+    def advance(self, seconds):
+        """把虚拟时间推进seconds秒，依次执行期间到期的定时回调"""
+        with self._lock:
+            target = self._now + seconds
+            while self._timers and self._timers[0][0] <= target:
+                due, _, interval, callback = heapq.heappop(self._timers)
+                self._now = max(self._now, due)
+                if interval is not None:
+                    heapq.heappush(self._timers, (due + interval, next(self._ids), interval, callback))
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"虚拟时间定时回调出错: {e}")
+            self._now = max(self._now, target)
+
+    def sleep(self, seconds, event=None):
+        """推进虚拟时间；event已被设置（或在定时回调中被设置）时返回False"""
+        if event is not None and event.is_set():
+            return False
+        self.advance(seconds)
+        return event is None or not event.is_set()
+
+
+# 默认的真实时间源
+REAL_TIME = RealTimeSource()
+
+
+class SimulationClock:
+    """模拟时钟：后台调度线程，按固定间隔调用tick函数"""
+
+    def __init__(self, tick, interval=3.0):
+        # tick: 无参函数，推进一个tick的模拟状态
+        self._tick = tick
+        self.interval = interval
+        self.tick_count = 0
+
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        """时钟线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def add_listener(self, listener):
+        """注册tick完成后的回调，回调在时钟线程中执行"""
+        self._listeners.append(listener)
+
+    def start(self):
+        """启动时钟线程（重复调用无副作用）"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="simulation-clock", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        """停止时钟线程"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return
+        self._stop_event.set()
+        thread.join(timeout)
+
+    def step(self):
+        """同步执行一个tick，并通知所有回调"""
+        self._tick()
+        self.tick_count += 1
+        for listener in self._listeners:
+            try:
+                listener()
+            except Exception as e:
+                print(f"模拟时钟回调出错: {e}")
+
+    def _run(self):
+        """按固定节拍执行tick，按截止时间调度以避免累计漂移"""
+        deadline = time.monotonic()
+        while not self._stop_event.is_set():
+            try:
+                self.step()
+            except Exception as e:
+                print(f"模拟时钟tick出错: {e}")
+
+            deadline += self.interval
+            now = time.monotonic()
+            if deadline < now:
+                # 落后超过一个周期时直接对齐到当前时间，不补跑错过的tick
+                deadline = now
+            self._stop_event.wait(deadline - now)
@@ -0,0 +1,1693 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+安全防御模拟器
+
+每个Simulator实例持有一套独立的模拟状态、性能统计和状态推送通道，
+不依赖Flask，既可以作为Web会话的后端，也可以在进程内直接运行。
+"""
+
+import sys
+import time
+import json
+import uuid
+
+from event_log import EventLog
+from log_search import LogSearch
+from metrics_store import metrics_row
+from perf_stats import METRIC_KEYS, PerformanceStats
+from random_streams import RandomStreams
+from rollups import MetricRollups
+from run_manager import CancelToken
+from simulation_clock import REAL_TIME, VirtualTimeSource
+from state_store import StateStore
+from status_stream import StatusBroadcaster
+
+
+# 新会话的初始日志：(早于创建时间的秒数, 内容)
+INITIAL_LOGS = (
+    (0, "AGV控制系统正常运行中，无异常"),
+    (30, "调度系统正常运行中，无异常"),
+    (60, "传统IDS和防火墙正常监控网络流量"),
+)
+
+
+def initial_state(now=None, streams=None):
+    """生成一份初始模拟状态，now为当前模拟时间，streams为模拟器的随机数流"""
+    now = time.time() if now is None else now
+    streams = RandomStreams() if streams is None else streams
+    return {
+        "defense_scheme": "traditional",  # 'traditional' 或 'flexible'，默认为传统防御方案
+        "attack_types": [],  # []无攻击，[1, 2]编码对应攻击类型
+        "attack_traffic": {},  # 攻击类型对应流量字典
+        "mttr": 0.7,  # 平均修复时间（秒）
+        "container_qps": 500,  # 容器每秒查询数
+        "normal_traffic": streams.traffic.randint(200, 600),  # 正常安全数据流量
+        "resource_allocation": {
+            "IDS-AGV": 30,
+            "IDS-Scheduler": 30,
+            "Firewall-AGV": 35,
+            "Firewall-Scheduler": 35,
+        },
+        "component_names": {
+            "ids_agv": "静态IDS-AGV",
+            "ids_scheduler": "静态IDS-RCS",
+            "fw_agv": "静态防火墙-AGV",
+            "fw_scheduler": "静态防火墙-RCS"
+        },
+        "is_attacking": False,
+        "log_seq": 0,  # 最后一条已提交日志的序号（单调递增，作为日志游标），日志本身保存在EventLog中
+        "agv_active": True,  # AGV是否正常运行
+        "ids_active": True,  # 传统IDS默认是激活的
+        "ids_security": 0,  # 默认IDS安全能力
+        "fw_security": 85,  # 默认防火墙安全能力
+        # 检测率和阻断率（百分数），rates_valid为False时表示无攻击、数值无意义
+        "ids_rate_1": 0.0,
+        "ids_rate_2": 0.0,
+        "fw_rate_1": 0.0,
+        "fw_rate_2": 0.0,
+        "rates_valid": False,
+        "attacks_detected": 0,
+        "attacks_blocked": 0,
+        "risk_level": "低",
+        "ids_cpu_usage": 30,  # 默认CPU使用率 - 传统IDS 1
+        "ids_cpu_usage_2": 30,  # 默认CPU使用率 - 传统IDS 2
+        "fw_cpu_usage": 35,  # 默认CPU使用率 - 传统防火墙 1
+        "fw_cpu_usage_2": 35,  # 默认CPU使用率 - 传统防火墙 2
+    }
+
+
+# 检测率/阻断率字段及其无效时的显示文本
+RATE_FIELDS = {
+    "ids_rate_1": "N/A（无攻击发生）",
+    "ids_rate_2": "N/A（无攻击发生）",
+    "fw_rate_1": "N/A（无攻击需阻断）",
+    "fw_rate_2": "N/A（无攻击需阻断）",
+}
+
+
+# 每个状态版本最多缓存的增量编码数（不同客户端的(since, log_cursor)组合）
+DELTA_CACHE_SIZE = 64
+
+
+# 运行单个场景时保留的日志条数上限（足够容纳一个完整场景的全部日志）
+SCENARIO_MAX_LOGS = 1000
+
+
+def format_rate(value, valid, na_text):
+    """格式化检测率/阻断率，无效时返回N/A文本"""
+    return f"{value:.2f}%" if valid else na_text
+
+
+# 攻击期间各指标的取值分布（均匀分布区间，检测率/阻断率为比例），与批量引擎batch_engine.py共用
+# 传统方案：检测率和阻断率较低，QPS低，MTTR高
+TRADITIONAL_ATTACK_RATES = {
+    "ids_rate_1": (0.45, 0.55),
+    "fw_rate_1": (0.3, 0.5),
+    "ids_rate_2": (0.35, 0.65),
+    "fw_rate_2": (0.2, 0.6),
+}
+TRADITIONAL_ATTACK_MTTR = (2.23, 3.18)
+TRADITIONAL_ATTACK_QPS = (140, 200)
+TRADITIONAL_MTTR_DRIFT = 0.02  # MTTR每次更新的随机波动幅度
+
+# AI方案：触发攻击时的初始值
+FLEXIBLE_TRIGGER_IDS_RATE = (0.85, 0.98)
+FLEXIBLE_TRIGGER_FW_RATE = (0.8, 0.95)
+FLEXIBLE_TRIGGER_MTTR = (0.7, 0.9)
+FLEXIBLE_TRIGGER_QPS = (800, 1000)
+
+# AI方案各攻击阶段：(适用的最大阶段序号, IDS检测率, 防火墙阻断率, MTTR, QPS)，None表示其余阶段
+FLEXIBLE_PHASE_PROFILES = (
+    (1, (0.85, 0.90), (0.80, 0.85), (0.7, 0.9), (800, 900)),      # 初始检测
+    (3, (0.88, 0.93), (0.83, 0.88), (0.5, 0.7), (850, 950)),      # 分析和准备
+    (6, (0.92, 0.96), (0.88, 0.93), (0.3, 0.5), (900, 980)),      # 重组阶段
+    (None, (0.96, 0.99), (0.94, 0.98), (0.2, 0.4), (950, 1000)),  # 完全防御
+)
+
+# AI方案：重组完成后的持续防御状态
+FLEXIBLE_DEFENSE_IDS_RATE = (0.96, 0.99)
+FLEXIBLE_DEFENSE_FW_RATE = (0.95, 0.98)
+FLEXIBLE_DEFENSE_MTTR = (0.2, 0.4)
+FLEXIBLE_DEFENSE_QPS = (900, 1000)
+FLEXIBLE_MTTR_DRIFT = 0.05
+
+
+def flexible_phase_profile(index):
+    """AI方案第index个攻击阶段的指标分布：(IDS检测率, 防火墙阻断率, MTTR, QPS)"""
+    for last_index, ids_rate, fw_rate, mttr, qps in FLEXIBLE_PHASE_PROFILES:
+        if last_index is None or index <= last_index:
+            return ids_rate, fw_rate, mttr, qps
+
+
+def initial_performance_stats(capacity=100, streams=None):
+    """生成初始性能统计数据，添加一些模拟数据，以便在没有真实数据时也能生成图表"""
+    streams = RandomStreams() if streams is None else streams
+    stats = PerformanceStats(capacity)
+    for _ in range(5):
+        # 传统方案的模拟数据
+        stats.append("traditional", "ids_detection_rates", streams.stats.uniform(45, 55))  # IDS检测率
+        stats.append("traditional", "fw_block_rates", streams.stats.uniform(30, 50))       # 防火墙拦截率
+        stats.append("traditional", "qps_values", streams.stats.uniform(140, 200))         # QPS值
+        stats.append("traditional", "mttr_values", streams.stats.uniform(2.23, 3.18))      # MTTR值
+        # AI方案的模拟数据
+        stats.append("flexible", "ids_detection_rates", streams.stats.uniform(85, 99))     # IDS检测率
+        stats.append("flexible", "fw_block_rates", streams.stats.uniform(80, 98))          # 防火墙拦截率
+        stats.append("flexible", "qps_values", streams.stats.uniform(800, 1000))           # QPS值
+        stats.append("flexible", "mttr_values", streams.stats.uniform(0.2, 0.9))           # MTTR值
+    return stats
+
+
+class Simulator:
+    """单个会话的安全防御模拟器"""
+
+    def __init__(self, session_id, run_manager, max_log_entries=100, max_samples=100, retry_interval=3.0, time_source=None,
+                 event_journal=None, seed=None):
+        self.session_id = session_id
+        # 会话实例ID：每次创建会话时随机生成，进程重启或会话重建后版本号从头计数，ETag和缓存键须带上它以免冲突
+        self.instance_id = uuid.uuid4().hex[:16]
+        self.run_manager = run_manager
+        # 时间源：攻击阶段的等待和日志时间戳都使用模拟时间
+        self.time_source = time_source or REAL_TIME
+
+        # 单会话内存上限：日志条数和每项性能指标的样本数
+        self.max_log_entries = max_log_entries
+        self.max_samples = max_samples
+
+        # 随机数流：由种子为每个组件派生独立的生成器，相同种子和操作序列可以复现同样的模拟
+        self.rng = RandomStreams(seed)
+
+        # 事件日志：内存中保留最近的日志供状态响应使用，配置了event_journal时全部日志写入磁盘
+        # （多保留一倍，使稍旧的快照仍能取到完整的max_log_entries条）
+        self.event_log = EventLog(session_id, max_log_entries * 2, event_journal)
+        # 日志全文检索：新日志写入时同步更新倒排索引
+        self.log_search = LogSearch(self.event_log)
+
+        # 状态存储（写事务串行，读者无锁读取快照）
+        now = self.time_source.now()
+        state = initial_state(now, self.rng)
+        state["seed"] = self.rng.seed
+        for offset, content in INITIAL_LOGS:
+            event = self.event_log.append("info", content, now - offset)
+            self.log_search.add(event)
+            state["log_seq"] = event["seq"]
+        self.store = StateStore(state)
+        # 性能指标统计数据（每项指标一个定长环形缓冲区）
+        self.performance_stats = initial_performance_stats(max_samples, self.rng)
+        # 指标历史的多分辨率汇总（每个tick增量更新，供时间范围查询）
+        self.metric_rollups = MetricRollups()
+        # 状态推送广播器
+        self.broadcaster = StatusBroadcaster(retry_interval=retry_interval)
+
+        self.created_at = time.time()
+        self.last_access = self.created_at
+        # 最新状态快照的编码缓存：(版本号, JSON)
+        self._encoded_status = None
+        # 最新状态的增量编码缓存：(版本号, {(基准版本号, 日志游标): JSON})
+        self._encoded_deltas = (None, {})
+
+    @property
+    def seed(self):
+        """当前随机数流的种子"""
+        return self.rng.seed
+
+    def reseed(self, seed=None):
+        """用新的种子重建全部随机数流（seed为None时随机生成），返回使用的种子"""
+        with self.store.update() as state:
+            self.rng = RandomStreams(seed)
+            state["seed"] = self.rng.seed
+        return self.rng.seed
+
+    def close(self):
+        """关闭会话：取消运行中的攻击模拟，结束所有状态推送连接"""
+        if self.run_manager is not None:
+            self.run_manager.cancel_all(owner=self.session_id)
+        self.broadcaster.close()
+
+    def touch(self):
+        """记录一次访问，用于空闲淘汰"""
+        self.last_access = time.time()
+
+    def build_status_payload(self, snapshot):
+        """构造状态响应数据"""
+        response_data = dict(snapshot.data)
+        response_data["version"] = snapshot.version
+        response_data["session_id"] = self.session_id
+        response_data["instance_id"] = self.instance_id
+        response_data["sim_time"] = self.time_source.now()
+        # 检测率和阻断率只在输出时格式化，同时附带原始数值（无效时为null）
+        valid = snapshot.data["rates_valid"]
+        for key, na_text in RATE_FIELDS.items():
+            value = snapshot.data[key]
+            response_data[key] = format_rate(value, valid, na_text)
+            response_data[f"{key}_value"] = value if valid else None
+        # 快照提交时已有的最近日志，确保前端能够正确显示日志
+        logs = self.event_log.recent(snapshot.data["log_seq"], self.max_log_entries)
+        response_data["attack_logs"] = logs
+        response_data["logs"] = logs
+        response_data["log_cursor"] = snapshot.data["log_seq"]
+        return response_data
+
+    def encoded_status(self):
+        """返回(版本号, 编码后的状态JSON)，同一版本只编码一次"""
+        snapshot = self.store.snapshot()
+        cached = self._encoded_status
+        if cached is not None and cached[0] == snapshot.version:
+            return cached
+        cached = (snapshot.version, json.dumps(self.build_status_payload(snapshot), ensure_ascii=False))
+        self._encoded_status = cached
+        return cached
+
+    def build_status_delta(self, snapshot, base=None, log_cursor=None):
+        """构造相对base快照的增量状态：只含变化的字段和日志游标之后的新日志
+
+        base为None时包含全部字段；log_cursor为None时取base的日志游标。
+        客户端的游标已不在保留的日志范围内（或大于当前游标）时返回全部日志并置logs_reset。
+        """
+        payload = self.build_status_payload(snapshot)
+        logs = payload.pop("logs")
+        del payload["attack_logs"]
+        log_seq = snapshot.data["log_seq"]
+        if base is not None:
+            previous = self.build_status_payload(base)
+            payload = {key: value for key, value in payload.items() if previous.get(key) != value}
+            if log_cursor is None:
+                log_cursor = base.data["log_seq"]
+            payload["version"] = snapshot.version
+            payload["session_id"] = self.session_id
+            payload["instance_id"] = self.instance_id
+            payload["log_cursor"] = log_seq
+
+        oldest = logs[0]["seq"] if logs else log_seq + 1
+        reset = log_cursor is None or log_cursor > log_seq or log_cursor < oldest - 1
+        payload["delta"] = base is not None
+        payload["base_version"] = base.version if base is not None else None
+        payload["new_logs"] = logs if reset else [entry for entry in logs if entry["seq"] > log_cursor]
+        payload["logs_reset"] = reset
+        return payload
+
+    def encoded_status_delta(self, since=None, log_cursor=None, instance_id=None):
+        """返回(版本号, 编码后的增量状态JSON)，同一版本下相同的(since, log_cursor)只编码一次
+
+        since和log_cursor只在instance_id与本会话实例相同时有效（会话重建或服务重启后版本号和日志序号可能重复），
+        不同或since对应的快照已不在历史中时退回为包含全部字段和全部日志的响应（delta为false）。
+        """
+        if instance_id != self.instance_id:
+            since = log_cursor = None
+        snapshot = self.store.snapshot()
+        base = self.store.snapshot_at(since) if since is not None else None
+        key = (base.version if base is not None else None, log_cursor)
+        version, cache = self._encoded_deltas
+        if version != snapshot.version:
+            cache = {}
+            self._encoded_deltas = (snapshot.version, cache)
+        payload = cache.get(key)
+        if payload is None:
+            payload = json.dumps(self.build_status_delta(snapshot, base, log_cursor), ensure_ascii=False)
+            if len(cache) < DELTA_CACHE_SIZE:
+                cache[key] = payload
+        return snapshot.version, payload
+
+    def publish_status_snapshot(self):
+        """将最新状态快照推送给本会话的所有订阅者"""
+        self.broadcaster.publish(self.encoded_status()[1])
+
+    def metrics_row(self):
+        """当前状态对应的一行指标历史（时间戳为模拟时间）"""
+        return metrics_row(self.store.snapshot().data, self.time_source.now())
+
+    def record_metrics(self):
+        """记录当前tick的指标：更新多分辨率汇总，并返回这一行指标"""
+        row = self.metrics_row()
+        self.metric_rollups.ingest(row)
+        return row
+
+    def memory_estimate(self):
+        """粗略估算本会话占用的内存（字节）：状态、日志及其检索索引、统计样本、指标汇总和编码缓存"""
+        data = self.store.snapshot().data
+        size = sys.getsizeof(data)
+        size += sum(sys.getsizeof(entry) + sys.getsizeof(entry["content"]) for entry in self.event_log.recent())
+        size += self.log_search.nbytes()
+        size += self.performance_stats.nbytes
+        size += self.metric_rollups.nbytes()
+        if self._encoded_status is not None:
+            size += sys.getsizeof(self._encoded_status[1])
+        size += sum(sys.getsizeof(payload) for payload in self._encoded_deltas[1].values())
+        return size
+
+    def to_dict(self):
+        """会话概况，供会话列表接口使用"""
+        data = self.store.snapshot().data
+        return {
+            "session_id": self.session_id,
+            "defense_scheme": data["defense_scheme"],
+            "is_attacking": data["is_attacking"],
+            "version": self.store.version,
+            "seed": self.seed,
+            "subscribers": self.broadcaster.subscriber_count,
+            "idle_seconds": round(time.time() - self.last_access, 1),
+            "memory_bytes": self.memory_estimate(),
+        }
+
+    def set_defense_scheme(self, new_scheme):
+        """设置防御方案，返回提示信息"""
+        old_scheme = self.store.get("defense_scheme")
+
+        # 如果防御方案没有变化，直接返回
+        if old_scheme == new_scheme:
+            return f"防御方案未变化: {new_scheme}"
+
+        with self.store.update() as state:
+            # 更新防御方案
+            state["defense_scheme"] = new_scheme
+
+            # 更新组件名称 - 简化版本
+            if new_scheme == "traditional":
+                # 传统方案：使用静态IDS和防火墙
+                state["component_names"] = {
+                    "ids_agv": "静态IDS-AGV",
+                    "ids_scheduler": "静态IDS-RCS",
+                    "fw_agv": "静态防火墙-AGV",
+                    "fw_scheduler": "静态防火墙-RCS"
+                }
+            else:
+                # AI方案：使用AGV和RCS专用的IDS和防火墙
+                state["component_names"] = {
+                    "ids_agv": "AGV-IDS",
+                    "ids_scheduler": "RCS-IDS",
+                    "fw_agv": "AGV-防火墙",
+                    "fw_scheduler": "RCS-防火墙"
+                }
+
+            # 更新IDS检测率和防火墙阻断率
+            self.update_security_rates()
+
+            # 平滑过渡资源分配和CPU使用率
+            # 保存当前的CPU使用率，用于平滑过渡
+            current_ids_cpu = state["ids_cpu_usage"]
+            current_ids_cpu2 = state["ids_cpu_usage_2"]
+            current_fw_cpu = state["fw_cpu_usage"]
+            current_fw_cpu2 = state["fw_cpu_usage_2"]
+
+            # 更新资源分配情况 - 使用更合理的资源分配范围
+            if new_scheme == "flexible" and state["attack_types"]:
+                # 柔性重组方案在攻击时，资源分配较高但不超过80%
+                state["resource_allocation"] = {
+                    "IDS-AGV": self.rng.resources.uniform(55, 75),
+                    "IDS-Scheduler": self.rng.resources.uniform(55, 75),
+                    "Firewall-AGV": self.rng.resources.uniform(60, 80),
+                    "Firewall-Scheduler": self.rng.resources.uniform(60, 80),
+                }
+            else:
+                # 其他情况下，资源分配较低
+                state["resource_allocation"] = {
+                    "IDS-AGV": self.rng.resources.uniform(15, 25),
+                    "IDS-Scheduler": self.rng.resources.uniform(15, 25),
+                    "Firewall-AGV": self.rng.resources.uniform(20, 30),
+                    "Firewall-Scheduler": self.rng.resources.uniform(20, 30),
+                }
+
+            # 计算目标CPU使用率
+            if new_scheme == "traditional":
+                # 传统方案：无攻击时资源消耗较低，攻击时资源消耗较高且稍微波动
+                if not state["attack_types"]:
+                    # 无攻击状态下，CPU使用率较低
+                    cpu_base = 30
+                    fluctuation = 2
+                else:
+                    # 攻击状态下，CPU使用率较高但会卡在一个值
+                    cpu_base = 55
+                    fluctuation = 2
+
+                # 计算目标CPU使用率
+                target_ids_cpu = self.rng.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                target_ids_cpu2 = self.rng.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                target_fw_cpu = self.rng.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                target_fw_cpu2 = self.rng.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+            else:
+                # 柔性重组方案：基于资源分配动态调整
+                # 获取当前资源分配
+                ids_agv_alloc = state["resource_allocation"].get("IDS-AGV", 0)
+                ids_sched_alloc = state["resource_allocation"].get("IDS-Scheduler", 0)
+                fw_agv_alloc = state["resource_allocation"].get("Firewall-AGV", 0)
+                fw_sched_alloc = state["resource_allocation"].get("Firewall-Scheduler", 0)
+
+                # 计算目标CPU使用率
+                target_ids_cpu = self.rng.ids.uniform(15, 45) + ids_agv_alloc * 0.5
+                target_ids_cpu2 = self.rng.ids.uniform(15, 45) + ids_sched_alloc * 0.5
+                target_fw_cpu = self.rng.firewall.uniform(15, 50) + fw_agv_alloc * 0.7
+                target_fw_cpu2 = self.rng.firewall.uniform(15, 50) + fw_sched_alloc * 0.7
+
+            # 平滑过渡到目标CPU使用率 - 使用加权平均
+            weight = 0.3  # 权重因子，控制过渡速度
+            state["ids_cpu_usage"] = current_ids_cpu * (1 - weight) + target_ids_cpu * weight
+            state["ids_cpu_usage_2"] = current_ids_cpu2 * (1 - weight) + target_ids_cpu2 * weight
+            state["fw_cpu_usage"] = current_fw_cpu * (1 - weight) + target_fw_cpu * weight
+            state["fw_cpu_usage_2"] = current_fw_cpu2 * (1 - weight) + target_fw_cpu2 * weight
+
+            # 添加日志
+            if new_scheme == "traditional":
+                self.add_log("info", "已切换到传统防御方案，静态IDS和防火墙将用于防御")
+            else:
+                self.add_log("info", "已切换到AI安全功能柔性重组方案，系统将根据攻击动态调整防御策略")
+
+        self.publish_status_snapshot()
+        return f"已设置防御方案: {new_scheme}"
+
+    def set_attack(self, attack_id, agv_traffic=2000, scheduler_traffic=1500):
+        """设置攻击类型和流量，返回(攻击类型, 攻击流量)"""
+
+        with self.store.update() as state:
+            # 重置攻击状态
+            state["attack_types"] = []
+            state["attack_traffic"] = {}
+
+            # 更新IDS检测率和防火墙阻断率
+            self.update_security_rates(attack_id)
+
+            if attack_id == 0:
+                # 无攻击
+                pass
+            elif attack_id == 1:
+                # 攻击AGV控制系统
+                state["attack_types"] = [1]
+                state["attack_traffic"] = {1: agv_traffic}
+            elif attack_id == 2:
+                # 攻击调度系统
+                state["attack_types"] = [2]
+                state["attack_traffic"] = {2: scheduler_traffic}
+            elif attack_id == 3:
+                # 同时攻击
+                state["attack_types"] = [1, 2]
+                state["attack_traffic"] = {
+                    1: agv_traffic,
+                    2: scheduler_traffic
+                }
+
+        self.publish_status_snapshot()
+        return state["attack_types"], state["attack_traffic"]
+
+    def trigger_attack(self):
+        """触发攻击或停止攻击，返回(提示信息, 本次运行)，停止攻击时运行为None"""
+        # 如果当前正在攻击中，则停止攻击
+        if self.store.get("is_attacking"):
+            # 取消本会话所有运行中的攻击模拟
+            self.run_manager.cancel_all(owner=self.session_id)
+
+            with self.store.update() as state:
+                # 停止攻击，重置状态
+                state["is_attacking"] = False
+                state["attack_types"] = []
+
+                # 重置安全能力指标
+                state["ids_security"] = 0
+                state["fw_security"] = 85
+
+                # 重置AGV和IDS状态
+                state["agv_active"] = True
+                state["ids_active"] = True
+
+                # 重置风险等级
+                state["risk_level"] = "低"
+
+                # 根据防御方案设置不同的恢复状态
+                if state["defense_scheme"] == "traditional":
+                    # 传统方案：停止攻击后，系统恢复到无攻击状态
+                    state["attacks_blocked"] += 1
+
+                    # 重置CPU使用率到无攻击状态 - 与visual_interface.py一致
+                    cpu_base = 30
+                    fluctuation = 2
+                    state["ids_cpu_usage"] = self.rng.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                    state["ids_cpu_usage_2"] = self.rng.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                    state["fw_cpu_usage"] = self.rng.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                    state["fw_cpu_usage_2"] = self.rng.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+
+                    # 重置检测率和阻断率
+                    state["rates_valid"] = False
+
+                    # 重置MTTR和QPS - 与visual_interface.py一致
+                    state["mttr"] = max(0.2, min(0.5, state["mttr"] + self.rng.container.uniform(-0.05, 0.05)))
+                    state["container_qps"] = self.rng.container.randint(700, 800)
+
+                    # 重置组件名称
+                    state["component_names"] = {
+                        "ids_agv": "静态IDS-AGV",
+                        "ids_scheduler": "静态IDS-RCS",
+                        "fw_agv": "静态防火墙-AGV",
+                        "fw_scheduler": "静态防火墙-RCS"
+                    }
+
+                    # 添加系统重置日志
+                    self.add_log("success", "攻击已手动停止，系统已重置")
+                else:
+                    # AI柔性重组方案：停止攻击后，系统恢复到无攻击状态
+                    state["attacks_blocked"] += 1
+
+                    # 重置CPU使用率到无攻击状态 - 与visual_interface.py一致
+                    cpu_base = 30
+                    fluctuation = 2
+                    state["ids_cpu_usage"] = self.rng.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                    state["ids_cpu_usage_2"] = self.rng.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                    state["fw_cpu_usage"] = self.rng.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                    state["fw_cpu_usage_2"] = self.rng.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+
+                    # 重置检测率和阻断率
+                    state["rates_valid"] = False
+
+                    # 重置MTTR和QPS - 与visual_interface.py一致
+                    state["mttr"] = max(0.2, min(0.5, state["mttr"] + self.rng.container.uniform(-0.05, 0.05)))
+                    state["container_qps"] = self.rng.container.randint(700, 800)
+
+                    # 重置组件名称 - AI方案
+                    state["component_names"] = {
+                        "ids_agv": "AGV-IDS",
+                        "ids_scheduler": "RCS-IDS",
+                        "fw_agv": "AGV-防火墙",
+                        "fw_scheduler": "RCS-防火墙"
+                    }
+
+                    # 添加成功恢复的日志
+                    self.add_log("success", "攻击已手动停止，系统已恢复正常")
+
+            self.publish_status_snapshot()
+            return "攻击已停止", None
+
+        # 如果当前没有攻击，则开始攻击
+        self.start_attack()
+
+        # 在线程池中执行攻击模拟，先取消本会话可能残留的上一次运行
+        self.run_manager.cancel_all(owner=self.session_id)
+        run = self.run_manager.submit(self.simulate_attack, "simulate_attack", owner=self.session_id)
+
+        self.publish_status_snapshot()
+        return "攻击已触发", run
+
+    def start_attack(self):
+        """进入攻击状态（攻击过程由simulate_attack模拟）"""
+        with self.store.update() as state:
+            # 确保攻击类型已设置
+            if not state["attack_types"]:
+                # 如果没有设置攻击类型，默认设置为同时攻击
+                state["attack_types"] = [1, 2]
+                state["attack_traffic"] = {1: 2000, 2: 1500}
+
+            # 更新组件名称 - 简化版本
+            if state["defense_scheme"] == "traditional":
+                # 传统方案：使用静态IDS和防火墙
+                state["component_names"] = {
+                    "ids_agv": "静态IDS-AGV",
+                    "ids_scheduler": "静态IDS-RCS",
+                    "fw_agv": "静态防火墙-AGV",
+                    "fw_scheduler": "静态防火墙-RCS"
+                }
+            else:
+                # AI方案：使用AGV和RCS专用的IDS和防火墙
+                state["component_names"] = {
+                    "ids_agv": "AGV-IDS",
+                    "ids_scheduler": "RCS-IDS",
+                    "fw_agv": "AGV-防火墙",
+                    "fw_scheduler": "RCS-防火墙"
+                }
+
+            # 更新IDS检测率和防火墙阻断率
+            self.update_security_rates()
+
+            # 立即更新QPS和MTTR的值，使其与检测率和阻断率的更新时机保持一致
+            if state["defense_scheme"] == "traditional":
+                # 传统方案：QPS低，MTTR高
+                state["mttr"] = self.rng.container.uniform(*TRADITIONAL_ATTACK_MTTR)
+                state["container_qps"] = self.rng.container.randint(*TRADITIONAL_ATTACK_QPS)
+            else:
+                # AI方案：QPS高，MTTR低
+                state["mttr"] = self.rng.container.uniform(*FLEXIBLE_TRIGGER_MTTR)
+                state["container_qps"] = self.rng.container.randint(*FLEXIBLE_TRIGGER_QPS)
+
+            # 标记为攻击中
+            state["is_attacking"] = True
+            # 保留之前的日志，不清空
+
+    def tick(self):
+        """推进一个tick的模拟状态，由模拟时钟调用"""
+        with self.store.update() as state:
+            # 确保在无攻击状态下也返回动态变化的数据
+            if not state["is_attacking"]:
+                # 更新正常安全数据流量
+                state["normal_traffic"] = self.rng.traffic.randint(200, 600)
+
+                # 这部分MTTR和QPS的更新已经移到下面的CPU使用率更新部分，这里可以删除
+
+                # 更新CPU使用率 - 完全按照visual_interface.py的逻辑实现
+                if state["defense_scheme"] == "traditional":
+                    # 传统方案：无攻击时资源消耗较低，攻击时资源消耗较高且稍微波动
+                    if not state["is_attacking"]:
+                        # 无攻击状态下，CPU使用率较低
+                        cpu_base = 30
+                        fluctuation = 2
+                        # 无攻击状态下的检测率和阻断率
+                        state["rates_valid"] = False
+                    else:
+                        # 攻击状态下，CPU使用率较高但会卡在一个值
+                        cpu_base = 55
+                        fluctuation = 2
+                        # 攻击状态下的检测率和阻断率 - 完全按照visual_interface.py的值
+                        state["ids_rate_1"] = self.rng.ids.uniform(0.45, 0.55) * 100
+                        state["fw_rate_1"] = self.rng.firewall.uniform(0.3, 0.5) * 100
+                        state["ids_rate_2"] = self.rng.ids.uniform(0.35, 0.65) * 100
+                        state["fw_rate_2"] = self.rng.firewall.uniform(0.2, 0.6) * 100
+                        state["rates_valid"] = True
+
+                    # 模拟传统方案的IDS和防火墙资源使用
+                    ids_cpu_1 = self.rng.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                    ids_cpu_2 = self.rng.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                    fw_cpu_1 = self.rng.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                    fw_cpu_2 = self.rng.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+
+                    # 更新状态
+                    state["ids_cpu_usage"] = ids_cpu_1
+                    state["ids_cpu_usage_2"] = ids_cpu_2
+                    state["fw_cpu_usage"] = fw_cpu_1
+                    state["fw_cpu_usage_2"] = fw_cpu_2
+
+                    # 传统方案：QPS低，MTTR高 - 使变化更加平滑
+                    if state["is_attacking"]:
+                        # 攻击状态下，MTTR应该逐渐增加到2.23-3.18范围
+                        target_mttr_min = 2.23
+                        target_mttr_max = 3.18
+                        target_qps_min = 140
+                        target_qps_max = 200
+                    else:
+                        # 无攻击状态下，MTTR应该逐渐降低到0.65-0.75范围
+                        target_mttr_min = 0.65
+                        target_mttr_max = 0.75
+                        target_qps_min = 400
+                        target_qps_max = 500
+
+                    # 当前MTTR值
+                    current_mttr = state["mttr"]
+                    current_qps = state["container_qps"]
+
+                    # 计算目标MTTR值 - 在目标范围内随机选择一个值
+                    target_mttr = self.rng.container.uniform(target_mttr_min, target_mttr_max)
+                    target_qps = self.rng.container.randint(target_qps_min, target_qps_max)
+
+                    # 平滑过渡 - 每次只移动一小步
+                    mttr_step = 0.02  # 每次最多变化0.02
+                    qps_step = 10     # 每次最多变化10
+
+                    # 计算MTTR的变化方向和大小
+                    if abs(target_mttr - current_mttr) < mttr_step:
+                        # 如果差距很小，直接设置为目标值
+                        state["mttr"] = target_mttr
+                    else:
+                        # 否则，向目标值移动一小步
+                        direction = 1 if target_mttr > current_mttr else -1
+                        state["mttr"] = current_mttr + direction * min(mttr_step, abs(target_mttr - current_mttr))
+
+                    # 计算QPS的变化方向和大小
+                    if abs(target_qps - current_qps) < qps_step:
+                        # 如果差距很小，直接设置为目标值
+                        state["container_qps"] = target_qps
+                    else:
+                        # 否则，向目标值移动一小步
+                        direction = 1 if target_qps > current_qps else -1
+                        state["container_qps"] = current_qps + direction * min(qps_step, abs(target_qps - current_qps))
+                else:
+                    # 柔性重组方案：基于资源分配动态调整
+                    # 获取当前资源分配
+                    ids_agv_alloc = state["resource_allocation"].get("IDS-AGV", 0)
+                    ids_sched_alloc = state["resource_allocation"].get("IDS-Scheduler", 0)
+                    fw_agv_alloc = state["resource_allocation"].get("Firewall-AGV", 0)
+                    fw_sched_alloc = state["resource_allocation"].get("Firewall-Scheduler", 0)
+
+                    # 计算CPU使用率 - 使用更合理的计算方式，确保不会超过100%
+                    # 基础值范围缩小，系数也减小，确保总和不会超过100%
+                    if state["is_attacking"]:
+                        # 攻击状态下，基础值较高
+                        base_ids = self.rng.resources.uniform(20, 30)
+                        base_fw = self.rng.resources.uniform(25, 35)
+                        # 系数较小，确保总和不会超过100%
+                        ids_factor = 0.3
+                        fw_factor = 0.3
+                    else:
+                        # 无攻击状态下，基础值较低
+                        base_ids = self.rng.resources.uniform(10, 20)
+                        base_fw = self.rng.resources.uniform(15, 25)
+                        # 系数较小，确保总和不会超过100%
+                        ids_factor = 0.2
+                        fw_factor = 0.2
+
+                    # 计算最终CPU使用率，并确保不超过100%
+                    ids_cpu_agv = min(95, base_ids + ids_agv_alloc * ids_factor)
+                    ids_cpu_sched = min(95, base_ids + ids_sched_alloc * ids_factor)
+                    fw_cpu_agv = min(95, base_fw + fw_agv_alloc * fw_factor)
+                    fw_cpu_sched = min(95, base_fw + fw_sched_alloc * fw_factor)
+
+                    # 更新状态
+                    state["ids_cpu_usage"] = ids_cpu_agv
+                    state["ids_cpu_usage_2"] = ids_cpu_sched
+                    state["fw_cpu_usage"] = fw_cpu_agv
+                    state["fw_cpu_usage_2"] = fw_cpu_sched
+
+                    # AI方案：QPS高，MTTR低 - 使变化更加平滑
+                    if state["is_attacking"]:
+                        # 攻击状态下，MTTR应该逐渐增加到0.7-0.9范围
+                        target_mttr_min = 0.7
+                        target_mttr_max = 0.9
+                        target_qps_min = 800
+                        target_qps_max = 1000
+                    else:
+                        # 无攻击状态下，MTTR应该逐渐降低到0.2-0.5范围
+                        target_mttr_min = 0.2
+                        target_mttr_max = 0.5
+                        target_qps_min = 700
+                        target_qps_max = 800
+
+                    # 当前MTTR值
+                    current_mttr = state["mttr"]
+                    current_qps = state["container_qps"]
+
+                    # 计算目标MTTR值 - 在目标范围内随机选择一个值
+                    target_mttr = self.rng.container.uniform(target_mttr_min, target_mttr_max)
+                    target_qps = self.rng.container.randint(target_qps_min, target_qps_max)
+
+                    # 平滑过渡 - 每次只移动一小步
+                    mttr_step = 0.02  # 每次最多变化0.02
+                    qps_step = 20     # 每次最多变化20
+
+                    # 计算MTTR的变化方向和大小
+                    if abs(target_mttr - current_mttr) < mttr_step:
+                        # 如果差距很小，直接设置为目标值
+                        state["mttr"] = target_mttr
+                    else:
+                        # 否则，向目标值移动一小步
+                        direction = 1 if target_mttr > current_mttr else -1
+                        state["mttr"] = current_mttr + direction * min(mttr_step, abs(target_mttr - current_mttr))
+
+                    # 计算QPS的变化方向和大小
+                    if abs(target_qps - current_qps) < qps_step:
+                        # 如果差距很小，直接设置为目标值
+                        state["container_qps"] = target_qps
+                    else:
+                        # 否则，向目标值移动一小步
+                        direction = 1 if target_qps > current_qps else -1
+                        state["container_qps"] = current_qps + direction * min(qps_step, abs(target_qps - current_qps))
+
+                # 更新资源分配情况 - 只在必要时小幅度调整，避免大幅波动
+                if state["defense_scheme"] == "flexible" and state["is_attacking"]:
+                    # 柔性重组方案在攻击时，资源分配较高
+                    # 获取当前资源分配
+                    current_ids_agv = state["resource_allocation"].get("IDS-AGV", 0)
+                    current_ids_sched = state["resource_allocation"].get("IDS-Scheduler", 0)
+                    current_fw_agv = state["resource_allocation"].get("Firewall-AGV", 0)
+                    current_fw_sched = state["resource_allocation"].get("Firewall-Scheduler", 0)
+
+                    # 计算目标资源分配 - 攻击状态下，资源分配较高但不超过80%
+                    target_ids_agv = self.rng.resources.uniform(55, 75)
+                    target_ids_sched = self.rng.resources.uniform(55, 75)
+                    target_fw_agv = self.rng.resources.uniform(60, 80)
+                    target_fw_sched = self.rng.resources.uniform(60, 80)
+
+                    # 平滑过渡 - 每次只小幅调整
+                    adjust_factor = 0.05  # 每次最多调整5%
+
+                    # 更新资源分配
+                    state["resource_allocation"] = {
+                        "IDS-AGV": current_ids_agv * (1 - adjust_factor) + target_ids_agv * adjust_factor,
+                        "IDS-Scheduler": current_ids_sched * (1 - adjust_factor) + target_ids_sched * adjust_factor,
+                        "Firewall-AGV": current_fw_agv * (1 - adjust_factor) + target_fw_agv * adjust_factor,
+                        "Firewall-Scheduler": current_fw_sched * (1 - adjust_factor) + target_fw_sched * adjust_factor,
+                    }
+                else:
+                    # 其他情况下，资源分配较低
+                    # 获取当前资源分配
+                    current_ids_agv = state["resource_allocation"].get("IDS-AGV", 0)
+                    current_ids_sched = state["resource_allocation"].get("IDS-Scheduler", 0)
+                    current_fw_agv = state["resource_allocation"].get("Firewall-AGV", 0)
+                    current_fw_sched = state["resource_allocation"].get("Firewall-Scheduler", 0)
+
+                    # 计算目标资源分配 - 无攻击状态下，资源分配较低
+                    target_ids_agv = self.rng.resources.uniform(15, 25)
+                    target_ids_sched = self.rng.resources.uniform(15, 25)
+                    target_fw_agv = self.rng.resources.uniform(20, 30)
+                    target_fw_sched = self.rng.resources.uniform(20, 30)
+
+                    # 平滑过渡 - 每次只小幅调整
+                    adjust_factor = 0.05  # 每次最多调整5%
+
+                    # 更新资源分配
+                    state["resource_allocation"] = {
+                        "IDS-AGV": current_ids_agv * (1 - adjust_factor) + target_ids_agv * adjust_factor,
+                        "IDS-Scheduler": current_ids_sched * (1 - adjust_factor) + target_ids_sched * adjust_factor,
+                        "Firewall-AGV": current_fw_agv * (1 - adjust_factor) + target_fw_agv * adjust_factor,
+                        "Firewall-Scheduler": current_fw_sched * (1 - adjust_factor) + target_fw_sched * adjust_factor,
+                    }
+
+                # 随机添加一些系统日志
+                if self.rng.logs.random() < 0.05:  # 5%的概率添加日志
+                    log_types = ["info", "info", "info", "warning"]  # 大多数是info，偶尔有warning
+                    log_type = self.rng.logs.choice(log_types)
+
+                    log_contents = [
+                        "系统正常运行中，无异常",
+                        "网络流量正常，无异常",
+                        "安全检测正常，无异常",
+                        "执行例行安全扫描",
+                        "更新安全规则库",
+                        "检测到少量异常流量，在正常范围内",
+                        "执行系统资源优化",
+                        "安全组件健康检查通过"
+                    ]
+
+                    if log_type == "warning":
+                        log_contents = [
+                            "检测到轻微异常流量，已自动处理",
+                            "系统负载略高，已自动调整资源分配",
+                            "检测到可疑IP访问尝试，已自动阻断",
+                            "安全规则更新略有延迟，正在重试"
+                        ]
+
+                    self.add_log(log_type, self.rng.logs.choice(log_contents))
+
+            # 收集性能数据
+            if state["is_attacking"]:
+                self.collect_performance_data(state)
+
+    def performance_summary(self):
+        """各方案的性能指标平均值和标准差（由环形缓冲区增量维护，O(1)）"""
+        return self.performance_stats.summary()
+
+    def simulate_attack(self, token):
+        """模拟攻击过程"""
+        with self.store.update() as state:
+            # 保留之前的日志，不清空
+            # 添加初始日志
+            self.add_log("warning", "网络探针检测到疑似网络扫描活动，可能是攻击准备阶段")
+            state["risk_level"] = "中"
+            state["attacks_detected"] += 1
+
+            # 确保攻击类型已设置
+            if not state["attack_types"]:
+                # 如果没有设置攻击类型，默认设置为同时攻击
+                state["attack_types"] = [1, 2]
+                state["attack_traffic"] = {1: 2000, 2: 1500}
+
+            # 更新IDS检测率和防火墙阻断率
+            self.update_security_rates()
+
+            # 根据防御方案添加不同的日志
+            if state["defense_scheme"] == "traditional":
+                self.add_log("info", "传统防御方案启动，静态IDS和防火墙开始工作")
+            else:
+                # 不在这里添加日志，因为日志会在攻击阶段中添加，避免重复
+                # 设置AI方案的组件名称 - 简化版本
+                state["component_names"] = {
+                    "ids_agv": "AGV-IDS",
+                    "ids_scheduler": "RCS-IDS",
+                    "fw_agv": "AGV-防火墙",
+                    "fw_scheduler": "RCS-防火墙"
+                }
+
+            # 模拟攻击阶段
+            phases = self.generate_attack_phases()
+
+            # 获取当前状态，用于平滑过渡
+            current_ids_security = state["ids_security"]
+            current_fw_security = state["fw_security"]
+            current_ids_cpu = state["ids_cpu_usage"]
+            current_ids_cpu2 = state["ids_cpu_usage_2"]
+            current_fw_cpu = state["fw_cpu_usage"]
+            current_fw_cpu2 = state["fw_cpu_usage_2"]
+
+        for i, phase in enumerate(phases):
+            # 如果用户停止了攻击，则退出循环
+            if token.cancelled or not self.store.get("is_attacking"):
+                break
+
+            # 计算目标值
+            target_ids_security = phase["idsSecurity"]
+            target_fw_security = phase["fwSecurity"]
+            target_ids_cpu = phase["idsCpu"]
+            target_ids_cpu2 = phase["idsCpu2"]
+            target_fw_cpu = phase["fwCpu"]
+            target_fw_cpu2 = phase["fwCpu2"]
+
+            # 平滑过渡到目标值 - 分3个小步骤
+            steps = 3
+            for step in range(steps):
+                # 如果用户停止了攻击，则退出循环
+                if token.cancelled or not self.store.get("is_attacking"):
+                    break
+
+                with self.store.update() as state:
+                    # 计算当前步骤的值 - 线性插值
+                    progress = (step + 1) / steps
+                    state["ids_security"] = int(current_ids_security + (target_ids_security - current_ids_security) * progress)
+                    state["fw_security"] = int(current_fw_security + (target_fw_security - current_fw_security) * progress)
+                    state["ids_cpu_usage"] = current_ids_cpu + (target_ids_cpu - current_ids_cpu) * progress
+                    state["ids_cpu_usage_2"] = current_ids_cpu2 + (target_ids_cpu2 - current_ids_cpu2) * progress
+                    state["fw_cpu_usage"] = current_fw_cpu + (target_fw_cpu - current_fw_cpu) * progress
+                    state["fw_cpu_usage_2"] = current_fw_cpu2 + (target_fw_cpu2 - current_fw_cpu2) * progress
+
+                    # 添加一些随机波动，使曲线看起来更自然
+                    state["ids_cpu_usage"] += self.rng.ids.uniform(-1, 1)
+                    state["ids_cpu_usage_2"] += self.rng.ids.uniform(-1, 1)
+                    state["fw_cpu_usage"] += self.rng.firewall.uniform(-1, 1)
+                    state["fw_cpu_usage_2"] += self.rng.firewall.uniform(-1, 1)
+
+                    # 确保值在合理范围内
+                    state["ids_cpu_usage"] = max(0, min(100, state["ids_cpu_usage"]))
+                    state["ids_cpu_usage_2"] = max(0, min(100, state["ids_cpu_usage_2"]))
+                    state["fw_cpu_usage"] = max(0, min(100, state["fw_cpu_usage"]))
+                    state["fw_cpu_usage_2"] = max(0, min(100, state["fw_cpu_usage_2"]))
+
+                # 暂停一小段时间 - 增加每个步骤的延时
+                token.sleep(phase["seconds"] / steps, self.time_source)
+
+            # 更新当前状态，用于下一个阶段的平滑过渡
+            current_ids_security = target_ids_security
+            current_fw_security = target_fw_security
+            current_ids_cpu = target_ids_cpu
+            current_ids_cpu2 = target_ids_cpu2
+            current_fw_cpu = target_fw_cpu
+            current_fw_cpu2 = target_fw_cpu2
+
+            with self.store.update() as state:
+                # 更新其他状态
+                state["agv_active"] = phase["agvStatus"]
+                state["ids_active"] = phase["idsStatus"]
+                state["risk_level"] = phase["risk"]
+
+                # 在每个阶段更新QPS和MTTR，使其与检测率和阻断率的更新时机保持一致
+                if state["defense_scheme"] == "traditional":
+                    # 传统方案：QPS低，MTTR高
+                    state["mttr"] = max(TRADITIONAL_ATTACK_MTTR[0], min(TRADITIONAL_ATTACK_MTTR[1], state["mttr"] + self.rng.container.uniform(-TRADITIONAL_MTTR_DRIFT, TRADITIONAL_MTTR_DRIFT)))
+                    state["container_qps"] = self.rng.container.randint(*TRADITIONAL_ATTACK_QPS)
+                else:
+                    # AI方案：QPS高，MTTR低，随阶段推进逐步改善
+                    ids_rate, fw_rate, mttr_range, qps_range = flexible_phase_profile(i)
+                    state["mttr"] = self.rng.container.uniform(*mttr_range)
+                    state["container_qps"] = self.rng.container.randint(*qps_range)
+
+                # 在AI柔性重组方案中，不再添加额外的日志，因为日志已经在攻击阶段中添加
+
+                # 根据当前阶段更新IDS检测率和防火墙阻断率
+                if state["defense_scheme"] == "traditional":
+                    # 传统方案随着攻击进行，检测率和阻断率逐渐降低
+                    progress_factor = 1.0 - (i / len(phases))  # 从1.0降到接近0
+                    for key, rate_range in TRADITIONAL_ATTACK_RATES.items():
+                        state[key] = max(5, self.rng.for_key(key).uniform(*rate_range) * 100 * progress_factor)
+                    state["rates_valid"] = True
+                else:
+                    # AI柔性重组方案：检测率和阻断率始终保持较高水平，按阶段逐步提升
+                    state["ids_rate_1"] = self.rng.ids.uniform(*ids_rate) * 100
+                    state["fw_rate_1"] = self.rng.firewall.uniform(*fw_rate) * 100
+                    state["ids_rate_2"] = self.rng.ids.uniform(*ids_rate) * 100
+                    state["fw_rate_2"] = self.rng.firewall.uniform(*fw_rate) * 100
+                    state["rates_valid"] = True
+
+                # 添加日志
+                self.add_log(phase["logType"], phase["log"])
+
+            # 在阶段之间添加延时，使攻击过程更加可观察
+            token.sleep(1.0, self.time_source)  # 每个阶段之间增加1秒的延时
+
+        # 如果攻击已被停止，不再设置最终状态，以免覆盖停止后的重置结果
+        if token.cancelled or not self.store.get("is_attacking"):
+            return
+
+        with self.store.update() as state:
+            # 根据防御方案设置最终状态
+            if state["defense_scheme"] == "traditional":
+                # 传统方案：攻击结束后，系统仍处于被攻击状态，需要人工干预
+                # 不改变is_attacking状态，保持为True
+                # 不增加attacks_blocked计数
+                # 保持attack_types不变，确保数据继续更新
+
+                # 检测率和阻断率保持较低 - 使用visual_interface.py中的数值
+                for key, rate_range in TRADITIONAL_ATTACK_RATES.items():
+                    state[key] = self.rng.for_key(key).uniform(*rate_range) * 100
+                state["rates_valid"] = True
+
+                # CPU使用率保持在较高水平
+                cpu_base = 55
+                fluctuation = 2
+                state["ids_cpu_usage"] = self.rng.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                state["ids_cpu_usage_2"] = self.rng.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                state["fw_cpu_usage"] = self.rng.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                state["fw_cpu_usage_2"] = self.rng.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+
+                # MTTR和QPS保持在攻击状态的水平
+                state["mttr"] = max(TRADITIONAL_ATTACK_MTTR[0], min(TRADITIONAL_ATTACK_MTTR[1], state["mttr"] + self.rng.container.uniform(-TRADITIONAL_MTTR_DRIFT, TRADITIONAL_MTTR_DRIFT)))
+                state["container_qps"] = self.rng.container.randint(*TRADITIONAL_ATTACK_QPS)
+
+                # 添加需要人工干预的日志
+                self.add_log("error", "传统防御系统无法自动恢复，需要人工干预重启系统")
+
+                # 在当前工作线程中继续模拟传统方案下的持续攻击状态
+                follow_up = self.simulate_traditional_attack_state
+            else:
+                # AI柔性重组方案：攻击结束后，系统进入警戒期
+                # 不再自动设置is_attacking为False，而是保持攻击状态，直到用户点击停止
+                # 只有在用户点击停止按钮时，才会执行trigger_attack中的停止逻辑
+
+                # 所有阶段执行完毕后，进入持续防御状态
+                state["attacks_blocked"] += 1
+
+                # 保持较高的安全能力指标，表示系统已经成功防御
+                state["ids_security"] = 100
+                state["fw_security"] = 99
+
+                # AGV和IDS状态保持正常
+                state["agv_active"] = True
+                state["ids_active"] = True
+
+                # 风险等级保持低
+                state["risk_level"] = "低"
+
+                # 设置CPU使用率到高效防御状态 - 高于无攻击状态，表示系统处于高效防御状态
+                cpu_base = 60
+                fluctuation = 5
+                state["ids_cpu_usage"] = self.rng.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                state["ids_cpu_usage_2"] = self.rng.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                state["fw_cpu_usage"] = self.rng.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                state["fw_cpu_usage_2"] = self.rng.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+
+                # 设置检测率和阻断率为高值，表示系统处于高效防御状态
+                state["ids_rate_1"] = self.rng.ids.uniform(*FLEXIBLE_DEFENSE_IDS_RATE) * 100
+                state["ids_rate_2"] = self.rng.ids.uniform(*FLEXIBLE_DEFENSE_IDS_RATE) * 100
+                state["fw_rate_1"] = self.rng.firewall.uniform(*FLEXIBLE_DEFENSE_FW_RATE) * 100
+                state["fw_rate_2"] = self.rng.firewall.uniform(*FLEXIBLE_DEFENSE_FW_RATE) * 100
+                state["rates_valid"] = True
+
+                # 设置MTTR和QPS - 表示系统高效运行
+                state["mttr"] = max(FLEXIBLE_DEFENSE_MTTR[0], min(FLEXIBLE_DEFENSE_MTTR[1], state["mttr"] + self.rng.container.uniform(-FLEXIBLE_MTTR_DRIFT, FLEXIBLE_MTTR_DRIFT)))
+                state["container_qps"] = self.rng.container.randint(*FLEXIBLE_DEFENSE_QPS)
+
+                # 保持重组后的组件名称，表示系统仍在使用优化后的组件
+                # 不重置组件名称，保持当前的动态组件
+
+                # 添加持续防御的日志
+                self.add_log("success", "AI安全功能柔性重组完成，系统进入持续防御状态，实时监控网络流量")
+
+                # 在当前工作线程中继续模拟持续防御状态下的资源使用变化
+                follow_up = self.simulate_continuous_defense
+
+        follow_up(token)
+
+    def simulate_traditional_attack_state(self, token):
+        """模拟传统方案下的持续攻击状态"""
+        # 传统方案下的CPU使用率基准值
+        cpu_base = 55
+        fluctuation = 2
+
+        # 持续更新数据，直到攻击停止
+        while not token.cancelled and self.store.get("is_attacking"):
+            with self.store.update() as state:
+                # 更新CPU使用率 - 添加小幅波动
+                state["ids_cpu_usage"] = self.rng.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                state["ids_cpu_usage_2"] = self.rng.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                state["fw_cpu_usage"] = self.rng.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+                state["fw_cpu_usage_2"] = self.rng.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+
+                # 更新检测率和阻断率 - 保持在较低水平
+                for key, rate_range in TRADITIONAL_ATTACK_RATES.items():
+                    state[key] = self.rng.for_key(key).uniform(*rate_range) * 100
+                state["rates_valid"] = True
+
+                # 更新MTTR和QPS - 保持在攻击状态的水平
+                state["mttr"] = max(TRADITIONAL_ATTACK_MTTR[0], min(TRADITIONAL_ATTACK_MTTR[1], state["mttr"] + self.rng.container.uniform(-TRADITIONAL_MTTR_DRIFT, TRADITIONAL_MTTR_DRIFT)))
+                state["container_qps"] = self.rng.container.randint(*TRADITIONAL_ATTACK_QPS)
+
+                # 偶尔添加一些攻击持续的日志
+                if self.rng.logs.random() < 0.1:  # 10%的概率添加日志
+                    log_contents = [
+                        "攻击持续中，传统防御系统无法有效应对",
+                        "系统性能持续下降，需要人工干预",
+                        "检测到新的攻击尝试，防御能力不足",
+                        "防火墙规则无法有效阻断当前攻击",
+                        "IDS检测到异常流量，但无法自动处理"
+                    ]
+                    self.add_log("error", self.rng.logs.choice(log_contents))
+
+            # 暂停一小段时间
+            token.sleep(3, self.time_source)
+
+    def simulate_continuous_defense(self, token):
+        """模拟持续防御状态下的资源使用变化"""
+        # 初始资源使用率 - 高效防御状态
+        cpu_base_high = 60
+        fluctuation_high = 5
+
+        # 最终资源使用率 - 常态监控状态
+        cpu_base_low = 35
+        fluctuation_low = 3
+
+        # 警戒期持续时间（秒）
+        alert_period = 30
+
+        # 过渡期持续时间（秒）
+        transition_period = 60
+
+        # 记录开始时间
+        start_time = self.time_source.now()
+
+        # 添加警戒期日志
+        self.add_log("info", "系统进入警戒期，保持高级别防御状态")
+
+        # 警戒期 - 保持高资源使用率
+        while not token.cancelled and self.store.get("is_attacking") and self.time_source.now() - start_time < alert_period:
+            with self.store.update() as state:
+                # 高资源使用率
+                state["ids_cpu_usage"] = self.rng.ids.uniform(cpu_base_high - fluctuation_high, cpu_base_high + fluctuation_high)
+                state["ids_cpu_usage_2"] = self.rng.ids.uniform(cpu_base_high - fluctuation_high, cpu_base_high + fluctuation_high)
+                state["fw_cpu_usage"] = self.rng.firewall.uniform(cpu_base_high - fluctuation_high, cpu_base_high + fluctuation_high)
+                state["fw_cpu_usage_2"] = self.rng.firewall.uniform(cpu_base_high - fluctuation_high, cpu_base_high + fluctuation_high)
+
+                # 高检测率和阻断率
+                state["ids_rate_1"] = self.rng.ids.uniform(*FLEXIBLE_DEFENSE_IDS_RATE) * 100
+                state["ids_rate_2"] = self.rng.ids.uniform(*FLEXIBLE_DEFENSE_IDS_RATE) * 100
+                state["fw_rate_1"] = self.rng.firewall.uniform(*FLEXIBLE_DEFENSE_FW_RATE) * 100
+                state["fw_rate_2"] = self.rng.firewall.uniform(*FLEXIBLE_DEFENSE_FW_RATE) * 100
+                state["rates_valid"] = True
+
+                # 高QPS
+                state["container_qps"] = self.rng.container.randint(*FLEXIBLE_DEFENSE_QPS)
+
+            # 暂停一小段时间
+            token.sleep(3, self.time_source)
+
+        # 如果用户停止了攻击，则退出
+        if token.cancelled or not self.store.get("is_attacking"):
+            return
+
+        # 添加过渡期日志
+        self.add_log("info", "警戒期结束，系统进入资源优化阶段，逐步降低资源使用率")
+
+        # 过渡期 - 资源使用率逐渐降低
+        transition_start = self.time_source.now()
+        while not token.cancelled and self.store.get("is_attacking") and self.time_source.now() - transition_start < transition_period:
+            with self.store.update() as state:
+                # 计算过渡进度 (0.0 到 1.0)
+                progress = min(1.0, (self.time_source.now() - transition_start) / transition_period)
+
+                # 线性插值计算当前资源使用率
+                current_cpu_base = cpu_base_high - progress * (cpu_base_high - cpu_base_low)
+                current_fluctuation = fluctuation_high - progress * (fluctuation_high - fluctuation_low)
+
+                # 更新资源使用率
+                state["ids_cpu_usage"] = self.rng.ids.uniform(current_cpu_base - current_fluctuation, current_cpu_base + current_fluctuation)
+                state["ids_cpu_usage_2"] = self.rng.ids.uniform(current_cpu_base - current_fluctuation, current_cpu_base + current_fluctuation)
+                state["fw_cpu_usage"] = self.rng.firewall.uniform(current_cpu_base - current_fluctuation, current_cpu_base + current_fluctuation)
+                state["fw_cpu_usage_2"] = self.rng.firewall.uniform(current_cpu_base - current_fluctuation, current_cpu_base + current_fluctuation)
+
+                # 检测率和阻断率保持较高，但略有下降
+                detection_base = 0.96 - progress * 0.06  # 从0.96降到0.90
+                blocking_base = 0.95 - progress * 0.05   # 从0.95降到0.90
+
+                state["ids_rate_1"] = self.rng.ids.uniform(detection_base, detection_base + 0.03) * 100
+                state["ids_rate_2"] = self.rng.ids.uniform(detection_base, detection_base + 0.03) * 100
+                state["fw_rate_1"] = self.rng.firewall.uniform(blocking_base, blocking_base + 0.03) * 100
+                state["fw_rate_2"] = self.rng.firewall.uniform(blocking_base, blocking_base + 0.03) * 100
+                state["rates_valid"] = True
+
+                # QPS逐渐降低
+                qps_high = 900
+                qps_low = 800
+                current_qps = int(qps_high - progress * (qps_high - qps_low))
+                state["container_qps"] = self.rng.container.randint(current_qps - 20, current_qps + 20)
+
+            # 暂停一小段时间
+            token.sleep(3, self.time_source)
+
+        # 如果用户停止了攻击，则退出
+        if token.cancelled or not self.store.get("is_attacking"):
+            return
+
+        # 添加常态监控日志
+        self.add_log("info", "系统进入常态监控状态，保持优化后的资源配置")
+
+        # 常态监控状态 - 低资源使用率但保持高检测能力
+        while not token.cancelled and self.store.get("is_attacking"):
+            with self.store.update() as state:
+                # 低资源使用率
+                state["ids_cpu_usage"] = self.rng.ids.uniform(cpu_base_low - fluctuation_low, cpu_base_low + fluctuation_low)
+                state["ids_cpu_usage_2"] = self.rng.ids.uniform(cpu_base_low - fluctuation_low, cpu_base_low + fluctuation_low)
+                state["fw_cpu_usage"] = self.rng.firewall.uniform(cpu_base_low - fluctuation_low, cpu_base_low + fluctuation_low)
+                state["fw_cpu_usage_2"] = self.rng.firewall.uniform(cpu_base_low - fluctuation_low, cpu_base_low + fluctuation_low)
+
+                # 检测率和阻断率保持较高
+                state["ids_rate_1"] = self.rng.ids.uniform(0.90, 0.93) * 100
+                state["ids_rate_2"] = self.rng.ids.uniform(0.90, 0.93) * 100
+                state["fw_rate_1"] = self.rng.firewall.uniform(0.90, 0.93) * 100
+                state["fw_rate_2"] = self.rng.firewall.uniform(0.90, 0.93) * 100
+                state["rates_valid"] = True
+
+                # 正常QPS
+                state["container_qps"] = self.rng.container.randint(780, 820)
+
+                # 偶尔添加一些监控日志
+                if self.rng.logs.random() < 0.1:  # 10%的概率添加日志
+                    log_contents = [
+                        "系统持续监控中，未发现异常",
+                        "安全组件运行正常，资源使用率稳定",
+                        "网络流量分析正常，未检测到攻击特征",
+                        "安全规则库自动更新完成",
+                        "AI模型持续学习中，防御能力不断提升"
+                    ]
+                    self.add_log("info", self.rng.logs.choice(log_contents))
+
+            # 暂停一小段时间
+            token.sleep(5, self.time_source)
+
+    def update_security_rates(self, attack_id=None):
+        """更新IDS检测率和防火墙阻断率"""
+        with self.store.update() as state:
+            defense_scheme = state["defense_scheme"]
+
+            # 如果attack_id不为None，更新attack_types
+            if attack_id is not None:
+                if attack_id == 0:
+                    state["attack_types"] = []
+                elif attack_id == 1:
+                    state["attack_types"] = [1]
+                elif attack_id == 2:
+                    state["attack_types"] = [2]
+                elif attack_id == 3:
+                    state["attack_types"] = [1, 2]
+
+            attack_types = state["attack_types"]
+
+            # 更新组件名称 - 简化版本
+            if defense_scheme == "traditional":
+                # 传统方案使用静态组件
+                state["component_names"] = {
+                    "ids_agv": "静态IDS-AGV",
+                    "ids_scheduler": "静态IDS-RCS",
+                    "fw_agv": "静态防火墙-AGV",
+                    "fw_scheduler": "静态防火墙-RCS"
+                }
+            else:
+                # AI柔性重组方案使用动态组件
+                state["component_names"] = {
+                    "ids_agv": "AGV-IDS",
+                    "ids_scheduler": "RCS-IDS",
+                    "fw_agv": "AGV-防火墙",
+                    "fw_scheduler": "RCS-防火墙"
+                }
+
+            # 根据防御方案和攻击类型设置检测率和阻断率
+            if defense_scheme == "traditional":
+                # 传统方案
+                if not attack_types:
+                    # 无攻击
+                    state["rates_valid"] = False
+                else:
+                    # 有攻击
+                    for key, rate_range in TRADITIONAL_ATTACK_RATES.items():
+                        state[key] = self.rng.for_key(key).uniform(*rate_range) * 100
+                    state["rates_valid"] = True
+            else:
+                # AI柔性重组方案
+                if not attack_types:
+                    # 无攻击
+                    state["rates_valid"] = False
+                else:
+                    # 有攻击
+                    state["ids_rate_1"] = self.rng.ids.uniform(*FLEXIBLE_TRIGGER_IDS_RATE) * 100
+                    state["fw_rate_1"] = self.rng.firewall.uniform(*FLEXIBLE_TRIGGER_FW_RATE) * 100
+                    state["ids_rate_2"] = self.rng.ids.uniform(*FLEXIBLE_TRIGGER_IDS_RATE) * 100
+                    state["fw_rate_2"] = self.rng.firewall.uniform(*FLEXIBLE_TRIGGER_FW_RATE) * 100
+                    state["rates_valid"] = True
+
+            # 更新安全能力指标 - 只在非攻击状态下更新
+            if not attack_types and not state["is_attacking"]:
+                state["ids_security"] = 0
+                state["fw_security"] = 85
+            elif not state["is_attacking"]:
+                # 只在非攻击状态下，根据检测率和阻断率的平均值更新安全能力指标
+                state["ids_security"] = int((state["ids_rate_1"] + state["ids_rate_2"]) / 2)
+                state["fw_security"] = int((state["fw_rate_1"] + state["fw_rate_2"]) / 2)
+            # 在攻击状态下，安全能力指标由simulate_attack函数中的攻击阶段设置
+
+    def add_log(self, log_type, content):
+        """添加日志：写入事件日志和检索索引，并在状态中提交新的日志游标"""
+        with self.store.update() as state:
+            event = self.event_log.append(log_type, content, self.time_source.now())
+            self.log_search.add(event)
+            state["log_seq"] = event["seq"]
+
+    def collect_performance_data(self, state):
+        """收集性能指标数据"""
+        if not state["is_attacking"]:
+            return  # 只在攻击状态下收集数据
+
+        scheme = state["defense_scheme"]
+
+        # AGV和调度系统的平均检测率和平均拦截率
+        if state["rates_valid"]:
+            self.performance_stats.append(scheme, "ids_detection_rates", (state["ids_rate_1"] + state["ids_rate_2"]) / 2)
+            self.performance_stats.append(scheme, "fw_block_rates", (state["fw_rate_1"] + state["fw_rate_2"]) / 2)
+
+        # 收集QPS和MTTR，缓冲区已满时自动淘汰最早的样本
+        self.performance_stats.append(scheme, "qps_values", state["container_qps"])
+        self.performance_stats.append(scheme, "mttr_values", state["mttr"])
+
+    def generate_attack_phases(self):
+        """生成攻击阶段"""
+        # 根据防御方案生成不同的攻击阶段
+        if self.store.get("defense_scheme") == "traditional":
+            return generate_traditional_attack_phases(self.rng)
+        else:
+            return generate_flexible_attack_phases(self.rng)
+
+
+def run_scenario(defense_scheme, attack_id, agv_traffic=2000, scheduler_traffic=1500,
+                 duration=120.0, tick_interval=3.0, seed=None, details=False):
+    """在虚拟时间下完整运行一个攻击场景（不需要Web服务和线程池），返回本场景的性能指标
+
+    每个tick采样一次状态，指标为采样的平均值（没有有效样本时为None）；attack_id为0时只运行常态模拟。
+    相同的参数和seed得到完全相同的结果；seed为None时随机生成，实际使用的种子在结果的seed字段中返回。
+    details为True时结果还包含每个tick的状态时间线（timeline）和场景中产生的日志（logs），时间为相对场景开始的秒数。
+    """
+    time_source = VirtualTimeSource()
+    started = time_source.now()
+    simulator = Simulator("scenario", run_manager=None, max_log_entries=SCENARIO_MAX_LOGS, time_source=time_source, seed=seed)
+    initial_log_seq = simulator.event_log.last_seq
+    simulator.set_defense_scheme(defense_scheme)
+    simulator.set_attack(attack_id, agv_traffic=agv_traffic, scheduler_traffic=scheduler_traffic)
+
+    samples = {key: [] for key in METRIC_KEYS}
+    timeline = []
+
+    def tick():
+        simulator.tick()
+        state = simulator.store.snapshot().data
+        ids_rate = fw_rate = None
+        if state["rates_valid"]:
+            ids_rate = (state["ids_rate_1"] + state["ids_rate_2"]) / 2
+            fw_rate = (state["fw_rate_1"] + state["fw_rate_2"]) / 2
+            samples["ids_detection_rates"].append(ids_rate)
+            samples["fw_block_rates"].append(fw_rate)
+        samples["qps_values"].append(state["container_qps"])
+        samples["mttr_values"].append(state["mttr"])
+        if details:
+            timeline.append({
+                "t": time_source.now() - started,
+                "is_attacking": state["is_attacking"],
+                "ids_detection_rate": ids_rate,
+                "fw_block_rate": fw_rate,
+                "qps": state["container_qps"],
+                "mttr": state["mttr"],
+                "ids_security": state["ids_security"],
+                "fw_security": state["fw_security"],
+                "risk_level": state["risk_level"],
+            })
+
+    time_source.schedule(tick, tick_interval, interval=tick_interval)
+
+    if attack_id:
+        # 攻击过程在当前线程中运行，到达场景时长时取消
+        simulator.start_attack()
+        token = CancelToken()
+        time_source.schedule(token.cancel, duration)
+        simulator.simulate_attack(token)
+    else:
+        time_source.advance(duration)
+
+    state = simulator.store.snapshot().data
+    result = {
+        "defense_scheme": defense_scheme,
+        "attack_id": attack_id,
+        "agv_traffic": agv_traffic,
+        "scheduler_traffic": scheduler_traffic,
+        "duration": duration,
+        "seed": simulator.seed,
+        "ticks": len(samples["qps_values"]),
+    }
+    for key, values in samples.items():
+        result[METRIC_KEYS[key]] = sum(values) / len(values) if values else None
+    result.update({
+        "ids_security": state["ids_security"],
+        "fw_security": state["fw_security"],
+        "agv_active": state["agv_active"],
+        "risk_level": state["risk_level"],
+        "attacks_detected": state["attacks_detected"],
+    })
+    if details:
+        result["timeline"] = timeline
+        # 不含模拟器创建时的初始日志
+        result["logs"] = [
+            {"t": event["time"] - started, "type": event["type"], "content": event["content"]}
+            for event in simulator.event_log.recent() if event["seq"] > initial_log_seq
+        ]
+    return result
+
+
+def generate_traditional_attack_phases(streams=None):
+    """生成传统防御方案的攻击阶段，streams为模拟器的随机数流"""
+    streams = RandomStreams() if streams is None else streams
+    # 使用visual_interface.py中的数值
+    cpu_base = 55
+    fluctuation = 2
+
+    return [
+        # 阶段1：攻击开始，防火墙开始应对但能力下降
+        {
+            "idsSecurity": 50,
+            "fwSecurity": 70,
+            "idsCpu": streams.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "idsCpu2": streams.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "fwCpu": streams.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "fwCpu2": streams.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "log": "检测到大量异常TCP连接请求，传统防火墙开始过滤",
+            "logType": "warning",
+            "agvStatus": True,
+            "idsStatus": True,
+            "seconds": 1.5,
+            "risk": "中"
+        },
+        # 阶段2：防火墙继续抵抗，但能力持续下降
+        {
+            "idsSecurity": 50,
+            "fwSecurity": 55,
+            "idsCpu": streams.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "idsCpu2": streams.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "fwCpu": streams.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "fwCpu2": streams.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "log": "防火墙检测到未授权访问尝试，可能针对AGV控制系统",
+            "logType": "warning",
+            "agvStatus": True,
+            "idsStatus": True,
+            "seconds": 1.5,
+            "risk": "中"
+        },
+        # 阶段3：防火墙能力急剧下降
+        {
+            "idsSecurity": 50,
+            "fwSecurity": 40,
+            "idsCpu": streams.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "idsCpu2": streams.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "fwCpu": streams.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "fwCpu2": streams.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "log": "防火墙资源消耗过高，检测能力下降，发现恶意软件特征",
+            "logType": "warning",
+            "agvStatus": True,
+            "idsStatus": True,
+            "seconds": 1.5,
+            "risk": "高"
+        },
+        # 阶段4：防火墙即将失效，AGV开始受到影响
+        {
+            "idsSecurity": 50,
+            "fwSecurity": 25,
+            "idsCpu": streams.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "idsCpu2": streams.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "fwCpu": streams.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "fwCpu2": streams.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "log": "防火墙即将过载，检测到针对AGV的异常指令",
+            "logType": "error",
+            "agvStatus": True,
+            "idsStatus": True,
+            "seconds": 1.5,
+            "risk": "高"
+        },
+        # 阶段5：防火墙能力低于20%，AGV瘫痪
+        {
+            "idsSecurity": 50,
+            "fwSecurity": 15,
+            "idsCpu": streams.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "idsCpu2": streams.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "fwCpu": streams.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "fwCpu2": streams.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "log": "防火墙能力严重不足，AGV接收到异常停止指令，已紧急停车",
+            "logType": "error",
+            "agvStatus": False,
+            "idsStatus": True,
+            "seconds": 1.5,
+            "risk": "高"
+        },
+        # 阶段6：攻击持续，系统无法恢复
+        {
+            "idsSecurity": 50,
+            "fwSecurity": 10,
+            "idsCpu": streams.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "idsCpu2": streams.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "fwCpu": streams.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "fwCpu2": streams.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "log": "攻击持续中，传统防御系统无法自动恢复，需要人工干预",
+            "logType": "error",
+            "agvStatus": False,
+            "idsStatus": True,
+            "seconds": 1.5,
+            "risk": "高"
+        }
+    ]
+
+
+def generate_flexible_attack_phases(streams=None):
+    """生成AI柔性重组方案的攻击阶段，streams为模拟器的随机数流"""
+    streams = RandomStreams() if streams is None else streams
+    # 使用更合理的CPU使用率设置
+    # 攻击初期CPU使用率较高，表示系统正在积极应对攻击
+    # 攻击后期CPU使用率逐渐降低，表示系统已经有效控制了攻击
+    cpu_base = 55
+    fluctuation = 2
+
+    return [
+        # 阶段1：流量探针检测到异常网络活动
+        {
+            "idsSecurity": 50,
+            "fwSecurity": 70,
+            "idsCpu": 75,  # 攻击初期，IDS CPU使用率较高，表示系统正在积极分析流量
+            "idsCpu2": 75,
+            "fwCpu": 70,  # 攻击初期，防火墙CPU使用率较高，表示系统正在积极过滤流量
+            "fwCpu2": 70,
+            "log": "流量探针检测到异常网络活动，可能是攻击准备阶段",
+            "logType": "warning",
+            "agvStatus": True,  # AGV保持正常运行
+            "idsStatus": True,
+            "seconds": 1.5,
+            "risk": "中"
+        },
+        # 阶段2：上报给大模型进行深度分析
+        {
+            "idsSecurity": 60,
+            "fwSecurity": 75,
+            "idsCpu": 80,  # 分析阶段，IDS CPU使用率进一步提高
+            "idsCpu2": 80,
+            "fwCpu": 75,  # 分析阶段，防火墙CPU使用率进一步提高
+            "fwCpu2": 75,
+            "log": "网络探针将异常流量数据上报给大模型进行深度分析",
+            "logType": "info",
+            "agvStatus": True,  # AGV保持正常运行
+            "idsStatus": True,
+            "seconds": 1.5,
+            "risk": "中"
+        },
+        # 阶段3：大模型进行技战术分析
+        {
+            "idsSecurity": 70,
+            "fwSecurity": 80,
+            "idsCpu": 65,
+            "idsCpu2": 65,
+            "fwCpu": streams.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "fwCpu2": streams.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation),
+            "log": "大模型基于RAG的网络安全知识库进行技战术分析，识别攻击特征",
+            "logType": "info",
+            "agvStatus": True,  # AGV保持正常运行
+            "idsStatus": True,
+            "seconds": 1.5,
+            "risk": "中"
+        },
+        # 阶段4：生成攻击技战术与缓解措施
+        {
+            "idsSecurity": 80,
+            "fwSecurity": 85,
+            "idsCpu": 70,
+            "idsCpu2": 70,
+            "fwCpu": 65,
+            "fwCpu2": 65,
+            "log": "大模型生成当前攻击技战术分析：DDoS + 命令注入，并制定对应缓解措施",
+            "logType": "info",
+            "agvStatus": True,  # AGV保持正常运行
+            "idsStatus": True,
+            "seconds": 1.5,
+            "risk": "中"
+        },
+        # 阶段5：开始安全功能重组
+        {
+            "idsSecurity": 85,
+            "fwSecurity": 90,
+            "idsCpu": 75,
+            "idsCpu2": 75,
+            "fwCpu": 70,
+            "fwCpu2": 70,
+            "log": "大模型下发安全功能柔性重组策略：部署深度检测IDS和自适应防火墙",
+            "logType": "info",
+            "agvStatus": True,  # AGV保持正常运行
+            "idsStatus": True,
+            "seconds": 1.5,
+            "risk": "中"
+        },
+        # 阶段6：安全容器资源分配
+        {
+            "idsSecurity": 90,
+            "fwSecurity": 92,
+            "idsCpu": 80,
+            "idsCpu2": 80,
+            "fwCpu": 75,
+            "fwCpu2": 75,
+            "log": "根据攻击强度进行安全容器资源动态分配，优先保障关键业务",
+            "logType": "info",
+            "agvStatus": True,  # AGV保持正常运行
+            "idsStatus": True,
+            "seconds": 1.5,
+            "risk": "中"
+        },
+        # 阶段7：重组完成，高效防御
+        {
+            "idsSecurity": 95,
+            "fwSecurity": 95,
+            "idsCpu": 85,
+            "idsCpu2": 85,
+            "fwCpu": 80,
+            "fwCpu2": 80,
+            "log": "安全功能重组完成，新的IDS和防火墙组件已部署并生效",
+            "logType": "success",
+            "agvStatus": True,  # AGV保持正常运行
+            "idsStatus": True,
+            "seconds": 1.5,
+            "risk": "低"
+        },
+        # 阶段8：攻击被有效阻断
+        {
+            "idsSecurity": 98,
+            "fwSecurity": 97,
+            "idsCpu": 75,
+            "idsCpu2": 75,
+            "fwCpu": 70,
+            "fwCpu2": 70,
+            "log": "重组后的IDS检测率达到98%，防火墙阻断率达到97%，攻击被有效阻断",
+            "logType": "success",
+            "agvStatus": True,  # AGV保持正常运行
+            "idsStatus": True,
+            "seconds": 1.5,
+            "risk": "低"
+        },
+        # 阶段9：系统完全恢复正常
+        {
+            "idsSecurity": 100,
+            "fwSecurity": 99,
+            "idsCpu": 40,  # 最终阶段，IDS CPU使用率降低，表示系统已经有效控制了攻击
+            "idsCpu2": 40,
+            "fwCpu": 35,  # 最终阶段，防火墙CPU使用率降低，表示系统已经有效控制了攻击
+            "fwCpu2": 35,
+            "log": "AI安全功能柔性重组策略验证有效，攻击完全阻断，系统持续正常运行",
+            "logType": "success",
+            "agvStatus": True,  # AGV始终保持正常运行
+            "idsStatus": True,
+            "seconds": 1.5,
+            "risk": "低"
+        }
+    ]
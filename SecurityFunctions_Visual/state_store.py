@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+版本化状态存储
+
+写者在私有副本上修改，提交时原子地替换快照引用（copy-on-write）；
+读者只读取当前快照引用，不加锁，也不会看到写了一半的状态。
+每次提交版本号单调递增，客户端可据此做廉价的"无变化"判断。
+最近若干个快照保留在历史中，可按版本号取回，用于计算增量。
+"""
+
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+
+class StateSnapshot:
+    """不可变的状态快照，读者不得修改data"""
+
+    __slots__ = ("version", "data")
+
+    def __init__(self, version, data):
+        self.version = version
+        self.data = data
+
+
+def _copy_state(data):
+    """复制状态：顶层字典以及一层嵌套的字典/列表"""
+    return {
+        key: value.copy() if isinstance(value, (dict, list)) else value
+        for key, value in data.items()
+    }
+
+
+class StateStore:
+    """版本化状态存储：写者串行，读者无锁"""
+
+    def __init__(self, initial, history=32):
+        self._snapshot = StateSnapshot(1, _copy_state(initial))
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        # 最近提交的快照（含当前快照），快照不可变，保留引用即可
+        self._history = deque([self._snapshot], maxlen=max(1, history))
+
+    def snapshot(self):
+        """获取当前快照（无锁）"""
+        return self._snapshot
+
+    @property
+    def version(self):
+        """当前版本号"""
+        return self._snapshot.version
+
+    def snapshot_at(self, version):
+        """获取指定版本的快照，已不在历史中时返回None（无锁）"""
+        # tuple()在C层一次性复制，不会与写者的append交错
+        for snapshot in reversed(tuple(self._history)):
+            if snapshot.version == version:
+                return snapshot
+            if snapshot.version < version:
+                break
+        return None
+
+    def get(self, key, default=None):
+        """读取当前快照中的单个字段"""
+        return self._snapshot.data.get(key, default)
+
+    @contextmanager
+    def update(self):
+        """开启写事务，退出时提交新快照；发生异常时丢弃修改
+
+        同一线程内嵌套调用时复用外层事务的工作副本，由最外层统一提交。
+        """
+        working = getattr(self._local, "working", None)
+        if working is not None:
+            yield working
+            return
+
+        with self._write_lock:
+            working = _copy_state(self._snapshot.data)
+            self._local.working = working
+            try:
+                yield working
+            finally:
+                self._local.working = None
+            self._snapshot = StateSnapshot(self._snapshot.version + 1, working)
+            self._history.append(self._snapshot)
@@ -1,6 +1,12 @@
 // 使用Vue 3 Composition API
 const { createApp, ref, computed, onMounted, onUnmounted, nextTick } = Vue;
 
+// 模拟会话ID：通过页面URL的session参数指定（如 /?session=trainee-01），不指定时使用默认会话
+const sessionId = new URLSearchParams(window.location.search).get('session');
+if (sessionId) {
+    axios.defaults.headers.common['X-Session-Id'] = sessionId;
+}
+
 // 创建Vue应用
 const app = createApp({
     setup() {
@@ -527,8 +533,8 @@ const app = createApp({
                         duration: 5000
                     });
 
-                    // 开始轮询状态
-                    startPollingStatus();
+                    // 开始接收状态更新
+                    startStatusUpdates();
                 } else {
                     ElementPlus.ElMessage.error(response.data.message);
                 }
@@ -540,6 +546,125 @@ const app = createApp({
 
         // 轮询间隔ID
         let pollIntervalId = null;
+        // 服务端推送连接
+        let statusSource = null;
+        // 最近一次完整状态，轮询时只请求相对它的增量
+        let lastStatus = null;
+        // 轮询时在本地保留的日志条数（与服务端默认的日志上限一致）
+        const MAX_STATUS_LOGS = 100;
+
+        // 将增量状态合并到上一次的完整状态中
+        const mergeStatusDelta = (previous, delta) => {
+            const merged = Object.assign({}, delta.delta ? previous : {}, delta);
+            const newLogs = delta.new_logs || [];
+            merged.logs = delta.logs_reset ? newLogs : (previous ? previous.logs : []).concat(newLogs).slice(-MAX_STATUS_LOGS);
+            delete merged.new_logs;
+            return merged;
+        };
+
+        // 将服务端状态应用到界面
+        const applyStatus = (data) => {
+            // 更新状态
+            agvActive.value = data.agv_active;
+            idsActive.value = data.ids_active;
+            idsSecurity.value = data.ids_security;
+            fwSecurity.value = data.fw_security;
+            idsCpuUsage.value = data.ids_cpu_usage;
+            idsCpuUsage2.value = data.ids_cpu_usage_2;
+            fwCpuUsage.value = data.fw_cpu_usage;
+            fwCpuUsage2.value = data.fw_cpu_usage_2;
+            attacksDetected.value = data.attacks_detected;
+            attacksBlocked.value = data.attacks_blocked;
+            riskLevel.value = data.risk_level;
+            logs.value = data.logs || data.attack_logs;
+
+            // 更新系统性能指标
+            normalTraffic.value = data.normal_traffic || 300;
+            containerQps.value = data.container_qps || 750;
+            mttr.value = data.mttr || 0.35;
+
+            // 更新IDS检测率和防火墙阻断率
+            idsRate1.value = data.ids_rate_1;
+            idsRate2.value = data.ids_rate_2;
+            fwRate1.value = data.fw_rate_1;
+            fwRate2.value = data.fw_rate_2;
+
+            // 如果收到了有效的检测率数据（不是N/A），则重置攻击初始化状态
+            if (isInitializingAttack.value && data.rates_valid) {
+                isInitializingAttack.value = false;
+            }
+
+            // 调试仪表盘数据
+            debugDashboard();
+
+            // 更新组件名称
+            componentNames.value = data.component_names;
+
+            // 通知外部组件状态更新
+            if (externalComponent.value) {
+                const status = {
+                    agvActive: agvActive.value,
+                    idsActive: idsActive.value,
+                    idsSecurity: idsSecurity.value,
+                    fwSecurity: fwSecurity.value,
+                    isAttacking: isAttacking.value,
+                    logs: logs.value,
+                    idsRate1: idsRate1.value,
+                    idsRate2: idsRate2.value,
+                    fwRate1: fwRate1.value,
+                    fwRate2: fwRate2.value,
+                    componentNames: componentNames.value,
+                    attacksDetected: attacksDetected.value,
+                    attacksBlocked: attacksBlocked.value,
+                    riskLevel: riskLevel.value,
+                    idsCpuUsage: idsCpuUsage.value,
+                    idsCpuUsage2: idsCpuUsage2.value,
+                    fwCpuUsage: fwCpuUsage.value,
+                    fwCpuUsage2: fwCpuUsage2.value,
+                    defense_scheme: setupForm.value.defenseScheme,
+                    attack_types: setupForm.value.attackType ? [setupForm.value.attackType] : [],
+                    is_attacking: isAttacking.value
+                };
+                externalComponent.value.interface.update(status);
+            }
+
+            // 触发状态更新事件
+            window.dispatchEvent(new CustomEvent('system-status-update'));
+
+            // 更新图表数据 - 不再移除旧数据点，而是添加新数据点
+            const now = new Date();
+            timeData.value.push(formatChartTime(now));
+            idsCpuData.value.push(idsCpuUsage.value);
+            idsCpuData2.value.push(idsCpuUsage2.value);
+            fwCpuData.value.push(fwCpuUsage.value);
+            fwCpuData2.value.push(fwCpuUsage2.value);
+
+            // 限制数据点数量，保持最新的300个点（约15分钟的数据）
+            const maxPoints = 300;
+            if (timeData.value.length > maxPoints) {
+                timeData.value = timeData.value.slice(-maxPoints);
+                idsCpuData.value = idsCpuData.value.slice(-maxPoints);
+                idsCpuData2.value = idsCpuData2.value.slice(-maxPoints);
+                fwCpuData.value = fwCpuData.value.slice(-maxPoints);
+                fwCpuData2.value = fwCpuData2.value.slice(-maxPoints);
+            }
+
+            // 更新图表
+            updateAllCharts();
+
+            // 确保日志滚动到最新的消息
+            nextTick(() => {
+                const logContainer = document.getElementById('logContainer');
+                if (logContainer) {
+                    logContainer.scrollTop = logContainer.scrollHeight;
+                }
+            });
+
+            // 更新攻击状态
+            if (!data.is_attacking) {
+                isAttacking.value = false;
+            }
+        };
 
         // 开始轮询状态
         const startPollingStatus = () => {
@@ -552,111 +677,11 @@ const app = createApp({
             // 启动新的轮询
             pollIntervalId = setInterval(async () => {
                 try {
-                    const response = await axios.get('/api/status');
-                    const data = response.data;
-
-                    // 更新状态
-                    agvActive.value = data.agv_active;
-                    idsActive.value = data.ids_active;
-                    idsSecurity.value = data.ids_security;
-                    fwSecurity.value = data.fw_security;
-                    idsCpuUsage.value = data.ids_cpu_usage;
-                    idsCpuUsage2.value = data.ids_cpu_usage_2;
-                    fwCpuUsage.value = data.fw_cpu_usage;
-                    fwCpuUsage2.value = data.fw_cpu_usage_2;
-                    attacksDetected.value = data.attacks_detected;
-                    attacksBlocked.value = data.attacks_blocked;
-                    riskLevel.value = data.risk_level;
-                    logs.value = data.logs || data.attack_logs;
-
-                    // 更新系统性能指标
-                    normalTraffic.value = data.normal_traffic || 300;
-                    containerQps.value = data.container_qps || 750;
-                    mttr.value = data.mttr || 0.35;
-
-                    // 更新IDS检测率和防火墙阻断率
-                    idsRate1.value = data.ids_rate_1;
-                    idsRate2.value = data.ids_rate_2;
-                    fwRate1.value = data.fw_rate_1;
-                    fwRate2.value = data.fw_rate_2;
-
-                    // 如果收到了有效的检测率数据（不是N/A），则重置攻击初始化状态
-                    if (isInitializingAttack.value &&
-                        data.ids_rate_1 && !data.ids_rate_1.includes('N/A') &&
-                        data.fw_rate_1 && !data.fw_rate_1.includes('N/A')) {
-                        isInitializingAttack.value = false;
-                    }
-
-                    // 调试仪表盘数据
-                    debugDashboard();
-
-                    // 更新组件名称
-                    componentNames.value = data.component_names;
-
-                    // 通知外部组件状态更新
-                    if (externalComponent.value) {
-                        const status = {
-                            agvActive: agvActive.value,
-                            idsActive: idsActive.value,
-                            idsSecurity: idsSecurity.value,
-                            fwSecurity: fwSecurity.value,
-                            isAttacking: isAttacking.value,
-                            logs: logs.value,
-                            idsRate1: idsRate1.value,
-                            idsRate2: idsRate2.value,
-                            fwRate1: fwRate1.value,
-                            fwRate2: fwRate2.value,
-                            componentNames: componentNames.value,
-                            attacksDetected: attacksDetected.value,
-                            attacksBlocked: attacksBlocked.value,
-                            riskLevel: riskLevel.value,
-                            idsCpuUsage: idsCpuUsage.value,
-                            idsCpuUsage2: idsCpuUsage2.value,
-                            fwCpuUsage: fwCpuUsage.value,
-                            fwCpuUsage2: fwCpuUsage2.value,
-                            defense_scheme: setupForm.value.defenseScheme,
-                            attack_types: setupForm.value.attackType ? [setupForm.value.attackType] : [],
-                            is_attacking: isAttacking.value
-                        };
-                        externalComponent.value.interface.update(status);
-                    }
-
-                    // 触发状态更新事件
-                    window.dispatchEvent(new CustomEvent('system-status-update'));
-
-                    // 更新图表数据 - 不再移除旧数据点，而是添加新数据点
-                    const now = new Date();
-                    timeData.value.push(formatChartTime(now));
-                    idsCpuData.value.push(idsCpuUsage.value);
-                    idsCpuData2.value.push(idsCpuUsage2.value);
-                    fwCpuData.value.push(fwCpuUsage.value);
-                    fwCpuData2.value.push(fwCpuUsage2.value);
-
-                    // 限制数据点数量，保持最新的300个点（约15分钟的数据）
-                    const maxPoints = 300;
-                    if (timeData.value.length > maxPoints) {
-                        timeData.value = timeData.value.slice(-maxPoints);
-                        idsCpuData.value = idsCpuData.value.slice(-maxPoints);
-                        idsCpuData2.value = idsCpuData2.value.slice(-maxPoints);
-                        fwCpuData.value = fwCpuData.value.slice(-maxPoints);
-                        fwCpuData2.value = fwCpuData2.value.slice(-maxPoints);
-                    }
-
-                    // 更新图表
-                    updateAllCharts();
-
-                    // 确保日志滚动到最新的消息
-                    nextTick(() => {
-                        const logContainer = document.getElementById('logContainer');
-                        if (logContainer) {
-                            logContainer.scrollTop = logContainer.scrollHeight;
-                        }
-                    });
-
-                    // 更新攻击状态
-                    if (!data.is_attacking) {
-                        isAttacking.value = false;
-                    }
+                    // 已有状态时只获取变化的字段和新日志（会话实例变化时服务端返回完整状态）
+                    const params = lastStatus ? {since: lastStatus.version, log_cursor: lastStatus.log_cursor, instance: lastStatus.instance_id} : {};
+                    const response = await axios.get('/api/status', {params});
+                    lastStatus = lastStatus ? mergeStatusDelta(lastStatus, response.data) : response.data;
+                    applyStatus(lastStatus);
                 } catch (error) {
                     console.error('获取状态失败:', error);
                     clearInterval(pollIntervalId);
@@ -665,6 +690,37 @@ const app = createApp({
             }, 3000);
         };
 
+        // 开始接收服务端推送的状态，不支持时退回到轮询
+        const startStatusUpdates = () => {
+            if (!window.EventSource) {
+                startPollingStatus();
+                return;
+            }
+
+            // 已经建立推送连接时无需重复订阅
+            if (statusSource && statusSource.readyState !== EventSource.CLOSED) {
+                return;
+            }
+
+            statusSource = new EventSource('/api/status/stream' + (sessionId ? `?session=${encodeURIComponent(sessionId)}` : ''));
+            statusSource.onmessage = (event) => {
+                try {
+                    lastStatus = JSON.parse(event.data);
+                    applyStatus(lastStatus);
+                } catch (error) {
+                    console.error('解析推送状态失败:', error);
+                }
+            };
+            statusSource.onerror = () => {
+                // 连接被关闭时退回到轮询；其余情况由浏览器自动重连
+                if (statusSource.readyState === EventSource.CLOSED) {
+                    console.warn('状态推送连接已关闭，改为轮询');
+                    statusSource = null;
+                    startPollingStatus();
+                }
+            };
+        };
+
         // 加载外部组件
         const loadExternalComponent = async () => {
             try {
@@ -787,8 +843,8 @@ const app = createApp({
 
         // 自动开始轮询状态
         const startAutoPolling = () => {
-            // 不再自动打开设置对话框，但仍然开始轮询状态，以显示实时数据
-            startPollingStatus();
+            // 不再自动打开设置对话框，但仍然开始接收状态更新，以显示实时数据
+            startStatusUpdates();
 
             console.log("自动开始轮询状态");
         };
@@ -821,6 +877,10 @@ const app = createApp({
         // 组件卸载时
         onUnmounted(() => {
             window.removeEventListener('resize', () => {});
+            statusSource?.close();
+            if (pollIntervalId) {
+                clearInterval(pollIntervalId);
+            }
             idsCpuChart?.dispose();
             idsCpu2Chart?.dispose();
             fwCpuChart?.dispose();
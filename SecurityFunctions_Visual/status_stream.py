@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+系统状态推送（Server-Sent Events）
+
+每个tick只生成并编码一次状态快照，所有订阅者共享同一份已编码的字节，
+订阅者只会拿到最新一帧（慢客户端自动跳过中间帧），不会为每个连接积压队列。
+"""
+
+import threading
+
+
+class StatusBroadcaster:
+    """状态广播器：单生产者、多订阅者"""
+
+    def __init__(self, retry_interval=3.0, keepalive=15.0):
+        self.retry_interval = retry_interval
+        self.keepalive = keepalive
+
+        self._cond = threading.Condition()
+        self._frame = None      # 最新一帧（已编码的SSE字节）
+        self._seq = 0           # 帧序号，订阅者据此判断是否有新帧
+        self._subscribers = 0
+        self._closed = False
+
+    @property
+    def subscriber_count(self):
+        """当前订阅者数量"""
+        return self._subscribers
+
+    def publish(self, payload):
+        """编码一帧并唤醒所有订阅者"""
+        with self._cond:
+            self._seq += 1
+            self._frame = f"id: {self._seq}\ndata: {payload}\n\n".encode("utf-8")
+            self._cond.notify_all()
+
+    def close(self):
+        """关闭广播器：所有订阅者的流在下一次唤醒时结束，之后的订阅立即结束"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stream(self):
+        """订阅者生成器，逐帧产出SSE字节，广播器关闭后结束"""
+        with self._cond:
+            if self._closed:
+                return
+            self._subscribers += 1
+            last_seq = 0
+        try:
+            # 告诉浏览器断线后的重连间隔
+            yield f"retry: {int(self.retry_interval * 1000)}\n\n".encode("utf-8")
+            while True:
+                with self._cond:
+                    has_new = self._cond.wait_for(lambda: self._closed or self._seq != last_seq, timeout=self.keepalive)
+                    if self._closed:
+                        return
+                    frame = self._frame
+                    last_seq = self._seq
+                if has_new and frame is not None:
+                    yield frame
+                else:
+                    # 心跳注释行，保持连接不被代理断开
+                    yield b": keepalive\n\n"
+        finally:
+            with self._cond:
+                self._subscribers -= 1
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""采集器的退避测试"""
+
+from collector import MAX_BACKOFF_EXPONENT, PerformanceCollector
+
+
+class FailingSession:
+    def close(self):
+        pass
+
+
+class FailingCollector(PerformanceCollector):
+    """每次采集都失败，失败max_failures次后停止"""
+
+    def __init__(self, filepath, max_failures, **kwargs):
+        super().__init__("http://127.0.0.1:1", filepath, **kwargs)
+        self.max_failures = max_failures
+
+    def _open_session(self):
+        return FailingSession()
+
+    def sample(self):
+        if self.errors + 1 >= self.max_failures:
+            self.stop()
+        raise ConnectionError("unreachable")
+
+
+def test_backoff_delay_is_capped_for_long_outages():
+    collector = PerformanceCollector("http://127.0.0.1:1", "unused.csv", rate=10.0, max_backoff=10.0)
+    for failures in (1, MAX_BACKOFF_EXPONENT, 1030, 10 ** 6):
+        delay = collector.backoff_delay(failures)
+        assert 0 < delay <= 10.0
+    assert collector.backoff_delay(10 ** 6) >= 5.0
+
+
+def test_run_survives_many_consecutive_failures(tmp_path):
+    collector = FailingCollector(str(tmp_path / "samples.csv"), max_failures=2000, rate=50.0, max_backoff=0.0)
+    summary = collector.run()
+    assert summary["errors"] == 2000
+    assert summary["samples"] == 0
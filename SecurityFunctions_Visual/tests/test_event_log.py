@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""事件日志的写入恢复测试"""
+
+import os
+
+from event_log import INDEX_DTYPE, EventJournal, EventLog
+
+
+def write_events(root, count, start_time=0.0):
+    journal = EventJournal(root)
+    log = EventLog("s", 100, journal)
+    for i in range(count):
+        log.append("info", f"事件 {log.last_seq + 1}", start_time + i)
+    journal.flush()
+    return journal
+
+
+def test_torn_index_record_is_truncated_before_appending(tmp_path):
+    root = str(tmp_path)
+    write_events(root, 3)
+
+    # 模拟中断：内容写了一条半，索引只写了半条记录
+    series_dir = os.path.join(root, "s")
+    idx_path = os.path.join(series_dir, f"{1:020d}.idx")
+    with open(os.path.join(series_dir, f"{1:020d}.jsonl"), "ab") as f:
+        f.write('{"seq": 4, "content": "事'.encode("utf-8"))
+    with open(idx_path, "ab") as f:
+        f.write(b"\0" * (INDEX_DTYPE.itemsize // 2))
+
+    journal = write_events(root, 2, start_time=10.0)
+    assert os.path.getsize(idx_path) == 5 * INDEX_DTYPE.itemsize
+    events = journal.query("s", after=0, limit=10)
+    assert [event["seq"] for event in events] == [1, 2, 3, 4, 5]
+    assert [event["content"] for event in events] == [f"事件 {seq}" for seq in range(1, 6)]
+    assert journal.read("s", [5])[5]["time"] == 11.0
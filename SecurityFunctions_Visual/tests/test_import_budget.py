@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""performance_analyzer的导入开销回归测试（与--check-import-budget相同的检查）"""
+
+import os
+
+import pytest
+
+from performance_analyzer import IMPORT_BUDGET_MS, measure_import
+
+
+def test_import_loads_no_heavy_modules():
+    assert measure_import()["heavy"] == []
+
+
+@pytest.mark.skipif(not os.environ.get("CHECK_IMPORT_TIME"),
+                    reason="耗时受机器负载影响，设置CHECK_IMPORT_TIME=1时才检查（或使用--check-import-budget）")
+def test_import_stays_within_time_budget():
+    # 取多次测量的最小值，排除首次运行编译字节码和系统抖动的影响
+    results = [measure_import() for _ in range(3)]
+    assert min(result["elapsed_ms"] for result in results) <= IMPORT_BUDGET_MS
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""指标存储的写入恢复、时间顺序和保留测试"""
+
+import os
+
+import numpy as np
+
+from metrics_store import MetricsReader, MetricsWriter, partition_name
+from simulation_clock import VirtualTimeSource
+
+SCHEMA = (("timestamp", "<f8"), ("value", "<f4"))
+DAY = 86400.0
+
+
+def rows(start, count):
+    return [{"timestamp": start + i, "value": float(i)} for i in range(count)]
+
+
+def test_torn_write_is_truncated_before_appending(tmp_path):
+    root = str(tmp_path)
+    writer = MetricsWriter(root, schema=SCHEMA)
+    for row in rows(0.0, 3):
+        writer.append("s", row)
+    writer.flush()
+
+    # 模拟中断：timestamp多写了一行半，value只写了半个值
+    partition_dir = os.path.join(root, "s", partition_name(0.0))
+    with open(os.path.join(partition_dir, "timestamp.bin"), "ab") as f:
+        f.write(np.array([3.0], dtype="<f8").tobytes() + b"\0\0\0")
+    with open(os.path.join(partition_dir, "value.bin"), "ab") as f:
+        f.write(b"\0\0")
+
+    writer = MetricsWriter(root, schema=SCHEMA)
+    for row in rows(10.0, 2):
+        writer.append("s", row)
+    writer.flush()
+
+    blocks = list(MetricsReader(root).iter_blocks("s", ["value"]))
+    timestamps = np.concatenate([block["timestamp"] for block in blocks])
+    values = np.concatenate([block["value"] for block in blocks])
+    assert timestamps.tolist() == [0.0, 1.0, 2.0, 10.0, 11.0]
+    assert values.tolist() == [0.0, 1.0, 2.0, 0.0, 1.0]
+
+
+def test_retention_uses_the_simulation_clock(tmp_path):
+    root = str(tmp_path)
+    clock = VirtualTimeSource(start=0.0)
+    writer = MetricsWriter(root, schema=SCHEMA, retention_days=2, time_source=clock)
+    for day in range(5):
+        for row in rows(day * DAY, 2):
+            writer.append("s", row)
+    clock.advance(4 * DAY)
+    writer.flush()
+
+    remaining = sorted(entry for entry in os.listdir(os.path.join(root, "s")) if entry.isdigit())
+    assert remaining == [partition_name(day * DAY) for day in (2, 3, 4)]
+
+
+def test_rows_older_than_stored_data_are_dropped(tmp_path):
+    root = str(tmp_path)
+    writer = MetricsWriter(root, schema=SCHEMA)
+    for row in rows(100.0, 3) + rows(50.0, 2):
+        writer.append("s", row)
+    writer.flush()
+
+    # 重启后的写入器从磁盘读取已写入的最晚时间，时钟回退的行同样被丢弃
+    writer = MetricsWriter(root, schema=SCHEMA)
+    for row in rows(101.0, 3):
+        writer.append("s", row)
+    writer.flush()
+
+    reader = MetricsReader(root)
+    timestamps = reader.read("s", ["value"])["timestamp"]
+    assert timestamps.tolist() == [100.0, 101.0, 102.0, 102.0, 103.0]
+    assert reader.read("s", ["value"], start=101.0, end=103.0)["timestamp"].tolist() == [101.0, 102.0, 102.0]
+    assert reader.last_timestamp() == reader.last_timestamp("s") == 103.0
+    assert MetricsReader(str(tmp_path / "missing")).last_timestamp() is None
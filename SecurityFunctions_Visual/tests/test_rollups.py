@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""多分辨率汇总的分辨率选择、内存上限和从指标历史聚合的测试"""
+
+import pytest
+
+from metrics_store import METRICS_SCHEMA, MetricsReader, MetricsWriter
+from rollups import MetricRollups, RollupSeries, query_history
+from simulation_clock import VirtualTimeSource
+
+HOUR = 3600.0
+T0 = 1700000000.0
+
+
+def row(timestamp, qps, scheme=0):
+    values = {name: 0 for name, _ in METRICS_SCHEMA}
+    values.update({"timestamp": timestamp, "scheme": scheme, "ids_rate_1": 90.0, "ids_rate_2": 90.0,
+                   "fw_rate_1": 80.0, "fw_rate_2": 80.0, "container_qps": qps, "mttr": 1.0, "ids_cpu_usage": 10.0,
+                   "ids_cpu_usage_2": 10.0, "fw_cpu_usage": 10.0, "fw_cpu_usage_2": 10.0})
+    return values
+
+
+def write_history(root, rows):
+    """把若干行写入指标历史，返回读取器和同样写入了这些行的内存汇总"""
+    writer = MetricsWriter(str(root), time_source=VirtualTimeSource(start=rows[-1]["timestamp"]))
+    rollups = MetricRollups()
+    for values in rows:
+        writer.append("s", values)
+        rollups.ingest(values)
+    writer.flush()
+    return MetricsReader(str(root)), rollups
+
+
+def test_resolution_covers_the_requested_start():
+    rollups = MetricRollups()
+    for t in range(0, int(2 * HOUR), 10):
+        rollups.ingest(row(float(t), 1.0))
+    end = 2 * HOUR
+    # 1秒桶只保留最近30分钟，查询最近2小时须使用10秒桶
+    assert rollups.choose_resolution(60, end - 10 * 60) == 1
+    assert rollups.choose_resolution(60, 0.0) == 10
+    assert rollups.choose_resolution(5, 0.0) is None
+
+    _, series = rollups.query(["qps"], 0.0, end, 3600)
+    assert [bucket["count"] for bucket in series["qps"]] == [360] * 2
+
+    # 超出内存中保留时长的范围不再由汇总回答（由指标历史聚合）
+    for t in range(int(2 * HOUR), int(4 * HOUR), 10):
+        rollups.ingest(row(float(t), 1.0))
+    assert rollups.choose_resolution(60, 0.0) is None
+
+
+def test_memory_is_bounded_by_retention():
+    rollups = MetricRollups()
+    for t in range(0, int(6 * HOUR)):
+        rollups.ingest(row(float(t), float(t % 100)))
+    for series in rollups._series.values():
+        for rollup in series:
+            # 旧桶最多积累到八分之一再压缩
+            assert len(rollup._times) <= (rollup.retention / rollup.resolution + 1) * 9 / 8 + 1
+    size = rollups.nbytes()
+    assert 0 < size < 20 * 1024 * 1024
+
+
+def test_history_query_matches_rollups(tmp_path):
+    rows = [row(T0 + t, float(t % 97), scheme=(t // 600) % 2) for t in range(0, int(HOUR), 3)]
+    reader, rollups = write_history(tmp_path, rows)
+    for scheme in (None, "flexible"):
+        _, expected = rollups.query(["qps", "mttr"], T0, T0 + HOUR, 600, scheme)
+        actual = query_history(reader, "s", ["qps", "mttr"], T0, T0 + HOUR, 600, scheme)
+        for metric in ("qps", "mttr"):
+            assert [b["t"] for b in actual[metric]] == [b["t"] for b in expected[metric]]
+            for got, want in zip(actual[metric], expected[metric]):
+                assert got["count"] == want["count"]
+                assert (got["min"], got["max"], got["p95"]) == (want["min"], want["max"], want["p95"])
+                assert got["mean"] == pytest.approx(want["mean"])
+    assert query_history(reader, "missing", ["qps"], T0, T0 + HOUR, 600) == {"qps": []}
+
+
+def test_backfill_rebuilds_rollups_after_restart(tmp_path):
+    rows = [row(T0 + t, float(t % 50)) for t in range(0, int(3 * HOUR), 3)]
+    reader, rollups = write_history(tmp_path, rows)
+    end = T0 + 3 * HOUR
+
+    restored = MetricRollups()
+    # 只读取保留时长（2小时）内的行
+    assert restored.backfill(reader, "s", end) == int(2 * HOUR) // 3
+    start = end - HOUR
+    assert restored.query(["qps"], start, end, 60) == rollups.query(["qps"], start, end, 60)
+    # 更早的范围须从指标历史聚合
+    assert restored.choose_resolution(60, T0) is None
+    assert MetricRollups().backfill(reader, "missing", end) == 0
+
+
+def test_range_uses_binary_search_over_sorted_buckets():
+    series = RollupSeries(10, 100)
+    for t in range(0, 300):
+        series.add(float(t), 1.0)
+    # 保留最近100秒（11个桶），旧桶被丢弃
+    assert len(series) == 11
+    assert [t for t, _ in series.range(0, 1000)] == list(range(190, 300, 10))
+    assert [t for t, _ in series.range(215, 250)] == [220, 230, 240]
+    # 时间戳回退时加入已有的桶
+    series.add(225.0, 5.0)
+    assert dict(series.range(220, 230))[220].count == 11
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""场景结果缓存测试"""
+
+import os
+
+import scenario_cache
+from scenario_cache import ScenarioCache, code_fingerprint, local_imports
+
+BASE = os.path.dirname(os.path.abspath(scenario_cache.__file__))
+
+
+def test_fingerprint_covers_every_imported_module(monkeypatch):
+    modules = local_imports("simulator.py", BASE)
+    for name in ("simulation_clock.py", "run_manager.py", "perf_stats.py", "event_log.py", "random_streams.py"):
+        assert name in modules
+
+    fingerprint = code_fingerprint()
+    monkeypatch.setattr(scenario_cache, "CACHE_VERSION", scenario_cache.CACHE_VERSION + 1)
+    assert code_fingerprint() != fingerprint
+
+
+def test_results_are_served_from_memory_then_disk(tmp_path):
+    calls = []
+
+    def compute(**params):
+        calls.append(params)
+        return {"value": params["seed"]}
+
+    params = {"seed": 1}
+    cache = ScenarioCache(compute, directory=str(tmp_path), fingerprint="code")
+    assert cache.get(params)[1:] == ({"value": 1}, "miss")
+    assert cache.get(params)[1:] == ({"value": 1}, "memory")
+
+    cache = ScenarioCache(compute, directory=str(tmp_path), fingerprint="code")
+    assert cache.get(params)[1:] == ({"value": 1}, "disk")
+    assert len(calls) == 1
+
+    cache = ScenarioCache(compute, directory=str(tmp_path), fingerprint="changed")
+    assert cache.get(params)[2] == "miss"
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""会话管理的关闭和内存上限测试"""
+
+import threading
+import tracemalloc
+
+import pytest
+
+from run_manager import RunManager
+from sessions import SessionLimitError, SessionManager
+from simulation_clock import VirtualTimeSource
+from simulator import Simulator
+from status_stream import StatusBroadcaster
+
+
+class FakeRunManager:
+    def __init__(self):
+        self.cancelled = []
+
+    def cancel_all(self, owner=None):
+        self.cancelled.append(owner)
+
+
+class FakeSession:
+    def __init__(self, session_id, memory=1000):
+        self.session_id = session_id
+        self.memory = memory
+        self.run_manager = FakeRunManager()
+        self.broadcaster = StatusBroadcaster(keepalive=60.0)
+        self.last_access = 0.0
+
+    def touch(self):
+        pass
+
+    def memory_estimate(self):
+        return self.memory
+
+    def close(self):
+        self.run_manager.cancel_all(owner=self.session_id)
+        self.broadcaster.close()
+
+
+def test_remove_ends_open_streams():
+    manager = SessionManager(FakeSession)
+    session = manager.get("s1")
+    stream = session.broadcaster.stream()
+    next(stream)  # retry行
+
+    frames = []
+    reader = threading.Thread(target=lambda: frames.extend(stream))
+    reader.start()
+    assert manager.remove("s1")
+    reader.join(timeout=5)
+    assert not reader.is_alive()
+    assert session.broadcaster.subscriber_count == 0
+    assert session.run_manager.cancelled == ["s1"]
+    assert list(session.broadcaster.stream()) == []
+
+
+def test_memory_limit_is_enforced():
+    manager = SessionManager(FakeSession, max_session_memory=5000)
+    small = manager.get("small")
+    big = manager.get("big")
+    big.memory = 10000
+    assert manager.evict_over_memory() == ["big"]
+    assert [session.session_id for session in manager.sessions()] == ["small"]
+    assert small.run_manager.cancelled == []
+
+    manager = SessionManager(lambda session_id: FakeSession(session_id, memory=10000), max_session_memory=5000)
+    with pytest.raises(SessionLimitError):
+        manager.get("huge")
+    assert manager.sessions() == []
+
+
+def test_real_simulator_is_evicted_past_the_memory_cap():
+    run_manager = RunManager(max_workers=1)
+    clock = VirtualTimeSource(start=1700000000.0)
+    manager = SessionManager(lambda session_id: Simulator(session_id, run_manager, time_source=clock, seed=1),
+                             max_session_memory=2 * 1024 * 1024)
+    try:
+        session = manager.get("s1")
+        baseline = session.memory_estimate()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        # 模拟1小时：每3秒一个tick，写入指标汇总、日志检索索引和增量状态缓存
+        for i in range(1200):
+            clock.advance(3.0)
+            session.tick()
+            session.record_metrics()
+            session.add_log("info", f"设备{i % 500}的流量采样 {i}")
+            session.encoded_status_delta(since=session.store.snapshot().version - 1, instance_id=session.instance_id)
+        grown = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+        # 估算值须反映实际增长（不再只统计状态和最近的日志）
+        assert session.memory_estimate() - baseline >= 0.7 * grown
+        assert session.memory_estimate() > manager.max_session_memory
+        assert manager.evict_over_memory() == ["s1"]
+        assert manager.sessions() == []
+    finally:
+        run_manager.shutdown(wait=False)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""增量状态响应测试"""
+
+import json
+
+from simulation_clock import VirtualTimeSource
+from simulator import Simulator
+
+
+def make_simulator():
+    return Simulator("s", run_manager=None, time_source=VirtualTimeSource(start=1000.0), seed=1)
+
+
+def test_delta_contains_only_changed_fields_and_new_logs():
+    sim = make_simulator()
+    base = sim.store.snapshot()
+    sim.add_log("warning", "测试日志")
+    snapshot = sim.store.snapshot()
+
+    payload = sim.build_status_delta(snapshot, base)
+    assert payload["delta"] is True
+    assert payload["base_version"] == base.version
+    assert payload["version"] == snapshot.version
+    assert payload["instance_id"] == sim.instance_id
+    assert payload["logs_reset"] is False
+    assert [entry["content"] for entry in payload["new_logs"]] == ["测试日志"]
+    # 只有日志游标变化，其余字段不在增量中
+    assert "defense_scheme" not in payload
+    assert "ids_security" not in payload
+
+
+def test_stale_log_cursor_resets_logs():
+    sim = make_simulator()
+    snapshot = sim.store.snapshot()
+    payload = sim.build_status_delta(snapshot, snapshot, log_cursor=snapshot.data["log_seq"] + 50)
+    assert payload["logs_reset"] is True
+    assert len(payload["new_logs"]) == len(sim.event_log.recent())
+
+
+def test_base_from_another_instance_returns_full_payload():
+    old = make_simulator()
+    old.add_log("info", "旧会话的日志")
+    stale = json.loads(old.encoded_status()[1])
+
+    sim = make_simulator()
+    sim.add_log("warning", "新会话的日志")
+    # 新实例的版本号和日志序号与旧实例重复，但instance_id不同
+    _, payload = sim.encoded_status_delta(stale["version"] - 1, stale["log_cursor"], stale["instance_id"])
+    payload = json.loads(payload)
+    assert payload["delta"] is False
+    assert payload["logs_reset"] is True
+    assert payload["defense_scheme"] == sim.store.snapshot().data["defense_scheme"]
+    assert [entry["content"] for entry in payload["new_logs"]][-1] == "新会话的日志"
+
+    _, payload = sim.encoded_status_delta(sim.store.version - 1, None, sim.instance_id)
+    assert json.loads(payload)["delta"] is True
@@ -10,9 +10,10 @@
 - 实时监控界面包括流量、CPU占用、检测率、阻断率等
 - 程序退出时输出最终MTTR与平均QPS
 - 按 Ctrl+C 退出程序
+- 可用 --seed 指定随机数种子，复现同一次仿真
 """
 
-import random
+import argparse
 import time
 import sys
 from threading import Event
@@ -21,12 +22,16 @@ from rich.table import Table
 from rich.panel import Panel
 from rich.live import Live
 
+from random_streams import RandomStreams
+
 console = Console()
 
 
 class Simulator:
-    def __init__(self):
+    def __init__(self, seed=None):
         self.time_step = 0.5  # 刷新间隔秒
+        # 各组件独立的随机数流，seed为None时随机生成
+        self.rng = RandomStreams(seed)
         self.defense_scheme = None  # 'traditional' 或 'flexible'
         self.attack_types = []  # []无攻击，[1, 2]编码对应攻击类型
         self.running = True
@@ -88,20 +93,20 @@ class Simulator:
             console.print("[red]无效输入，请重试[/]")
 
     def simulate_normal_traffic(self):
-        return random.randint(200, 600)
+        return self.rng.traffic.randint(200, 600)
 
     def simulate_cpu_usage(self):
         if self.defense_scheme == "traditional":
-            ids_cpu_1 = random.uniform(20, 60)
-            ids_cpu_2 = random.uniform(20, 60)
-            fw_cpu_1 = random.uniform(20, 60)
-            fw_cpu_2 = random.uniform(20, 60)
+            ids_cpu_1 = self.rng.ids.uniform(20, 60)
+            ids_cpu_2 = self.rng.ids.uniform(20, 60)
+            fw_cpu_1 = self.rng.firewall.uniform(20, 60)
+            fw_cpu_2 = self.rng.firewall.uniform(20, 60)
             return ids_cpu_1, ids_cpu_2, fw_cpu_1, fw_cpu_2
         else:
-            ids_cpu_agv = random.uniform(15, 45) + self.resource_allocation.get("IDS-AGV", 0) * 0.5
-            ids_cpu_sched = random.uniform(15, 45) + self.resource_allocation.get("IDS-Scheduler", 0) * 0.5
-            fw_cpu_agv = random.uniform(15, 50) + self.resource_allocation.get("Firewall-AGV", 0) * 0.7
-            fw_cpu_sched = random.uniform(15, 50) + self.resource_allocation.get("Firewall-Scheduler", 0) * 0.7
+            ids_cpu_agv = self.rng.ids.uniform(15, 45) + self.resource_allocation.get("IDS-AGV", 0) * 0.5
+            ids_cpu_sched = self.rng.ids.uniform(15, 45) + self.resource_allocation.get("IDS-Scheduler", 0) * 0.5
+            fw_cpu_agv = self.rng.firewall.uniform(15, 50) + self.resource_allocation.get("Firewall-AGV", 0) * 0.7
+            fw_cpu_sched = self.rng.firewall.uniform(15, 50) + self.resource_allocation.get("Firewall-Scheduler", 0) * 0.7
             return ids_cpu_agv, ids_cpu_sched, fw_cpu_agv, fw_cpu_sched
 
     def flexible_defense_preprocess(self):
@@ -156,8 +161,8 @@ class Simulator:
             console.print(f" · {comp} 资源分配: {val:.1f}%")
 
         # 预处理完成时暂不显示MTTR、QPS，后续运行时动态更新
-        self.mttr = random.uniform(0.5, 1.5)
-        self.container_qps = random.randint(800, 1500)
+        self.mttr = self.rng.container.uniform(0.5, 1.5)
+        self.container_qps = self.rng.container.randint(800, 1500)
 
         self.preprocess_done.set()
 
@@ -177,28 +182,28 @@ class Simulator:
             else:
                 cpu_base = 55
                 fluctuation = 2
-                ids_rate_1 = f"{random.uniform(0.45, 0.55) * 100:.2f}%"
-                fw_rate_1 = f"{random.uniform(0.3, 0.5) * 100:.2f}%"
-                ids_rate_2 = f"{random.uniform(0.35, 0.65) * 100:.2f}%"
-                fw_rate_2 = f"{random.uniform(0.2, 0.6) * 100:.2f}%"
+                ids_rate_1 = f"{self.rng.ids.uniform(0.45, 0.55) * 100:.2f}%"
+                fw_rate_1 = f"{self.rng.firewall.uniform(0.3, 0.5) * 100:.2f}%"
+                ids_rate_2 = f"{self.rng.ids.uniform(0.35, 0.65) * 100:.2f}%"
+                fw_rate_2 = f"{self.rng.firewall.uniform(0.2, 0.6) * 100:.2f}%"
 
-            ids_cpu_1 = random.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
-            ids_cpu_2 = random.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
-            fw_cpu_1 = random.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
-            fw_cpu_2 = random.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+            ids_cpu_1 = self.rng.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+            ids_cpu_2 = self.rng.ids.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+            fw_cpu_1 = self.rng.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
+            fw_cpu_2 = self.rng.firewall.uniform(cpu_base - fluctuation, cpu_base + fluctuation)
 
             if not self.attack_types:
-                self.mttr = max(0.65, min(0.75, getattr(self, "mttr", 0.7) + random.uniform(-0.02, 0.02)))
-                self.container_qps = random.randint(400, 500)
+                self.mttr = max(0.65, min(0.75, getattr(self, "mttr", 0.7) + self.rng.container.uniform(-0.02, 0.02)))
+                self.container_qps = self.rng.container.randint(400, 500)
             else:
-                self.mttr = max(2.23, min(3.18, getattr(self, "mttr", 2.73) + random.uniform(-0.02, 0.02)))
-                self.container_qps = random.randint(140, 200)
+                self.mttr = max(2.23, min(3.18, getattr(self, "mttr", 2.73) + self.rng.container.uniform(-0.02, 0.02)))
+                self.container_qps = self.rng.container.randint(140, 200)
 
         else:
-            ids_cpu_agv = random.uniform(15, 45) + self.resource_allocation.get("IDS-AGV", 0) * 0.5
-            ids_cpu_sched = random.uniform(15, 45) + self.resource_allocation.get("IDS-Scheduler", 0) * 0.5
-            fw_cpu_agv = random.uniform(15, 50) + self.resource_allocation.get("Firewall-AGV", 0) * 0.7
-            fw_cpu_sched = random.uniform(15, 50) + self.resource_allocation.get("Firewall-Scheduler", 0) * 0.7
+            ids_cpu_agv = self.rng.ids.uniform(15, 45) + self.resource_allocation.get("IDS-AGV", 0) * 0.5
+            ids_cpu_sched = self.rng.ids.uniform(15, 45) + self.resource_allocation.get("IDS-Scheduler", 0) * 0.5
+            fw_cpu_agv = self.rng.firewall.uniform(15, 50) + self.resource_allocation.get("Firewall-AGV", 0) * 0.7
+            fw_cpu_sched = self.rng.firewall.uniform(15, 50) + self.resource_allocation.get("Firewall-Scheduler", 0) * 0.7
 
             if not self.attack_types:
                 ids_rate = "N/A（无攻击发生）"
@@ -208,17 +213,17 @@ class Simulator:
             else:
                 # ids_rate = f"{random.uniform(0.85, 0.98) * 100:.2f}%"
                 # fw_rate = f"{random.uniform(0.8, 0.95) * 100:.2f}%"
-                ids_rate_1 = f"{random.uniform(0.85, 0.98) * 100:.2f}%"
-                fw_rate_1 = f"{random.uniform(0.8, 0.95) * 100:.2f}%"
-                ids_rate_2 = f"{random.uniform(0.85, 0.98) * 100:.2f}%"
-                fw_rate_2 = f"{random.uniform(0.8, 0.95) * 100:.2f}%"
+                ids_rate_1 = f"{self.rng.ids.uniform(0.85, 0.98) * 100:.2f}%"
+                fw_rate_1 = f"{self.rng.firewall.uniform(0.8, 0.95) * 100:.2f}%"
+                ids_rate_2 = f"{self.rng.ids.uniform(0.85, 0.98) * 100:.2f}%"
+                fw_rate_2 = f"{self.rng.firewall.uniform(0.8, 0.95) * 100:.2f}%"
 
             if self.attack_types:
-                self.mttr = max(0.7, min(0.9, getattr(self, "mttr", 0.8) + random.uniform(-0.05, 0.05)))
-                self.container_qps = random.randint(800, 1000)
+                self.mttr = max(0.7, min(0.9, getattr(self, "mttr", 0.8) + self.rng.container.uniform(-0.05, 0.05)))
+                self.container_qps = self.rng.container.randint(800, 1000)
             else:
-                self.mttr = max(0.2, min(0.5, getattr(self, "mttr", 0.35) + random.uniform(-0.05, 0.05)))
-                self.container_qps = random.randint(700, 800)
+                self.mttr = max(0.2, min(0.5, getattr(self, "mttr", 0.35) + self.rng.container.uniform(-0.05, 0.05)))
+                self.container_qps = self.rng.container.randint(700, 800)
 
 
         flow_table = Table.grid(expand=True)
@@ -291,5 +296,9 @@ class Simulator:
 
 
 if __name__ == "__main__":
-    sim = Simulator()
+    parser = argparse.ArgumentParser(description="智慧工厂安全防御仿真系统")
+    parser.add_argument("--seed", type=int, help="随机数种子（不指定则随机生成）")
+    args = parser.parse_args()
+    sim = Simulator(args.seed)
+    console.print(f"[dim]随机数种子: {sim.rng.seed}[/]")
     sim.run()
\ No newline at end of file